@@ -20,4 +20,7 @@ sys.path.insert(0, str(src_path))
 from md_word_renderer.cli import main
 
 if __name__ == '__main__':
+    # 打包後 (PyInstaller) 使用 multiprocessing 的批次 / HTTP worker 需要
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
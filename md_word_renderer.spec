@@ -57,9 +57,12 @@ hiddenimports = [
     'md_word_renderer.renderer.excel_renderer',
     'md_word_renderer.renderer.excel_image_handler',
     'md_word_renderer.renderer.excel_layout',
+    'md_word_renderer.renderer.excel_styles',
+    'md_word_renderer.renderer.excel_columns',
     'md_word_renderer.renderer.factory',
     'md_word_renderer.validator',
     'md_word_renderer.validator.schema_validator',
+    'md_word_renderer.validator.codegen',
     'md_word_renderer.gui',
     'md_word_renderer.gui.main_window',
     'md_word_renderer.gui.batch_window',
@@ -68,6 +71,14 @@ hiddenimports = [
     'md_word_renderer.gui.config_manager',
     'md_word_renderer.gui.error_handler',
     'md_word_renderer.gui.template_preview',
+    'md_word_renderer.utils.pipeline',
+    'md_word_renderer.utils.memory',
+    'md_word_renderer.utils.journal',
+    'md_word_renderer.utils.cost_model',
+    'md_word_renderer.utils.template_cache',
+    'md_word_renderer.utils.timing',
+    'md_word_renderer.utils.profiling',
+    'md_word_renderer.utils.memprofile',
 ]
 
 # 排除的模組（減少檔案大小）
@@ -52,11 +52,35 @@ hiddenimports = [
     'md_word_renderer.renderer.excel_renderer',
     'md_word_renderer.renderer.excel_image_handler',
     'md_word_renderer.renderer.excel_layout',
+    'md_word_renderer.renderer.excel_styles',
+    'md_word_renderer.renderer.excel_columns',
     'md_word_renderer.renderer.factory',
     'md_word_renderer.validator',
     'md_word_renderer.validator.schema_validator',
+    'md_word_renderer.validator.codegen',
     'md_word_renderer.cli',
     'md_word_renderer.cli.main',
+    'md_word_renderer.cli.daemon',
+    'md_word_renderer.cli.http_server',
+    'md_word_renderer.cli.watch',
+    'md_word_renderer.utils.watcher',
+    'md_word_renderer.utils.metrics',
+    'md_word_renderer.utils.pipeline',
+    'md_word_renderer.utils.memory',
+    'md_word_renderer.utils.journal',
+    'md_word_renderer.utils.render_plan',
+    'md_word_renderer.utils.cost_model',
+    'md_word_renderer.utils.fingerprint',
+    'md_word_renderer.utils.manifest',
+    'md_word_renderer.utils.output_cache',
+    'md_word_renderer.utils.sharding',
+    'md_word_renderer.utils.template_cache',
+    'md_word_renderer.utils.timing',
+    'md_word_renderer.utils.profiling',
+    'md_word_renderer.utils.memprofile',
+    'md_word_renderer.bench',
+    'md_word_renderer.bench.suite',
+    'md_word_renderer.bench.synthetic',
 ]
 
 # 排除的模組（減少檔案大小）
@@ -17,4 +17,7 @@ from md_word_renderer.gui import main
 
 
 if __name__ == "__main__":
+    # 打包後 (PyInstaller) 使用 multiprocessing 的批次 worker 需要
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
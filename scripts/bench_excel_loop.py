@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Excel ``{% for %}`` 列展開效能量測
+
+建立一個 body 列帶字型 / 填色 / 框線 / 數字格式 / 列高 / 合併儲存格的樣板，
+分別以「無樣式」與「有樣式」展開 N 個 item，印出每產生一列的平均成本。
+
+執行：``python scripts/bench_excel_loop.py [N]``（預設 N=5000）
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.styles import Border, Font, PatternFill, Side
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine  # noqa: E402
+
+if hasattr(sys.stdout, "reconfigure"):
+    try:
+        sys.stdout.reconfigure(encoding="utf-8")
+    except (ValueError, AttributeError):
+        pass
+
+
+def build_sheet(styled: bool):
+    wb = Workbook()
+    sheet = wb.active
+    sheet["A1"], sheet["B1"], sheet["C1"], sheet["D1"] = "編號", "值", "", "金額"
+    sheet["A2"] = "{% for x in items %}"
+    sheet["A3"] = "{{x.number}}"
+    sheet["B3"] = "{{x.value}}"
+    sheet["D3"] = "{{x.amount}}"
+    if styled:
+        thin = Side(style="thin")
+        sheet["A3"].font = Font(bold=True)
+        sheet["B3"].fill = PatternFill(start_color="FFDDEBF7", end_color="FFDDEBF7", fill_type="solid")
+        sheet["D3"].number_format = "#,##0.00"
+        for col in "ABCD":
+            sheet[f"{col}3"].border = Border(top=thin, bottom=thin, left=thin, right=thin)
+        sheet.row_dimensions[3].height = 24
+        sheet.merge_cells("B3:C3")
+    sheet["A4"] = "{% endfor %}"
+    return sheet
+
+
+def run(n: int, styled: bool) -> float:
+    items = [
+        {"number": str(i), "value": f"項目 {i}", "amount": i * 1.5}
+        for i in range(1, n + 1)
+    ]
+    sheet = build_sheet(styled)
+    engine = ExcelTemplateEngine()
+    start = time.perf_counter()
+    inserted = engine.expand_for_loops(sheet, {"data": {}, "items": items}, {})
+    elapsed = time.perf_counter() - start
+    assert inserted == n
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"Excel for-loop 展開：{n} 列\n")
+    for styled in (False, True):
+        elapsed = run(n, styled)
+        label = "有樣式" if styled else "無樣式"
+        print(f"  {label}: 共 {elapsed:.3f}s，每列 {elapsed / n * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
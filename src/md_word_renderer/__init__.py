@@ -7,14 +7,20 @@ MD-Word Template Renderer
 __version__ = "2.2.1"
 __author__ = "ytssamuel"
 
-from .parser.markdown_parser import MarkdownParser
-from .renderer.word_renderer import WordRenderer
-from .validator import SchemaValidator
-
 __all__ = ["MarkdownParser", "WordRenderer", "SchemaValidator"]
 
 
 def __getattr__(name):
+    # 第一次取用時才 import，``import md_word_renderer.cli`` 不會載入 docxtpl / jsonschema
+    if name == "MarkdownParser":
+        from .parser.markdown_parser import MarkdownParser
+        return MarkdownParser
+    if name == "WordRenderer":
+        from .renderer.word_renderer import WordRenderer
+        return WordRenderer
+    if name == "SchemaValidator":
+        from .validator import SchemaValidator
+        return SchemaValidator
     if name == "ExcelRenderer":
         from .renderer.excel_renderer import ExcelRenderer
         return ExcelRenderer
@@ -0,0 +1,19 @@
+"""
+效能量測套件
+
+- ``synthetic``：合成輸入與樣板
+- ``suite``：量測案例、結果 JSON 與基準比較（``md2word bench``）
+"""
+
+from .suite import CASES, compare_results, load_results, run_suite, write_results
+from .synthetic import SCENARIOS, write_scenario
+
+__all__ = [
+    "CASES",
+    "SCENARIOS",
+    "compare_results",
+    "load_results",
+    "run_suite",
+    "write_results",
+    "write_scenario",
+]
@@ -0,0 +1,302 @@
+"""
+效能量測套件（``md2word bench``）
+
+量測解析、Word 渲染、Excel 渲染與批次吞吐量，結果寫成 JSON，可與先前存下的基準比較：
+
+    md2word bench --output bench.json                 # 量測並存檔
+    md2word bench --baseline bench.json --tolerance 0.1   # 與基準比較，變慢超過 10% 即失敗
+
+每個案例先在計時外完成準備（產生輸入 / 樣板、讀入樣板），再重複執行 ``repeat`` 次，
+以中位數比較（最快一次一併記錄）。``scale`` 同比例縮放所有案例的資料量，供快速檢查用。
+"""
+
+import fnmatch
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .synthetic import wide_markdown, write_scenario
+
+
+RESULTS_VERSION = 1
+
+# (名稱, 類別, 情境, 資料量)；渲染的清單案例取 1 萬項，解析取 10 萬項
+CASES: List[Tuple[str, str, str, int]] = [
+    ("parse/wide", "parse", "wide", 2000),
+    ("parse/deep", "parse", "deep", 200),
+    ("parse/list", "parse", "list", 100_000),
+    ("parse/images", "parse", "images", 500),
+    ("parse/multiline", "parse", "multiline", 300),
+    ("word/wide", "word", "wide", 2000),
+    ("word/deep", "word", "deep", 50),
+    ("word/list", "word", "list", 10_000),
+    ("word/images", "word", "images", 200),
+    ("word/multiline", "word", "multiline", 300),
+    ("excel/wide", "excel", "wide", 2000),
+    ("excel/deep", "excel", "deep", 50),
+    ("excel/list", "excel", "list", 10_000),
+    ("excel/images", "excel", "images", 200),
+    ("excel/multiline", "excel", "multiline", 300),
+    ("batch/docx", "batch", "wide", 200),
+    ("batch/xlsx", "batch", "wide", 200),
+]
+
+# 批次案例每個檔案的欄位數
+BATCH_FIELDS = 50
+
+
+def select_cases(patterns: Optional[Sequence[str]] = None) -> List[Tuple[str, str, str, int]]:
+    """依 glob（例如 ``parse/*``、``*/list``）篩選案例；未指定時為全部"""
+    if not patterns:
+        return list(CASES)
+    return [case for case in CASES if any(fnmatch.fnmatchcase(case[0], p) for p in patterns)]
+
+
+def _scaled(size: int, scale: float) -> int:
+    return max(int(size * scale), 1)
+
+
+# ----------------------------------------------------------------- cases
+
+
+def _prepare_parse(workdir: Path, scenario: str, size: int) -> Callable[[], None]:
+    from ..parser import MarkdownParser
+
+    paths = write_scenario(str(workdir), scenario, size)
+    text = Path(paths["input"]).read_text(encoding="utf-8")
+
+    def run() -> None:
+        MarkdownParser().parse_content(text, source_dir=workdir)
+
+    return run
+
+
+def _prepare_render(workdir: Path, scenario: str, size: int, fmt: str) -> Callable[[], None]:
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer
+
+    paths = write_scenario(str(workdir), scenario, size)
+    data = MarkdownParser().parse(paths["input"])
+    template = Path(paths[fmt]).read_bytes()
+
+    def run() -> None:
+        renderer = build_renderer(template_path=paths[fmt], format_hint=fmt)
+        renderer.load_template(paths[fmt], source=template)
+        renderer.render(data)
+        renderer.to_bytes()
+
+    return run
+
+
+def _prepare_batch(workdir: Path, files: int, fmt: str) -> Callable[[], None]:
+    from ..utils.pipeline import BatchPipeline
+
+    in_dir = workdir / "batch_inputs"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    text = wide_markdown(BATCH_FIELDS)
+    inputs = []
+    for i in range(files):
+        path = in_dir / f"doc_{i:05d}.md"
+        path.write_text(text, encoding="utf-8")
+        inputs.append(path)
+    template = write_scenario(str(workdir), "wide", BATCH_FIELDS)[fmt]
+    out_dir = workdir / f"batch_out_{fmt}"
+    jobs = [(str(p), template, str(out_dir / f"{p.stem}.{fmt}")) for p in inputs]
+    workers = min(os.cpu_count() or 1, 4)
+
+    def run() -> None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        result = BatchPipeline(workers=workers).run(jobs, fmt=fmt)
+        if result["failed_count"]:
+            raise RuntimeError(f"批次量測有 {result['failed_count']} 個檔案失敗")
+
+    return run
+
+
+def _prepare(workdir: Path, name: str, group: str, scenario: str, size: int) -> Callable[[], None]:
+    if group == "parse":
+        return _prepare_parse(workdir, scenario, size)
+    if group == "word":
+        return _prepare_render(workdir, scenario, size, "docx")
+    if group == "excel":
+        return _prepare_render(workdir, scenario, size, "xlsx")
+    if group == "batch":
+        # batch/docx、batch/xlsx：名稱即輸出格式
+        return _prepare_batch(workdir, size, name.split("/", 1)[1])
+    raise ValueError(f"未知的案例類別: {group}")
+
+
+# ----------------------------------------------------------------- runner
+
+
+def environment() -> Dict[str, Any]:
+    from .. import __version__
+
+    return {
+        "renderer_version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(workdir: str, scale: float = 1.0, repeat: int = 3,
+              patterns: Optional[Sequence[str]] = None,
+              on_case: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    執行量測
+
+    Args:
+        workdir: 放置合成輸入、樣板與輸出的目錄
+        scale: 資料量倍率
+        repeat: 每個案例的重複次數
+        patterns: 只執行名稱符合的案例（glob）
+        on_case: 每個案例完成時呼叫，參數為 ``(名稱, 結果)``
+
+    Returns:
+        dict: ``version`` / ``created`` / ``environment`` / ``scale`` / ``repeat`` /
+        ``cases``（``{名稱: {group, scenario, size, runs_s, median_s, best_s, per_s}}``）
+    """
+    repeat = max(repeat, 1)
+    root = Path(workdir)
+    cases: Dict[str, Dict[str, Any]] = {}
+    for name, group, scenario, size in select_cases(patterns):
+        size = _scaled(size, scale)
+        case_dir = root / name.replace("/", "_")
+        run = _prepare(case_dir, name, group, scenario, size)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+        median = statistics.median(runs)
+        result = {
+            "group": group,
+            "scenario": scenario,
+            "size": size,
+            "runs_s": [round(s, 6) for s in runs],
+            "median_s": round(median, 6),
+            "best_s": round(min(runs), 6),
+            # 解析 / 渲染為每秒項目數，批次為每秒檔案數
+            "per_s": round(size / median, 2) if median > 0 else None,
+        }
+        cases[name] = result
+        if on_case is not None:
+            on_case(name, result)
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "scale": scale,
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+# ----------------------------------------------------------------- compare
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    tolerance: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    以中位數比較兩次量測
+
+    ``current / baseline - 1`` 超過 ``tolerance`` 為 ``regressed``，低於 ``-tolerance``
+    為 ``improved``；只出現在其中一邊的案例標為 ``new`` / ``missing``，資料量不同者標為
+    ``incomparable``（``--scale`` 不同時）。
+
+    Returns:
+        list: ``{name, status, baseline_s, current_s, change}``，依案例順序
+    """
+    rows = []
+    base_cases = baseline.get("cases", {})
+    cur_cases = current.get("cases", {})
+    for name in list(cur_cases) + [n for n in base_cases if n not in cur_cases]:
+        cur, base = cur_cases.get(name), base_cases.get(name)
+        row: Dict[str, Any] = {
+            "name": name,
+            "baseline_s": base["median_s"] if base else None,
+            "current_s": cur["median_s"] if cur else None,
+            "change": None,
+        }
+        if base is None:
+            row["status"] = "new"
+        elif cur is None:
+            row["status"] = "missing"
+        elif base.get("size") != cur.get("size"):
+            row["status"] = "incomparable"
+        else:
+            change = cur["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0
+            row["change"] = change
+            if change > tolerance:
+                row["status"] = "regressed"
+            elif change < -tolerance:
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+_STATUS_LABELS = {
+    "ok": "持平",
+    "improved": "變快",
+    "regressed": "變慢 ✗",
+    "new": "新案例",
+    "missing": "未執行",
+    "incomparable": "資料量不同",
+}
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"   {'案例':<18}{'資料量':>6}{'中位數ms':>10}{'最快ms':>8}{'每秒':>10}"]
+    for name, case in results["cases"].items():
+        per_s = f"{case['per_s']:>12,.0f}" if case["per_s"] is not None else f"{'-':>12}"
+        lines.append(f"   {name:<20}{case['size']:>9}{case['median_s'] * 1000:>12.1f}"
+                     f"{case['best_s'] * 1000:>10.1f}{per_s}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]], tolerance: float) -> str:
+    lines = [f"   {'案例':<18}{'基準ms':>8}{'本次ms':>8}{'變化':>7}  （容許 ±{tolerance * 100:.0f}%）"]
+    for row in rows:
+        base = f"{row['baseline_s'] * 1000:>10.1f}" if row["baseline_s"] is not None else f"{'-':>10}"
+        cur = f"{row['current_s'] * 1000:>10.1f}" if row["current_s"] is not None else f"{'-':>10}"
+        change = f"{row['change'] * 100:>+8.1f}%" if row["change"] is not None else f"{'':>9}"
+        lines.append(f"   {row['name']:<20}{base}{cur}{change}  {_STATUS_LABELS[row['status']]}")
+    return "\n".join(lines)
+
+
+def environment_differences(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """兩次量測環境不同的項目（不同機器 / Python 版本的比較僅供參考）"""
+    cur_env, base_env = current.get("environment", {}), baseline.get("environment", {})
+    return [
+        f"{key}: {base_env.get(key)} → {cur_env.get(key)}"
+        for key in ("python", "implementation", "machine", "cpu_count", "renderer_version")
+        if base_env.get(key) != cur_env.get(key)
+    ]
+
+
+def write_results(path: str, results: Dict[str, Any]) -> None:
+    import json
+
+    from ..utils.file_utils import FileUtils
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    FileUtils.atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if not isinstance(results, dict) or "cases" not in results:
+        raise ValueError(f"{path} 不是 md2word bench 的結果檔")
+    return results
@@ -0,0 +1,176 @@
+"""
+效能量測用的合成輸入與樣板
+
+每個情境（scenario）產生一份 Markdown 與對應的 docx / xlsx 樣板，刻意放大某一種負載：
+
+- ``wide``：大量扁平欄位
+- ``deep``：10 層巢狀子項目
+- ``list``：單一欄位下的大量清單項目（預設 10 萬項）
+- ``images``：重複引用同一張圖片
+- ``multiline``：多行長字串值
+
+樣板以 python-docx / openpyxl 直接產生（同 ``scripts/create_templates.py``、
+``scripts/create_excel_templates.py``），不依賴 repo 內的範例樣板。
+"""
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+
+IMAGE_NAME = "bench_image.png"
+DEEP_LEVELS = 10
+MULTILINE_LINES = 40
+
+
+def write_png(path: str, width: int = 64, height: int = 48,
+              rgb: Tuple[int, int, int] = (68, 114, 196)) -> str:
+    """寫出單色 PNG（不依賴 Pillow）"""
+    def chunk(tag: bytes, body: bytes) -> bytes:
+        return (struct.pack(">I", len(body)) + tag + body
+                + struct.pack(">I", zlib.crc32(tag + body) & 0xFFFFFFFF))
+
+    row = b"\x00" + bytes(rgb) * width
+    png = (b"\x89PNG\r\n\x1a\n"
+           + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+           + chunk(b"IDAT", zlib.compress(row * height))
+           + chunk(b"IEND", b""))
+    Path(path).write_bytes(png)
+    return path
+
+
+# ----------------------------------------------------------------- markdown
+
+
+def wide_markdown(size: int) -> str:
+    lines = [f"# 合成資料 - {size} 個扁平欄位", ""]
+    lines += [f"{i}. 欄位{i} | 第 {i} 個欄位的值 ABC-{i:06d}" for i in range(1, size + 1)]
+    return "\n".join(lines) + "\n"
+
+
+def deep_markdown(size: int) -> str:
+    lines = [f"# 合成資料 - {size} 棵 {DEEP_LEVELS} 層巢狀樹", ""]
+    for tree in range(1, size + 1):
+        lines.append(f"{tree}. 樹{tree} | ")
+        for level in range(1, DEEP_LEVELS):
+            lines.append(f"{'    ' * level}{level}. 第 {level + 1} 層節點 {tree}-{level}")
+    return "\n".join(lines) + "\n"
+
+
+def list_markdown(size: int) -> str:
+    lines = [f"# 合成資料 - {size} 個清單項目", "", "1. 清單 | "]
+    lines += [f"    {i}. 項目 {i}：測試案例描述" for i in range(1, size + 1)]
+    return "\n".join(lines) + "\n"
+
+
+def images_markdown(size: int) -> str:
+    lines = [f"# 合成資料 - {size} 個重複圖片", "", "1. 圖片 | "]
+    lines += [f"    {i}. ![截圖 {i}]({IMAGE_NAME})" for i in range(1, size + 1)]
+    return "\n".join(lines) + "\n"
+
+
+def multiline_markdown(size: int) -> str:
+    lines = [f"# 合成資料 - {size} 個多行欄位", ""]
+    for i in range(1, size + 1):
+        value = "\\n".join(f"第 {j} 行：說明 {i} 的內容，含有一些較長的文字以模擬實際的變更描述"
+                           for j in range(1, MULTILINE_LINES + 1))
+        lines.append(f"{i}. 說明{i} | {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------- templates
+
+
+def _docx_paragraphs(scenario: str, size: int) -> List[str]:
+    if scenario == "wide":
+        return [f"欄位{i}：{{{{欄位{i}}}}}" for i in range(1, size + 1)]
+    if scenario == "deep":
+        return [
+            "{% macro walk(nodes) %}{% for n in nodes %}{{ n.value }} / {{ walk(n.children) }}"
+            "{% endfor %}{% endmacro %}",
+            f"{{%p for t in range(1, {size + 1}) %}}",
+            "{{ walk(data['樹' ~ t]) }}",
+            "{%p endfor %}",
+        ]
+    if scenario == "list":
+        return ["{%p for item in 清單 %}", "{{ item.number }}. {{ item.value }}", "{%p endfor %}"]
+    if scenario == "images":
+        return ["{%p for item in 圖片 %}", "{{ item.image }}", "{%p endfor %}"]
+    if scenario == "multiline":
+        return [f"{{{{說明{i}}}}}" for i in range(1, size + 1)]
+    raise ValueError(f"未知的情境: {scenario}")
+
+
+def build_docx_template(path: str, scenario: str, size: int) -> str:
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(f"效能量測樣板（{scenario}）", 0)
+    for text in _docx_paragraphs(scenario, size):
+        doc.add_paragraph(text)
+    doc.save(path)
+    return path
+
+
+def build_xlsx_template(path: str, scenario: str, size: int) -> str:
+    """
+    標頭 sheet 放純量欄位；``list`` 以 ``{% for %}`` 展開，``deep`` / ``images``
+    沒有對應 sheet，走 auto-flatten（``images`` 會逐一嵌入圖片）
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = "基本資訊"
+    sheet["A1"], sheet["B1"] = "欄位", "值"
+    if scenario in ("wide", "multiline"):
+        prefix = "欄位" if scenario == "wide" else "說明"
+        for i in range(1, size + 1):
+            sheet.cell(row=i + 1, column=1, value=f"{prefix}{i}")
+            sheet.cell(row=i + 1, column=2, value=f"{{{{{prefix}{i}}}}}")
+    elif scenario == "list":
+        list_sheet = wb.create_sheet("清單")
+        list_sheet["A1"], list_sheet["B1"] = "編號", "內容"
+        list_sheet["A2"] = "{% for item in 清單 %}"
+        list_sheet["A3"] = "{{item.number}}"
+        list_sheet["B3"] = "{{item.value}}"
+        list_sheet["A4"] = "{% endfor %}"
+    elif scenario not in SCENARIOS:
+        raise ValueError(f"未知的情境: {scenario}")
+    wb.save(path)
+    return path
+
+
+SCENARIOS: Dict[str, Callable[[int], str]] = {
+    "wide": wide_markdown,
+    "deep": deep_markdown,
+    "list": list_markdown,
+    "images": images_markdown,
+    "multiline": multiline_markdown,
+}
+
+
+def write_scenario(workdir: str, scenario: str, size: int) -> Dict[str, str]:
+    """
+    在 ``workdir`` 寫出情境的輸入與樣板
+
+    Returns:
+        dict: ``input`` / ``docx`` / ``xlsx`` 路徑
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"未知的情境: {scenario}（可用：{', '.join(SCENARIOS)}）")
+    root = Path(workdir)
+    root.mkdir(parents=True, exist_ok=True)
+    if scenario == "images" and not (root / IMAGE_NAME).exists():
+        write_png(str(root / IMAGE_NAME))
+    stem = f"{scenario}_{size}"
+    paths = {
+        "input": str(root / f"{stem}.md"),
+        "docx": str(root / f"{stem}.docx"),
+        "xlsx": str(root / f"{stem}.xlsx"),
+    }
+    Path(paths["input"]).write_text(SCENARIOS[scenario](size), encoding="utf-8")
+    build_docx_template(paths["docx"], scenario, size)
+    build_xlsx_template(paths["xlsx"], scenario, size)
+    return paths
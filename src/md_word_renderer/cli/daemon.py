@@ -0,0 +1,353 @@
+"""
+常駐渲染服務（``md2word serve``）
+
+daemon 啟動後保留已載入的模組（docxtpl / python-docx / openpyxl / jinja2 / jsonschema）、
+樣板檔案內容（``TemplateCache``，bytes；每個工作仍由此重新解析，原因見該模組）與已編譯的
+Jinja2 cell 樣板；``md2word render`` 偵測到
+daemon 在執行時，透過 Unix socket 把工作交給它，省下每次啟動 Python 與冷載入的成本。
+
+通訊協定：每個連線送出一行 JSON request，收到一行 JSON response。
+
+    {"command": "render", "input": "/abs/in.md", "template": "/abs/tpl.docx",
+     "output": "/abs/out.docx", "format": "auto", "validate": true}
+    → {"ok": true, "result": {"format": "docx", "fields": 12, "output": "/abs/out.docx"}}
+    → {"ok": false, "error": "..."}
+
+其他指令：``ping`` / ``stats`` / ``shutdown``。
+
+client 等待回應最多 ``$MD2WORD_DAEMON_TIMEOUT`` 秒（預設 ``DEFAULT_TIMEOUT``；``0`` 表示不限），
+daemon 卡住（渲染停滯、handler 死結）時 ``md2word render`` 改在本行程內渲染，不會永遠等待。
+
+本模組頂層只 import 標準函式庫，client 端（``render_via_daemon``）不會載入任何渲染依賴。
+"""
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+HAS_UNIX_SOCKET = hasattr(socket, "AF_UNIX")
+SOCKET_ENV_VAR = "MD2WORD_SOCKET"
+CONNECT_TIMEOUT = 0.5
+TIMEOUT_ENV_VAR = "MD2WORD_DAEMON_TIMEOUT"
+DEFAULT_TIMEOUT = 60.0
+
+
+class DaemonError(Exception):
+    """daemon 回報的錯誤（渲染失敗、協定錯誤等）"""
+
+
+class DaemonUnresponsive(DaemonError):
+    """daemon 接受了連線，但未在時限內回應"""
+
+
+def default_timeout() -> Optional[float]:
+    """等待 daemon 回應的秒數：``$MD2WORD_DAEMON_TIMEOUT``，否則為 ``DEFAULT_TIMEOUT``；0 表示不限"""
+    env = os.environ.get(TIMEOUT_ENV_VAR)
+    if not env:
+        return DEFAULT_TIMEOUT
+    try:
+        value = float(env)
+    except ValueError:
+        return DEFAULT_TIMEOUT
+    return value if value > 0 else None
+
+
+def default_socket_path() -> str:
+    """預設 socket 路徑：``$MD2WORD_SOCKET``，否則為暫存目錄下的 ``md2word-<uid>.sock``"""
+    env = os.environ.get(SOCKET_ENV_VAR)
+    if env:
+        return env
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return str(Path(tempfile.gettempdir()) / f"md2word-{uid}.sock")
+
+
+# ----------------------------------------------------------------- client
+
+
+def send_request(socket_path: str, payload: Dict[str, Any],
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    送出一個 request 並等待 response
+
+    Args:
+        timeout: 等待回應的秒數；None 表示不限
+
+    Raises:
+        OSError: 連線失敗（daemon 未執行、socket 失效）
+        DaemonUnresponsive: 超過 ``timeout`` 仍未收到回應
+        DaemonError: response 格式錯誤
+    """
+    if not HAS_UNIX_SOCKET:
+        raise OSError("此平台不支援 Unix socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        sock.settimeout(timeout)
+        try:
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        except socket.timeout as exc:
+            raise DaemonUnresponsive(f"daemon 在 {timeout:g} 秒內未回應") from exc
+    if not line:
+        raise DaemonError("daemon 未回應")
+    try:
+        return json.loads(line.decode("utf-8"))
+    except ValueError as exc:
+        raise DaemonError(f"無法解析 daemon 回應: {exc}") from exc
+
+
+def is_running(socket_path: Optional[str] = None) -> bool:
+    path = socket_path or default_socket_path()
+    if not HAS_UNIX_SOCKET or not os.path.exists(path):
+        return False
+    try:
+        return bool(send_request(path, {"command": "ping"}, timeout=CONNECT_TIMEOUT).get("ok"))
+    except (OSError, DaemonError):
+        return False
+
+
+def render_via_daemon(
+    input_path: str,
+    template_path: str,
+    output_path: str,
+    format_hint: str = "auto",
+    validate: bool = True,
+    socket_path: Optional[str] = None,
+    output_cache=None,
+    timeout: Optional[float] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    把 render 工作交給 daemon
+
+    ``output_cache``（``OutputCache``）只傳送其設定，daemon 端以同一個快取目錄查詢 / 寫入。
+    ``timeout`` 為等待回應的秒數（預設 ``default_timeout()``）。
+
+    Returns:
+        dict: daemon 回傳的 ``result``；daemon 未執行時回傳 ``None``（caller 改走行程內渲染）
+
+    Raises:
+        DaemonUnresponsive: daemon 未在時限內回應（caller 可改走行程內渲染）
+        DaemonError: daemon 有收到工作但渲染失敗
+    """
+    path = socket_path or default_socket_path()
+    if not HAS_UNIX_SOCKET or not os.path.exists(path):
+        return None
+    payload = {
+        "command": "render",
+        "input": str(Path(input_path).resolve()),
+        "template": str(Path(template_path).resolve()),
+        "output": str(Path(output_path).resolve()),
+        "format": format_hint,
+        "validate": validate,
+    }
+    if output_cache is not None:
+        payload["cache"] = {
+            "dir": str(output_cache.cache_dir.resolve()),
+            "max_bytes": output_cache.max_bytes,
+            "link": output_cache.link,
+        }
+    try:
+        response = send_request(path, payload, timeout=timeout if timeout is not None else default_timeout())
+    except OSError:
+        return None
+    if not response.get("ok"):
+        raise DaemonError(response.get("error") or "daemon 渲染失敗")
+    return response.get("result") or {}
+
+
+# ----------------------------------------------------------------- server
+
+
+class RenderDaemon:
+    """
+    常駐渲染服務
+
+    Args:
+        socket_path: Unix socket 路徑
+        preload: 啟動時預先載入的樣板路徑
+        metrics: 提供時累計渲染指標（``MetricsRegistry``，見 ``metrics.RENDER_METRICS``）
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, preload: Optional[List[str]] = None,
+                 metrics=None):
+        from ..utils.template_cache import TemplateCache
+
+        self.socket_path = socket_path or default_socket_path()
+        self.template_cache = TemplateCache()
+        self.output_caches: Dict[Tuple[str, int, bool], Any] = {}
+        self.preload = list(preload or [])
+        self.started_at = time.time()
+        self.jobs = 0
+        self.failures = 0
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.describe("uptime_seconds", "Seconds since the daemon started")
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    # ------------------------------------------------------------ lifecycle
+
+    def warm_up(self) -> None:
+        """載入渲染相關模組與預載樣板"""
+        from ..renderer import word_renderer, excel_renderer  # noqa: F401
+        from ..validator import SchemaValidator  # noqa: F401
+        import jsonschema  # noqa: F401
+
+        for template in self.preload:
+            self.template_cache.preload(template)
+
+    def serve_forever(self) -> None:
+        if not HAS_UNIX_SOCKET:
+            raise DaemonError("此平台不支援 Unix socket，無法啟動 daemon")
+        self._claim_socket_path()
+        self.warm_up()
+
+        daemon = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    payload = json.loads(line.decode("utf-8"))
+                    response = daemon.handle(payload)
+                except Exception as exc:  # 協定錯誤不應讓 daemon 結束
+                    response = {"ok": False, "error": str(exc)}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            # shutdown() 會等待 serve_forever 結束，不可在 handler thread 內直接呼叫
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def _claim_socket_path(self) -> None:
+        if not os.path.exists(self.socket_path):
+            Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+            return
+        if is_running(self.socket_path):
+            raise DaemonError(f"daemon 已在執行中: {self.socket_path}")
+        # 上次異常結束留下的 socket 檔
+        os.unlink(self.socket_path)
+
+    # ------------------------------------------------------------- requests
+
+    def handle(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        command = payload.get("command")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if command == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if command == "shutdown":
+            self.shutdown()
+            return {"ok": True}
+        if command == "render":
+            return self._render(payload)
+        return {"ok": False, "error": f"未知的指令: {command!r}"}
+
+    def _output_cache(self, config: Optional[Dict[str, Any]]):
+        """依 client 傳來的設定取得（必要時建立）共用的 ``OutputCache``"""
+        if not config:
+            return None
+        from ..utils.output_cache import OutputCache
+
+        key = (config["dir"], int(config["max_bytes"]), bool(config.get("link")))
+        with self._lock:
+            cache = self.output_caches.get(key)
+            if cache is None:
+                cache = self.output_caches[key] = OutputCache(
+                    cache_dir=key[0], max_bytes=key[1], link=key[2]
+                )
+        return cache
+
+    def _render(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from ..utils.timing import Timings, collecting
+        from .main import process_one
+
+        output_cache = self._output_cache(payload.get("cache"))
+        timings = Timings() if self.metrics is not None else None
+        try:
+            with collecting(timings):
+                result = process_one(
+                    input_path=payload["input"],
+                    template_path=payload["template"],
+                    output_path=payload["output"],
+                    format_hint=payload.get("format", "auto"),
+                    validate=bool(payload.get("validate", True)),
+                    template_cache=self.template_cache,
+                    output_cache=output_cache,
+                )
+        except Exception as exc:
+            with self._lock:
+                self.jobs += 1
+                self.failures += 1
+            if self.metrics is not None:
+                self.metrics.inc("failures_total", {"exception": type(exc).__name__})
+            return {"ok": False, "error": str(exc)}
+
+        with self._lock:
+            self.jobs += 1
+        if self.metrics is not None:
+            self._record_metrics(payload, result, timings, output_cache is not None)
+        return {
+            "ok": True,
+            "result": {
+                "format": result["format"],
+                "fields": result["fields"],
+                "output": str(result["output"]),
+                "cached": result["cached"],
+            },
+        }
+
+    def _record_metrics(self, payload: Dict[str, Any], result: Dict[str, Any],
+                        timings, cached_lookup: bool) -> None:
+        from ..utils.metrics import record_cache
+
+        metrics = self.metrics
+        metrics.inc("files_rendered_total", {"format": result["format"]})
+        metrics.inc("input_bytes_total", value=os.path.getsize(payload["input"]))
+        metrics.inc("output_bytes_total", value=os.path.getsize(result["output"]))
+        for stage, seconds in timings.records():
+            metrics.observe("stage_duration_seconds", seconds, {"stage": stage})
+        if cached_lookup:
+            record_cache(metrics, "output", hits=int(result["cached"]), misses=int(not result["cached"]))
+
+    def update_metrics(self, metrics) -> None:
+        """寫出指標檔前更新樣板快取命中率等由 daemon 自行統計的值"""
+        stats = self.stats()
+        cache = stats["template_cache"]
+        lookups = cache["hits"] + cache["misses"]
+        if lookups:
+            metrics.set_gauge("cache_hit_ratio", cache["hits"] / lookups, {"cache": "template"})
+        metrics.set_gauge("uptime_seconds", stats["uptime_s"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs, failures = self.jobs, self.failures
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 3),
+            "jobs": jobs,
+            "failures": failures,
+            "template_cache": self.template_cache.stats(),
+        }
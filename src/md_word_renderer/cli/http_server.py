@@ -0,0 +1,475 @@
+"""
+HTTP 渲染服務（``md2word http``）
+
+以 asyncio 實作的輕量 HTTP/1.1 服務（只用標準函式庫），把 Markdown 文字或已解析的
+JSON 資料渲染成 docx / xlsx 並直接回傳檔案內容。
+
+- 樣板於啟動時登錄並預先讀入（``--template ID=PATH`` / ``--template-dir DIR``），
+  worker 行程啟動時各自取得一份，之後每個工作只傳樣板 id。
+- 渲染在固定大小的 process pool 中執行；排隊中 + 執行中的工作超過上限時回 ``429``。
+- worker 行程異常結束（``BrokenProcessPool``）時重建 process pool，之後的請求不受影響；
+  處理請求時發生未預期的例外一律回 ``500``，不會讓用戶端等到逾時。
+- ``GET /metrics`` 以 Prometheus text 格式（``?format=json`` 為 JSON）回報請求數、延遲 histogram
+  與渲染指標（檔案數、依例外類型的失敗數、位元組、各步驟耗時）；``--metrics-file`` 另定期寫成檔案。
+
+API：
+
+    GET  /healthz                 → 200 "ok"
+    GET  /templates               → {"templates": [{"id": ..., "format": ..., "path": ...}]}
+    POST /render/<template_id>    body: Markdown（任意 Content-Type）或 JSON 物件
+                                  （``Content-Type: application/json``，視為已解析的資料）
+                                  query: ``validate=0`` 跳過資料驗證
+                                  → 200 docx / xlsx bytes
+    GET  /metrics[?format=json]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from ..utils.metrics import MetricsRegistry, describe_render_metrics
+
+
+CONTENT_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+DEFAULT_MAX_BODY = 16 * 1024 * 1024
+HEADER_LIMIT = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ----------------------------------------------------------------- registry
+
+
+class TemplateRegistry:
+    """
+    樣板 id → （路徑、格式、內容）
+
+    Example:
+        >>> registry = TemplateRegistry()
+        >>> registry.register("invoice", "templates/invoice.docx")
+        >>> registry.add_directory("templates/excel")
+    """
+
+    def __init__(self):
+        self._templates: Dict[str, Tuple[str, str, bytes]] = {}
+
+    def register(self, template_id: str, template_path: str) -> None:
+        from ..renderer.factory import detect_format
+
+        path = Path(template_path).resolve()
+        if not path.exists():
+            raise FileNotFoundError(f"模板檔案不存在: {template_path}")
+        self._templates[template_id] = (str(path), detect_format(path), path.read_bytes())
+
+    def add_directory(self, directory: str) -> int:
+        """登錄目錄下所有 .docx / .xlsx（以檔名主幹為 id），回傳登錄數量"""
+        count = 0
+        for ext in ("docx", "xlsx"):
+            for path in sorted(Path(directory).glob(f"*.{ext}")):
+                if path.name.startswith("~$"):
+                    continue
+                self.register(path.stem, str(path))
+                count += 1
+        return count
+
+    def get(self, template_id: str) -> Optional[Tuple[str, str, bytes]]:
+        return self._templates.get(template_id)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {"id": tid, "format": fmt, "path": path, "bytes": len(data)}
+            for tid, (path, fmt, data) in sorted(self._templates.items())
+        ]
+
+    def snapshot(self) -> Dict[str, Tuple[str, str, bytes]]:
+        return dict(self._templates)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+# ----------------------------------------------------------------- workers
+
+
+_WORKER_TEMPLATES: Dict[str, Tuple[str, str, bytes]] = {}
+
+
+def _init_worker(templates: Dict[str, Tuple[str, str, bytes]]) -> None:
+    """worker 行程初始化：保存樣板內容並預先載入渲染模組"""
+    global _WORKER_TEMPLATES
+    _WORKER_TEMPLATES = templates
+    from ..renderer import factory  # noqa: F401
+    from ..parser import MarkdownParser  # noqa: F401
+
+
+def _render_job(template_id: str, kind: str, payload: Any, validate: bool) -> Dict[str, Any]:
+    """
+    在 worker 行程中渲染
+
+    Args:
+        kind: ``"markdown"``（payload 為文字）或 ``"json"``（payload 為已解析的 dict）
+    """
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer
+    from ..utils.timing import Timings, collecting, span
+
+    start = time.perf_counter()
+    timings = Timings()
+    template_path, fmt, source = _WORKER_TEMPLATES[template_id]
+    with collecting(timings):
+        if kind == "markdown":
+            data = MarkdownParser().parse_content(payload)
+        else:
+            data = payload
+
+        validation_errors = 0
+        if validate:
+            from ..validator import SchemaValidator
+
+            with span("validate"):
+                is_valid, errors = SchemaValidator().validate(data)
+            validation_errors = 0 if is_valid else len(errors)
+
+        renderer = build_renderer(template_path=template_path, format_hint=fmt)
+        renderer.load_template(template_path, source=source)
+        renderer.render(data)
+        body = renderer.to_bytes()
+    return {
+        "format": fmt,
+        "body": body,
+        "validation_errors": validation_errors,
+        "render_seconds": time.perf_counter() - start,
+        "timings": timings.records(),
+    }
+
+
+# ----------------------------------------------------------------- service
+
+
+class RenderService:
+    """
+    asyncio HTTP 渲染服務
+
+    Args:
+        registry: 已登錄的樣板
+        host / port: 監聽位址
+        workers: process pool 大小
+        queue_size: 除執行中的工作外，最多可排隊的工作數；超過時回 429
+        max_body: 請求 body 上限（bytes）
+    """
+
+    def __init__(
+        self,
+        registry: TemplateRegistry,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: Optional[int] = None,
+        queue_size: int = 16,
+        max_body: int = DEFAULT_MAX_BODY,
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = self.workers + max(queue_size, 0)
+        self.max_body = max_body
+        self.pending = 0
+        self.metrics = MetricsRegistry()
+        self.metrics.describe("http_requests_total", "HTTP requests by route and status")
+        self.metrics.describe("http_request_duration_seconds", "HTTP request latency")
+        self.metrics.describe("render_duration_seconds", "Render time inside the worker process")
+        self.metrics.describe("queue_wait_seconds", "Time a render job waited for a worker")
+        self.metrics.describe("rejected_total", "Render requests rejected with 429")
+        self.metrics.describe("pending_jobs", "Render jobs queued or running")
+        self.metrics.describe("pool_restarts_total", "Process pool rebuilt after a worker died")
+        describe_render_metrics(self.metrics)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ------------------------------------------------------------ lifecycle
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.registry.snapshot(),),
+        )
+
+    def _restart_pool(self, broken: Optional[ProcessPoolExecutor]) -> None:
+        """重建損壞的 process pool；同一個 pool 的多個失敗請求只重建一次"""
+        if self._pool is not broken or broken is None:
+            return
+        logger.warning("worker 行程異常結束，重建 process pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+        self.metrics.inc("pool_restarts_total")
+
+    async def start(self) -> asyncio.AbstractServer:
+        self._pool = self._new_pool()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=HEADER_LIMIT
+        )
+        # port=0 時回報實際綁定的埠號
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self) -> None:
+        server = await self.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------------------------------------- protocol
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as exc:
+                    await self._respond(writer, exc.status, _json_body({"error": str(exc)}),
+                                        "application/json", keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                start = time.perf_counter()
+                try:
+                    route, status, payload, content_type, extra = await self._dispatch(
+                        method, target, headers, body
+                    )
+                    await self._respond(writer, status, payload, content_type, keep_alive, extra)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as exc:
+                    logger.exception("處理 %s %s 時發生錯誤", method, target)
+                    route, status, keep_alive = "error", 500, False
+                    await self._respond(writer, status, _json_body({"error": f"內部錯誤: {exc}"}),
+                                        "application/json", keep_alive=False)
+                elapsed = time.perf_counter() - start
+                labels = {"route": route, "status": status}
+                self.metrics.inc("http_requests_total", labels)
+                self.metrics.observe("http_request_duration_seconds", elapsed, {"route": route})
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as exc:
+            if not exc.partial:
+                return None
+            raise HttpError(400, "不完整的 HTTP 請求")
+        except asyncio.LimitOverrunError:
+            raise HttpError(413, "HTTP 標頭過大")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "無效的請求列")
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        # 不支援 chunked 等 Transfer-Encoding：內容長度未知，讀不到請求的結尾
+        if "transfer-encoding" in headers:
+            if "content-length" not in headers:
+                raise HttpError(411, "需要 Content-Length（不支援 Transfer-Encoding）")
+            raise HttpError(400, "不可同時指定 Transfer-Encoding 與 Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "無效的 Content-Length")
+        if length < 0:
+            raise HttpError(400, "無效的 Content-Length")
+        if length > self.max_body:
+            raise HttpError(413, f"請求內容超過上限 {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+        return method.upper(), target, headers, body, keep_alive
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes,
+                       content_type: str, keep_alive: bool,
+                       extra_headers: Optional[Dict[str, str]] = None) -> None:
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        for name, value in (extra_headers or {}).items():
+            head.append(f"{name}: {value}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    # --------------------------------------------------------------- routes
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        path = url.path
+
+        if path == "/healthz":
+            return "/healthz", 200, b"ok\n", "text/plain; charset=utf-8", None
+        if path == "/metrics":
+            self.metrics.set_gauge("pending_jobs", self.pending)
+            if query.get("format", [""])[0] == "json":
+                return "/metrics", 200, _json_body(self.metrics.to_dict()), "application/json", None
+            return ("/metrics", 200, self.metrics.to_prometheus().encode("utf-8"),
+                    "text/plain; version=0.0.4; charset=utf-8", None)
+        if path == "/templates":
+            return "/templates", 200, _json_body({"templates": self.registry.describe()}), \
+                "application/json", None
+        if path.startswith("/render/"):
+            if method != "POST":
+                return "/render", 405, _json_body({"error": "請使用 POST"}), "application/json", \
+                    {"Allow": "POST"}
+            try:
+                status, payload, content_type, extra = await self._render(
+                    unquote(path[len("/render/"):]), headers, body, query
+                )
+            except HttpError as exc:
+                status, payload, content_type, extra = (
+                    exc.status, _json_body({"error": str(exc)}), "application/json",
+                    {"Retry-After": "1"} if exc.status == 429 else None,
+                )
+            return "/render", status, payload, content_type, extra
+        return "other", 404, _json_body({"error": f"找不到路徑: {path}"}), "application/json", None
+
+    async def _render(self, template_id: str, headers: Dict[str, str], body: bytes,
+                      query: Dict[str, List[str]]):
+        template = self.registry.get(template_id)
+        if template is None:
+            raise HttpError(404, f"未登錄的樣板: {template_id}")
+
+        if headers.get("content-type", "").split(";")[0].strip().lower() == "application/json":
+            try:
+                payload = json.loads(body.decode("utf-8"))
+            except ValueError as exc:
+                raise HttpError(400, f"無效的 JSON: {exc}")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "JSON 內容必須是物件")
+            kind = "json"
+        else:
+            try:
+                payload = body.decode("utf-8")
+            except UnicodeDecodeError:
+                raise HttpError(400, "Markdown 內容必須為 UTF-8")
+            kind = "markdown"
+        validate = query.get("validate", ["1"])[0].lower() not in ("0", "false", "no")
+
+        # backpressure：排隊 + 執行中的工作達上限時直接拒絕，不無限排隊
+        if self.pending >= self.max_pending:
+            self.metrics.inc("rejected_total")
+            raise HttpError(429, "服務忙碌中，請稍後再試")
+
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            # 先前的工作弄壞了 pool 時，本次請求在重建後的 pool 上重試一次
+            for attempt in range(2):
+                pool = self._pool
+                try:
+                    result = await loop.run_in_executor(
+                        pool, _render_job, template_id, kind, payload, validate
+                    )
+                    break
+                except BrokenProcessPool:
+                    self._restart_pool(pool)
+                    if attempt:
+                        raise
+        except BrokenProcessPool as exc:
+            self.metrics.inc("failures_total", {"exception": type(exc).__name__})
+            raise HttpError(500, "worker 行程異常結束，已重建 process pool")
+        except Exception as exc:
+            self.metrics.inc("failures_total", {"exception": type(exc).__name__})
+            raise HttpError(422, f"渲染失敗: {exc}")
+        finally:
+            self.pending -= 1
+
+        total = time.perf_counter() - submitted
+        labels = {"template": template_id}
+        self.metrics.observe("render_duration_seconds", result["render_seconds"], labels)
+        self.metrics.observe("queue_wait_seconds", max(total - result["render_seconds"], 0.0), labels)
+        self.metrics.inc("files_rendered_total", {"format": result["format"]})
+        self.metrics.inc("input_bytes_total", value=len(body))
+        self.metrics.inc("output_bytes_total", value=len(result["body"]))
+        for stage, seconds in result["timings"]:
+            self.metrics.observe("stage_duration_seconds", seconds, {"stage": stage})
+
+        fmt = result["format"]
+        extra = {
+            "Content-Disposition": _content_disposition(f"{template_id}.{fmt}"),
+            "X-Validation-Errors": str(result["validation_errors"]),
+        }
+        return 200, result["body"], CONTENT_TYPES[fmt], extra
+
+
+def _content_disposition(filename: str) -> str:
+    """
+    ``attachment`` 標頭：ASCII 的 ``filename`` 供舊用戶端使用，
+    非 ASCII 檔名另以 RFC 5987 的 ``filename*`` 提供（標頭本身只能是 latin-1）
+    """
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', "_", filename)
+    if fallback == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _json_body(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
@@ -5,14 +5,22 @@ CLI 主程式
 
 Usage:
     md2word render <input_md> <template> <output> [--format {docx,xlsx,auto}]
-    md2word batch <input_dir> <template> <output_dir> [--format ...]
-    md2word batch-templates <input_md> <template_dir> <output_dir> [--format ...]
+    md2word batch <input_dir> <template> <output_dir> [--format ...] [--shard i/N]
+    md2word batch-templates <input_md> <template_dir> <output_dir> [--format ...] [--shard i/N]
+    md2word run <plan.yaml|plan.csv> [-j N] [--report JSON]
     md2word validate <input_md>
+    md2word serve [--socket PATH] [--preload TEMPLATE ...] [--stop]
+    md2word watch <input_md|dir>... <template> <output|output_dir>
+    md2word cache {stats,prune,clear} [--cache-dir DIR] [--max-size SIZE]
+    md2word http [--host HOST] [--port PORT] [--template ID=PATH ...] [--template-dir DIR]
     md2word info
 """
 
 import argparse
+import os
 import sys
+import time
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional, List, Union
 
@@ -28,10 +36,16 @@ if hasattr(sys.stderr, "reconfigure"):
     except (ValueError, AttributeError):
         pass
 
-from ..parser import MarkdownParser
-from ..renderer import WordRenderer
-from ..renderer.factory import build_renderer, detect_format, output_extension_for
-from ..validator import SchemaValidator
+# 頂層只 import 標準函式庫與輕量的 utils；parser / renderer（docxtpl、python-docx、lxml、
+# openpyxl、jinja2）/ validator（jsonschema）/ 批次管線在用到的指令內才 import，
+# ``info``、``cache``、交給 daemon 的 ``render`` 等不需渲染的路徑啟動較快
+# （test/test_import_time.py 檢查各指令載入的模組）
+from ..renderer.factory import detect_format
+from ..utils.memprofile import MemoryProfile, MemoryReport
+from ..utils.metrics import MetricsFileWriter, MetricsRegistry, describe_render_metrics, record_cache
+from ..utils.profiling import PROFILE_DIR_NAME, assign_profile_paths, profile_slow
+from ..utils.sharding import SHARD_STRATEGIES, ShardPlan, parse_shard
+from ..utils.timing import Timings, collecting, span
 
 
 __all__ = ["create_parser", "cli", "main", "process_one", "resolve_format"]
@@ -41,6 +55,19 @@ def __getattr__(name):
     if name == "ExcelRenderer":
         from ..renderer.excel_renderer import ExcelRenderer  # noqa: WPS433
         return ExcelRenderer
+    # 相容：先前於模組頂層 import 的名稱
+    if name == "MarkdownParser":
+        from ..parser import MarkdownParser  # noqa: WPS433
+        return MarkdownParser
+    if name == "WordRenderer":
+        from ..renderer.word_renderer import WordRenderer  # noqa: WPS433
+        return WordRenderer
+    if name == "SchemaValidator":
+        from ..validator import SchemaValidator  # noqa: WPS433
+        return SchemaValidator
+    if name == "build_renderer":
+        from ..renderer.factory import build_renderer  # noqa: WPS433
+        return build_renderer
     raise AttributeError(name)
 
 
@@ -64,15 +91,23 @@ def process_one(
     format_hint: str = "auto",
     validate: bool = True,
     verbose: bool = False,
+    template_cache=None,
+    output_cache=None,
 ) -> dict:
     """
     處理單一檔案的核心流程；Word / Excel 共用。
 
+    ``template_cache``（``TemplateCache``）由常駐行程傳入，樣板內容改從記憶體讀取。
+    ``output_cache``（``OutputCache``）命中時直接寫出快取的文件，不再渲染。
+
     Returns:
-        dict: ``{"format": "docx"|"xlsx", "renderer": <instance>, "fields": int, "output": str}``
+        dict: ``{"format": "docx"|"xlsx", "renderer": <instance>|None, "fields": int,
+        "output": str, "cached": bool}``
     """
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer
+
     fmt = resolve_format(template_path, format_hint)
-    renderer = build_renderer(template_path=template_path, format_hint=fmt)
 
     if verbose:
         print(f"📄 解析 Markdown: {input_path}")
@@ -86,25 +121,70 @@ def process_one(
         print(f"📝 載入樣板: {template_path} (format={fmt})")
 
     if validate:
-        v = SchemaValidator()
-        is_valid, errors = v.validate(data)
+        from ..validator.schema_validator import CLI_MAX_ERRORS, render_validator
+
+        with span("validate"):
+            v = render_validator()
+            is_valid, errors = v.validate(data)
         if not is_valid and verbose:
-            print(f"⚠ 警告：資料驗證有 {len(errors)} 個問題")
+            more = "以上" if len(errors) >= CLI_MAX_ERRORS else ""
+            print(f"⚠ 警告：資料驗證有 {len(errors)} 個{more}問題")
             for error in errors[:5]:
                 print(f"   - {error}")
 
-    renderer.load_template(str(template_path))
+    cache_key = None
+    if output_cache is not None:
+        with span("cache"):
+            cache_key = output_cache.key_for(data, str(template_path), {"format": fmt})
+            hit = output_cache.fetch(cache_key, str(output_path), fmt)
+        if hit:
+            if verbose:
+                print(f"   ✓ 輸出快取命中（{cache_key[:12]}）")
+            return {
+                "format": fmt,
+                "renderer": None,
+                "fields": field_count,
+                "output": output_path,
+                "cached": True,
+            }
+
+    renderer = build_renderer(template_path=template_path, format_hint=fmt)
+    if template_cache is not None:
+        renderer.load_template(str(template_path), source=template_cache.get_bytes(str(template_path)))
+    else:
+        renderer.load_template(str(template_path))
     renderer.render(data)
     renderer.save(str(output_path))
 
+    if cache_key is not None:
+        with span("cache"):
+            output_cache.store(cache_key, str(output_path), fmt)
+
     return {
         "format": fmt,
         "renderer": renderer,
         "fields": field_count,
         "output": output_path,
+        "cached": False,
     }
 
 
+def _output_cache_from_args(args: argparse.Namespace):
+    """依 ``--cache`` / ``--cache-dir`` / ``$MD2WORD_CACHE_DIR`` 建立 ``OutputCache``；未啟用時回傳 None"""
+    from ..utils.output_cache import CACHE_ENV_VAR, OutputCache, parse_size
+
+    if getattr(args, "no_cache", False):
+        return None
+    cache_dir = getattr(args, "cache_dir", None)
+    if not (cache_dir or getattr(args, "cache", False) or os.environ.get(CACHE_ENV_VAR)):
+        return None
+    return OutputCache(
+        cache_dir=cache_dir,
+        max_bytes=parse_size(args.cache_max_size),
+        link=getattr(args, "cache_link", False),
+    )
+
+
 # ----------------------------------------------------------------- argparse
 
 
@@ -161,6 +241,69 @@ def _add_render_parser(parser: argparse.ArgumentParser, is_batch: bool = False,
             help="遇到錯誤時繼續處理其他檔案",
         )
 
+    if not (is_batch or is_batch_templates):
+        parser.add_argument(
+            "--socket", default=None,
+            help="daemon 的 Unix socket 路徑（預設 $MD2WORD_SOCKET 或暫存目錄下的 md2word-<uid>.sock）",
+        )
+        parser.add_argument(
+            "--no-daemon", dest="no_daemon", action="store_true",
+            help="不使用常駐 daemon，一律在本行程內渲染",
+        )
+
+    _add_cache_flags(parser)
+
+    if is_batch:
+        parser.add_argument(
+            "-j", "--workers", type=int, default=None,
+            help="解析 / 渲染的 worker 行程數（預設為 CPU 核心數；0 表示在本行程內執行）",
+        )
+        parser.add_argument(
+            "--io-threads", type=int, default=2,
+            help="讀檔與寫檔各自的 thread 數 (預設: 2)",
+        )
+        parser.add_argument(
+            "--max-tasks-per-worker", type=int, default=None, metavar="N",
+            help="每個 worker 行程處理 N 個檔案後換新，避免長時間批次記憶體累積",
+        )
+        parser.add_argument(
+            "--max-worker-rss", default=None, metavar="SIZE",
+            help="worker 行程 RSS 超過此值（例如 512M）時換新",
+        )
+        parser.add_argument(
+            "--incremental", action="store_true",
+            help="增量建置：輸入、樣板、圖片與設定都未變的輸出直接略過（紀錄於輸出目錄的 .md2word-manifest.json）",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="忽略增量紀錄，全部重新渲染（並更新紀錄）",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="續跑：略過日誌（輸出目錄的 .md2word-journal.jsonl）中已完成的檔案，重試失敗或中斷者",
+        )
+        parser.add_argument(
+            "--retries", type=int, default=2,
+            help="續跑時失敗 / 中斷的檔案最多再重試幾次 (預設: 2)",
+        )
+        parser.add_argument(
+            "--schedule", choices=["cost", "input"], default="cost",
+            help="派工順序：cost 依預估成本（大小、行數、圖片數）由大到小（預設）；input 依檔名順序",
+        )
+        parser.add_argument(
+            "--cost-log", default=None, metavar="CSV",
+            help="將每個檔案的預估與實際處理時間寫成 CSV，用來校正成本模型",
+        )
+        _add_metrics_flags(parser)
+
+    if is_batch or is_batch_templates:
+        _add_shard_flags(parser)
+
+    _add_timing_flags(parser)
+    if not is_batch_templates:
+        _add_profile_flags(parser)
+        _add_memprofile_flags(parser)
+
     if is_batch_templates:
         parser.add_argument("--prefix", default="", help="輸出檔案名稱前綴")
         parser.add_argument("--suffix", default="", help="輸出檔案名稱後綴")
@@ -168,6 +311,153 @@ def _add_render_parser(parser: argparse.ArgumentParser, is_batch: bool = False,
     _add_format_flag(parser)
 
 
+def _add_cache_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="使用內容定址的輸出快取（設定 $MD2WORD_CACHE_DIR 時自動啟用）",
+    )
+    parser.add_argument(
+        "--cache-dir", default=None,
+        help="輸出快取目錄（預設 $MD2WORD_CACHE_DIR 或 ~/.cache/md2word/outputs）",
+    )
+    parser.add_argument(
+        "--cache-max-size", default="1G",
+        help="輸出快取大小上限，超過時淘汰最久未使用者 (預設: 1G)",
+    )
+    parser.add_argument(
+        "--cache-link", action="store_true",
+        help="快取命中時以 hardlink 寫出（預設為複製）",
+    )
+    parser.add_argument(
+        "--no-cache", dest="no_cache", action="store_true",
+        help="停用輸出快取",
+    )
+
+
+def _add_timing_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--timings", action="store_true",
+        help="顯示各步驟（讀檔、解析、載入樣板、圖片、渲染、存檔…）的耗時統計與最慢的檔案",
+    )
+    parser.add_argument(
+        "--timings-json", default=None, metavar="PATH",
+        help="將各步驟耗時寫成 JSON（含每個檔案的明細）",
+    )
+
+
+def _add_profile_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile-slow", type=float, default=None, metavar="SECONDS",
+        help="以 cProfile 執行，解析 + 渲染超過 SECONDS 秒的檔案保留 <檔名>.pstats（以 md2word profile-report 彙整）",
+    )
+    parser.add_argument(
+        "--profile-dir", default=None,
+        help=f"--profile-slow 紀錄的存放目錄（預設為輸出目錄下的 {PROFILE_DIR_NAME}）",
+    )
+
+
+def _add_memprofile_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--memprofile", action="store_true",
+        help="以 tracemalloc 剖析各步驟（解析、載入樣板、圖片、渲染、存檔）的記憶體配置與峰值 RSS（執行會變慢）",
+    )
+    parser.add_argument(
+        "--memprofile-json", default=None, metavar="PATH",
+        help="將記憶體剖析結果（含每個檔案的明細）寫成 JSON",
+    )
+
+
+def _add_metrics_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics-file", default=None, metavar="PATH",
+        help="定期將指標寫成檔案（原子取代）：.json 為 JSON，其餘為 Prometheus textfile（例如 md2word.prom）",
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=15.0, metavar="SECONDS",
+        help="--metrics-file 的寫出間隔，0 表示只在結束時寫出 (預設: 15)",
+    )
+
+
+def _metrics_writer_from_args(args: argparse.Namespace, registry: MetricsRegistry,
+                              before_write=None) -> Optional[MetricsFileWriter]:
+    if not args.metrics_file:
+        return None
+    Path(args.metrics_file).parent.mkdir(parents=True, exist_ok=True)
+    return MetricsFileWriter(registry, args.metrics_file, interval=args.metrics_interval,
+                             before_write=before_write)
+
+
+def _memprofile_from_args(args: argparse.Namespace) -> Optional[MemoryReport]:
+    if args.memprofile or args.memprofile_json:
+        return MemoryReport()
+    return None
+
+
+def _report_memprofile(args: argparse.Namespace, report: Optional[MemoryReport]) -> None:
+    if report is None:
+        return
+    if args.memprofile:
+        print("\n🧠 記憶體剖析（tracemalloc）：")
+        print(report.format())
+    if args.memprofile_json:
+        report.write_json(args.memprofile_json)
+        print(f"   已寫入記憶體剖析結果至 {args.memprofile_json}")
+
+
+def _timings_from_args(args: argparse.Namespace) -> Optional[Timings]:
+    if args.timings or args.timings_json:
+        return Timings()
+    return None
+
+
+def _report_timings(args: argparse.Namespace, timings: Optional[Timings]) -> None:
+    if timings is None:
+        return
+    if args.timings:
+        print("\n⏱ 各步驟耗時：")
+        print(timings.format())
+    if args.timings_json:
+        timings.write_json(args.timings_json)
+        print(f"   已寫入各步驟耗時至 {args.timings_json}")
+
+
+def _add_shard_flags(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--shard", default=None, metavar="i/N",
+        help="只處理第 i 份（共 N 份）；同一個檔案依相對路徑固定落在同一份",
+    )
+    parser.add_argument(
+        "--shard-by", choices=list(SHARD_STRATEGIES), default="hash",
+        help="分片方式：hash 依相對路徑（預設，結果最穩定）；size 依檔案大小平衡各份總量",
+    )
+    parser.add_argument(
+        "--list-shard", action="store_true",
+        help="只列出各分片分配到的檔案，不渲染",
+    )
+
+
+def _apply_shard(args: argparse.Namespace, paths: List[Path], root: Path) -> Optional[List[Path]]:
+    """
+    依 ``--shard`` 篩選檔案
+
+    回傳本分片的檔案；``--list-shard`` 時只印出分配結果並回傳 ``None``。
+    參數錯誤時拋出 ``ValueError``。
+    """
+    if args.shard is None:
+        if args.list_shard:
+            raise ValueError("--list-shard 需搭配 --shard i/N")
+        return sorted(paths)
+    index, count = parse_shard(args.shard)
+
+    plan = ShardPlan(paths, root, count, strategy=args.shard_by)
+    if args.list_shard:
+        print(plan.format(current=index))
+        return None
+    selected = plan.select(index)
+    print(f"🧩 分片 {index + 1}/{count}（{args.shard_by}）：{len(selected)} / {len(paths)} 個檔案")
+    return selected
+
+
 def create_parser() -> argparse.ArgumentParser:
     """建立命令列參數解析器"""
     parser = argparse.ArgumentParser(
@@ -188,12 +478,22 @@ def create_parser() -> argparse.ArgumentParser:
   # 批次轉換
   md2word batch ./inputs/ template.docx ./outputs/
 
+  # 分給 4 台機器：每台處理自己的一份（同一個檔案固定落在同一份）
+  md2word batch ./inputs/ template.docx ./outputs/ --shard 2/4
+
   # 多模板批次轉換
   md2word batch-templates data.md ./templates/ ./outputs/
 
   # 驗證 Markdown 格式
   md2word validate input.md
 
+  # 啟動常駐 daemon，之後的 render 會自動交給它處理
+  md2word serve &
+
+  # 啟動 HTTP 渲染服務
+  md2word http --port 8080 --template-dir ./templates/
+  curl --data-binary @input.md -o out.docx http://127.0.0.1:8080/render/simple_template
+
   # 顯示版本資訊
   md2word info
         """,
@@ -216,11 +516,156 @@ def create_parser() -> argparse.ArgumentParser:
     )
     _add_render_parser(btpl_p, is_batch_templates=True)
 
+    run_p = subparsers.add_parser(
+        "run", help="依清單（YAML / CSV）執行多輸入 × 多樣板的渲染"
+    )
+    run_p.add_argument("plan", help="清單檔（.yaml / .yml / .csv），每項為輸入、樣板、輸出與選項")
+    run_p.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="worker 行程數（預設為 CPU 核心數；0 表示在本行程內執行）",
+    )
+    run_p.add_argument(
+        "--continue-on-error", action="store_true",
+        help="遇到錯誤時繼續處理其他工作",
+    )
+    run_p.add_argument("--report", default=None, metavar="JSON", help="將每項工作的結果寫成 JSON")
+    run_p.add_argument("-v", "--verbose", action="store_true", help="顯示詳細資訊")
+    _add_timing_flags(run_p)
+
     validate_parser = subparsers.add_parser(
         "validate", help="驗證 Markdown 檔案格式"
     )
     validate_parser.add_argument("input", help="要驗證的 Markdown 檔案路徑")
     validate_parser.add_argument("-s", "--schema", help="自訂 JSON Schema 檔案路徑")
+    validate_parser.add_argument(
+        "--max-errors", type=int, default=None, metavar="N",
+        help="收集到 N 個錯誤即停止（預設 100；0 表示全部列出）",
+    )
+    validate_parser.add_argument(
+        "--compiled", action="store_true",
+        help="使用由 schema 產生的 Python 驗證函式（依 schema hash 快取於磁碟），錯誤訊息不變",
+    )
+
+    serve_p = subparsers.add_parser(
+        "serve", help="啟動常駐渲染 daemon（Unix socket）"
+    )
+    serve_p.add_argument(
+        "--socket", default=None,
+        help="Unix socket 路徑（預設 $MD2WORD_SOCKET 或暫存目錄下的 md2word-<uid>.sock）",
+    )
+    serve_p.add_argument(
+        "--preload", action="append", default=[], metavar="TEMPLATE",
+        help="啟動時預先載入的樣板（可重複指定）",
+    )
+    serve_p.add_argument(
+        "--stop", action="store_true", help="通知執行中的 daemon 結束",
+    )
+    _add_metrics_flags(serve_p)
+
+    http_p = subparsers.add_parser(
+        "http", help="啟動 HTTP 渲染服務"
+    )
+    http_p.add_argument("--host", default="127.0.0.1", help="監聽位址 (預設: 127.0.0.1)")
+    http_p.add_argument("--port", type=int, default=8080, help="監聽埠號 (預設: 8080)")
+    http_p.add_argument(
+        "--template", action="append", default=[], metavar="ID=PATH",
+        help="登錄樣板（可重複指定）",
+    )
+    http_p.add_argument(
+        "--template-dir", action="append", default=[], metavar="DIR",
+        help="登錄目錄下所有 .docx / .xlsx，以檔名為 id（可重複指定）",
+    )
+    http_p.add_argument(
+        "--workers", type=int, default=None,
+        help="渲染 worker 行程數 (預設: CPU 核心數)",
+    )
+    http_p.add_argument(
+        "--queue-size", type=int, default=16,
+        help="除執行中的工作外最多排隊數，超過回 429 (預設: 16)",
+    )
+    http_p.add_argument(
+        "--max-body", type=int, default=16 * 1024 * 1024,
+        help="請求內容上限 bytes (預設: 16 MiB)",
+    )
+    _add_metrics_flags(http_p)
+
+    watch_p = subparsers.add_parser(
+        "watch", help="監看 Markdown / 樣板 / 圖片，變動時自動重新渲染"
+    )
+    watch_p.add_argument("inputs", nargs="+", help="輸入的 Markdown 檔案或目錄（可多個）")
+    watch_p.add_argument("template", help="樣板檔案路徑 (.docx 或 .xlsx)")
+    watch_p.add_argument(
+        "output", help="輸出檔案路徑（單一輸入時）或輸出目錄",
+    )
+    watch_p.add_argument("-p", "--pattern", default="*.md", help="目錄輸入的檔案搜尋模式 (預設: *.md)")
+    watch_p.add_argument(
+        "--no-validate", dest="no_validate", action="store_true", help="跳過資料驗證",
+    )
+    watch_p.add_argument(
+        "--polling", action="store_true", help="強制使用輪詢（預設優先使用 inotify）",
+    )
+    watch_p.add_argument(
+        "--interval", type=float, default=0.25, help="輪詢間隔秒數 (預設: 0.25)",
+    )
+    watch_p.add_argument(
+        "--debounce", type=float, default=0.15,
+        help="變動後等待多久沒有新變動才重新渲染（秒，預設: 0.15）",
+    )
+    _add_format_flag(watch_p)
+
+    cache_p = subparsers.add_parser(
+        "cache", help="管理輸出快取（stats / prune / clear）"
+    )
+    cache_p.add_argument("action", choices=["stats", "prune", "clear"], help="動作")
+    cache_p.add_argument(
+        "--cache-dir", default=None,
+        help="輸出快取目錄（預設 $MD2WORD_CACHE_DIR 或 ~/.cache/md2word/outputs）",
+    )
+    cache_p.add_argument(
+        "--max-size", default="1G",
+        help="prune 時保留的大小上限 (預設: 1G)",
+    )
+
+    prof_p = subparsers.add_parser(
+        "profile-report", help="彙整 --profile-slow 保存的 .pstats，列出最耗時的函式"
+    )
+    prof_p.add_argument("paths", nargs="+", help=".pstats 檔案或所在目錄")
+    prof_p.add_argument("--top", type=int, default=25, help="列出前幾名函式 (預設: 25)")
+    prof_p.add_argument(
+        "--sort", choices=["tottime", "cumtime", "calls"], default="tottime",
+        help="排序依據：tottime 自身時間（預設）、cumtime 含子呼叫、calls 呼叫次數",
+    )
+    prof_p.add_argument("--json", default=None, metavar="PATH", help="將彙整結果寫成 JSON")
+
+    bench_p = subparsers.add_parser(
+        "bench", help="以合成資料量測解析、Word / Excel 渲染與批次吞吐量，並可與基準比較"
+    )
+    bench_p.add_argument(
+        "-o", "--output", default=None, metavar="JSON",
+        help="將量測結果寫成 JSON（可作為之後的 --baseline）",
+    )
+    bench_p.add_argument(
+        "--baseline", default=None, metavar="JSON",
+        help="與先前的量測結果比較；有案例變慢超過容許範圍時結束碼為 1",
+    )
+    bench_p.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="容許的變慢比例 (預設: 0.10，即 10%%)",
+    )
+    bench_p.add_argument(
+        "--only", action="append", default=[], metavar="PATTERN",
+        help="只執行名稱符合的案例，例如 parse/*、*/list（可重複指定）",
+    )
+    bench_p.add_argument(
+        "--scale", type=float, default=1.0,
+        help="資料量倍率，例如 0.1 可快速檢查 (預設: 1.0)",
+    )
+    bench_p.add_argument("--repeat", type=int, default=3, help="每個案例重複次數 (預設: 3)")
+    bench_p.add_argument(
+        "--workdir", default=None,
+        help="放置合成輸入與輸出的目錄（預設為暫存目錄，結束後刪除）",
+    )
+    bench_p.add_argument("--list", dest="list_cases", action="store_true", help="只列出案例")
 
     subparsers.add_parser("info", help="顯示工具版本和相關資訊")
 
@@ -245,19 +690,63 @@ def cmd_render(args: argparse.Namespace) -> int:
     try:
         fmt = resolve_format(str(template_path), args.format)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        process_one(
-            input_path=str(input_path),
-            template_path=str(template_path),
-            output_path=str(output_path),
-            format_hint=args.format,
-            validate=not getattr(args, "no_validate", False),
-            verbose=args.verbose,
-        )
-
-        if args.verbose:
+        output_cache = _output_cache_from_args(args)
+        timings = _timings_from_args(args)
+
+        memreport = _memprofile_from_args(args)
+
+        # 量測耗時 / profile / 記憶體剖析需在本行程內執行
+        profiling = args.profile_slow is not None or memreport is not None
+        if not getattr(args, "no_daemon", False) and timings is None and not profiling:
+            from .daemon import DaemonUnresponsive, render_via_daemon
+
+            try:
+                result = render_via_daemon(
+                    input_path=str(input_path),
+                    template_path=str(template_path),
+                    output_path=str(output_path),
+                    format_hint=args.format,
+                    validate=not getattr(args, "no_validate", False),
+                    socket_path=getattr(args, "socket", None),
+                    output_cache=output_cache,
+                )
+            except DaemonUnresponsive as e:
+                print(f"⚠ 警告：{e}（$MD2WORD_DAEMON_TIMEOUT 可調整），改在本行程內渲染")
+                result = None
+            if result is not None:
+                if args.verbose:
+                    source = "輸出快取" if result.get("cached") else f"{fmt} 渲染器"
+                    print(f"   ✓ 已由 daemon 使用 {source}（{result.get('fields', 0)} 個欄位）")
+                print(f"✅ 成功輸出至: {output_path}")
+                return 0
+
+        profile_path = None
+        if args.profile_slow is not None:
+            profile_dir = args.profile_dir or str(output_path.parent / PROFILE_DIR_NAME)
+            profile_path = assign_profile_paths([str(input_path)], profile_dir)[str(input_path)]
+        mem = MemoryProfile() if memreport is not None else None
+        with profile_slow(args.profile_slow, profile_path) as prof, \
+                collecting(timings, file=str(input_path)), \
+                (mem if mem is not None else nullcontext()):
+            result = process_one(
+                input_path=str(input_path),
+                template_path=str(template_path),
+                output_path=str(output_path),
+                format_hint=args.format,
+                validate=not getattr(args, "no_validate", False),
+                verbose=args.verbose,
+                output_cache=output_cache,
+            )
+
+        if args.verbose and not result["cached"]:
             print(f"   ✓ 已使用 {fmt} 渲染器")
         print(f"✅ 成功輸出至: {output_path}")
+        if prof.kept:
+            print(f"🐢 耗時 {prof.elapsed:.2f}s（超過 {args.profile_slow:g}s），已保存 cProfile 紀錄至 {prof.kept}")
+        _report_timings(args, timings)
+        if mem is not None:
+            memreport.add(str(input_path), mem.report())
+            _report_memprofile(args, memreport)
         return 0
     except Exception as e:
         print(f"❌ 錯誤：{e}")
@@ -268,6 +757,11 @@ def cmd_render(args: argparse.Namespace) -> int:
 
 
 def cmd_batch(args: argparse.Namespace) -> int:
+    from ..utils.cost_model import CostModel
+    from ..utils.journal import BatchJournal
+    from ..utils.manifest import BuildManifest
+    from ..utils.pipeline import BatchPipeline
+
     input_dir = Path(args.input_dir)
     template_path = Path(args.template)
     output_dir = Path(args.output_dir)
@@ -284,51 +778,181 @@ def cmd_batch(args: argparse.Namespace) -> int:
         print(f"⚠ 警告：在 {input_dir} 中找不到符合 {args.pattern} 的檔案")
         return 1
 
+    try:
+        md_files = _apply_shard(args, md_files, input_dir)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    if md_files is None:
+        return 0
+
     try:
         fmt = resolve_format(str(template_path), args.format)
     except ValueError as e:
         print(f"❌ 錯誤：{e}")
         return 1
 
+    max_worker_rss = None
+    if args.max_worker_rss:
+        from ..utils.output_cache import parse_size
+
+        try:
+            max_worker_rss = parse_size(args.max_worker_rss)
+        except ValueError as e:
+            print(f"❌ 錯誤：{e}")
+            return 1
+    try:
+        output_cache = _output_cache_from_args(args)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+
     output_ext = f".{fmt}"
     print(f"📂 找到 {len(md_files)} 個檔案待處理 (格式: {fmt})")
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    parser = MarkdownParser()
-    success_count = 0
-    fail_count = 0
-
-    for md_file in md_files:
-        output_file = output_dir / f"{md_file.stem}{output_ext}"
-        try:
-            if args.verbose:
-                print(f"\n處理: {md_file.name}")
-
-            data = parser.parse(str(md_file))
-            renderer = build_renderer(template_path=str(template_path), format_hint=fmt)
-            renderer.load_template(str(template_path))
-            renderer.render(data)
-            renderer.save(str(output_file))
-
+    jobs = [
+        (str(md_file), str(template_path), str(output_dir / f"{md_file.stem}{output_ext}"))
+        for md_file in md_files
+    ]
+
+    # 增量建置：輸入 / 樣板 / 圖片 / 設定都未變的輸出直接略過
+    manifest = None
+    settings = {"format": fmt}
+    skipped = 0
+    if args.incremental or args.force:
+        manifest = BuildManifest.load(str(output_dir))
+        if not args.force:
+            stale = [job for job in jobs if not manifest.is_up_to_date(*job, settings=settings)]
+            skipped = len(jobs) - len(stale)
+            jobs = stale
+            if skipped:
+                print(f"⏭ {skipped} 個輸出已是最新，略過")
+
+    # 日誌：記錄每個檔案的狀態，--resume 時略過已完成者、重試失敗或中斷者
+    journal = BatchJournal.for_output_dir(str(output_dir), resume=args.resume, retries=args.retries)
+    resumed: list = []
+    exhausted: list = []
+    if args.resume:
+        jobs, resumed, exhausted = journal.partition(jobs)
+        print(f"↩ 續跑：{len(resumed)} 個已完成，{len(jobs)} 個待處理")
+        for job in exhausted:
+            print(f"   ✗ 已用完重試次數（{args.retries}）：{Path(job[0]).name} - "
+                  f"{journal.last_error(job[-1]) or '執行中斷'}")
+
+    cost_samples = []
+    # 樣板指紋在任何工作讀取樣板之前取得，渲染期間被修改時下次會重建
+    template_file = manifest.fingerprint(str(template_path)) if manifest is not None else None
+
+    def on_start(job):
+        journal.start(job.input_path, job.output_path)
+
+    def on_result(job):
+        name = Path(job.input_path).name
+        if job.error is not None:
+            journal.failed(job.input_path, job.output_path, job.error)
+            print(f"   ✗ 失敗: {name} - {job.error}")
+        else:
+            journal.done(job.input_path, job.output_path)
+            cost_samples.append((job.input_path, job.cost, job.actual_s))
             if args.verbose:
-                print(f"   ✓ 輸出至 {output_file.name}")
-
-            success_count += 1
-        except Exception as e:
-            print(f"   ✗ 失敗: {md_file.name} - {e}")
-            fail_count += 1
-            if not args.continue_on_error:
-                print("終止批次處理（使用 --continue-on-error 可繼續處理其他檔案）")
-                break
-
-    print(f"\n📊 批次處理完成")
-    print(f"   ✓ 成功: {success_count} 個")
-    print(f"   ✗ 失敗: {fail_count} 個")
-    return 0 if fail_count == 0 else 1
+                timing = ""
+                if job.cost is not None and job.actual_s is not None:
+                    timing = f"（預估 {job.cost.predicted * 1000:.0f} ms / 實際 {job.actual_s * 1000:.0f} ms）"
+                print(f"   ✓ {name} → {Path(job.output_path).name}{timing}")
+        if manifest is not None:
+            if job.error is None:
+                manifest.record(job.input_path, job.template_path, job.output_path,
+                                job.images, settings, input_file=job.input_file,
+                                template_file=template_file, since_ns=job.started_ns)
+            else:
+                manifest.forget(job.output_path)
+
+    workers = args.workers
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(jobs))
+    if workers == 0 and (args.max_tasks_per_worker or max_worker_rss):
+        print("⚠ 警告：-j 0 在本行程內渲染，--max-tasks-per-worker / --max-worker-rss 不會生效")
+    timings = _timings_from_args(args)
+    memreport = _memprofile_from_args(args)
+    metrics = describe_render_metrics(MetricsRegistry()) if args.metrics_file else None
+    if metrics is not None:
+        metrics.describe("last_run_timestamp_seconds", "Unix time the batch run finished")
+    if metrics is not None and manifest is not None and not args.force:
+        record_cache(metrics, "incremental", hits=skipped, misses=len(jobs))
+    metrics_writer = _metrics_writer_from_args(args, metrics) if metrics is not None else None
+    pipeline = BatchPipeline(
+        workers=workers,
+        io_threads=args.io_threads,
+        continue_on_error=args.continue_on_error,
+        on_result=on_result,
+        on_start=on_start,
+        schedule=args.schedule,
+        max_tasks_per_worker=args.max_tasks_per_worker,
+        max_worker_rss=max_worker_rss,
+        timings=timings,
+        profile_slow=args.profile_slow,
+        profile_dir=args.profile_dir or str(output_dir / PROFILE_DIR_NAME),
+        memprofile=memreport,
+        metrics=metrics,
+        output_cache=output_cache,
+    )
+    if metrics_writer is not None:
+        metrics_writer.start()
+    try:
+        results = pipeline.run(jobs, fmt=fmt)
+    finally:
+        journal.close()
+        if metrics_writer is not None:
+            metrics.set_gauge("last_run_timestamp_seconds", time.time())
+            metrics_writer.stop()
+    if manifest is not None:
+        manifest.save()
+
+    if results["failed_count"] and not args.continue_on_error:
+        print("終止批次處理（使用 --continue-on-error 可繼續處理其他檔案）")
+
+    print(f"\n📊 批次處理完成（{results['wall_s']:.2f}s）")
+    print(f"   ✓ 成功: {results['success_count']} 個")
+    print(f"   ✗ 失敗: {results['failed_count']} 個")
+    if manifest is not None:
+        print(f"   ⏭ 略過: {skipped} 個")
+    if results["output_cache"] is not None:
+        print(f"   ⚡ 輸出快取命中: {results['output_cache']['hits']} 個")
+    if args.resume:
+        print(f"   ↩ 先前已完成: {len(resumed)} 個")
+        if exhausted:
+            print(f"   ✗ 已用完重試次數: {len(exhausted)} 個")
+    if jobs:
+        print("\n⏱ 各階段吞吐量：")
+        print(BatchPipeline.format_stats(results["stages"], results["wall_s"]))
+        print("\n🧠 記憶體：")
+        print(BatchPipeline.format_memory(results["memory"]))
+    cost = results["cost"]
+    if cost is not None:
+        print(f"\n🔮 成本預估：預估 {cost['predicted_s']:.2f}s / 實際 {cost['actual_s']:.2f}s"
+              f"（實際 ÷ 預估 = {cost['scale']:.2f}，偏差最大：{Path(cost['worst']['input']).name}）")
+    if args.cost_log:
+        count = CostModel.write_log(args.cost_log, cost_samples)
+        print(f"   已寫入 {count} 筆預估 / 實際時間至 {args.cost_log}")
+    if jobs:
+        _report_timings(args, timings)
+        _report_memprofile(args, memreport)
+    if results["profiles"]:
+        slow = sorted(results["profiles"], key=lambda p: -(p["actual_s"] or 0))
+        profile_dir = Path(slow[0]["path"]).parent
+        print(f"\n🐢 {len(slow)} 個檔案超過 {args.profile_slow:g}s，已保存 cProfile 紀錄至 {profile_dir}")
+        for item in slow[:5]:
+            print(f"   {item['actual_s']:>7.2f}s  {Path(item['input']).name} → {Path(item['path']).name}")
+        print(f"   彙整：md2word profile-report {profile_dir}")
+    return 0 if results["failed_count"] == 0 and not exhausted else 1
 
 
 def cmd_batch_templates(args: argparse.Namespace) -> int:
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer
+
     input_path = Path(args.input)
     template_dir = Path(args.template_dir)
     output_dir = Path(args.output_dir)
@@ -362,22 +986,39 @@ def cmd_batch_templates(args: argparse.Namespace) -> int:
         print(f"⚠ 警告：在 {template_dir} 中找不到任何 .docx / .xlsx 樣板")
         return 1
 
+    try:
+        candidate_files = _apply_shard(args, candidate_files, template_dir)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    if candidate_files is None:
+        return 0
+
     print(f"📂 找到 {len(candidate_files)} 個樣板待處理")
 
     output_dir.mkdir(parents=True, exist_ok=True)
+    timings = _timings_from_args(args)
 
     try:
         print(f"📄 解析 Markdown: {input_path}")
         parser = MarkdownParser()
-        data = parser.parse(str(input_path))
+        with collecting(timings, file=str(input_path)):
+            data = parser.parse(str(input_path))
         field_count = len([k for k in data.keys() if not k.startswith("#")])
         print(f"   ✓ 解析完成，共 {field_count} 個欄位")
     except Exception as e:
         print(f"❌ 解析 Markdown 失敗：{e}")
         return 1
 
+    try:
+        output_cache = _output_cache_from_args(args)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+
     success_count = 0
     fail_count = 0
+    cache_hits = 0
 
     for template_file in candidate_files:
         try:
@@ -393,10 +1034,27 @@ def cmd_batch_templates(args: argparse.Namespace) -> int:
             if args.verbose:
                 print(f"\n處理樣板: {template_file.name} (format={fmt})")
 
-            renderer = build_renderer(template_path=str(template_file), format_hint=fmt)
-            renderer.load_template(str(template_file))
-            renderer.render(data)
-            renderer.save(str(output_file))
+            # 各樣板的耗時歸屬於該樣板
+            with collecting(timings, file=str(template_file)):
+                cache_key = None
+                if output_cache is not None:
+                    with span("cache"):
+                        cache_key = output_cache.key_for(data, str(template_file), {"format": fmt})
+                        hit = output_cache.fetch(cache_key, str(output_file), fmt)
+                    if hit:
+                        if args.verbose:
+                            print(f"   ✓ 輸出快取命中，輸出至 {output_file.name}")
+                        cache_hits += 1
+                        success_count += 1
+                        continue
+
+                renderer = build_renderer(template_path=str(template_file), format_hint=fmt)
+                renderer.load_template(str(template_file))
+                renderer.render(data)
+                renderer.save(str(output_file))
+                if cache_key is not None:
+                    with span("cache"):
+                        output_cache.store(cache_key, str(output_file), fmt)
 
             if args.verbose:
                 print(f"   ✓ 輸出至 {output_file.name}")
@@ -412,10 +1070,85 @@ def cmd_batch_templates(args: argparse.Namespace) -> int:
     print(f"\n📊 多模板批次處理完成")
     print(f"   ✓ 成功: {success_count} 個")
     print(f"   ✗ 失敗: {fail_count} 個")
+    if output_cache is not None:
+        print(f"   ⚡ 輸出快取命中: {cache_hits} 個")
+    _report_timings(args, timings)
     return 0 if fail_count == 0 else 1
 
 
+def cmd_run(args: argparse.Namespace) -> int:
+    import json
+
+    from ..utils.render_plan import PlanRunner, load_render_plan
+
+    plan_path = Path(args.plan)
+    if not plan_path.exists():
+        print(f"❌ 錯誤：找不到清單檔案 {plan_path}")
+        return 1
+    try:
+        tasks = load_render_plan(str(plan_path))
+    except (OSError, ValueError) as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    if not tasks:
+        print(f"⚠ 警告：{plan_path} 沒有任何工作")
+        return 1
+
+    missing = sorted({p for t in tasks for p in (t.input_path, t.template_path) if not Path(p).exists()})
+    if missing:
+        print("❌ 錯誤：找不到以下檔案")
+        for path in missing[:10]:
+            print(f"   - {path}")
+        return 1
+
+    def on_result(task):
+        label = f"{Path(task.input_path).name} × {Path(task.template_path).name}"
+        if task.error is not None:
+            print(f"   ✗ 失敗: {label} - {task.error}")
+        elif args.verbose:
+            print(f"   ✓ {label} → {task.output_path}")
+
+    workers = args.workers
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(tasks))
+    timings = _timings_from_args(args)
+    runner = PlanRunner(workers=workers, continue_on_error=args.continue_on_error,
+                        on_result=on_result, timings=timings)
+    inputs = len({t.input_path for t in tasks})
+    templates = len({t.template_path for t in tasks})
+    print(f"📂 {len(tasks)} 項工作（{inputs} 個輸入、{templates} 個樣板）")
+    results = runner.run(tasks)
+
+    if results["failed_count"] and not args.continue_on_error:
+        print("終止處理（使用 --continue-on-error 可繼續處理其他工作）")
+
+    print(f"\n📊 清單處理完成（{results['wall_s']:.2f}s，{results['groups']} 組）")
+    print(f"   ✓ 成功: {results['success_count']} 個")
+    print(f"   ✗ 失敗: {results['failed_count']} 個")
+    if results["skipped_count"]:
+        print(f"   ⏭ 未執行: {results['skipped_count']} 個")
+    _report_timings(args, timings)
+
+    if args.report:
+        report = {
+            "plan": str(plan_path),
+            "wall_s": round(results["wall_s"], 4),
+            "success_count": results["success_count"],
+            "failed_count": results["failed_count"],
+            "skipped_count": results["skipped_count"],
+            "tasks": [t.to_dict() for t in tasks],
+        }
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   已寫入結果報告至 {args.report}")
+    return 0 if results["failed_count"] == 0 else 1
+
+
 def cmd_validate(args: argparse.Namespace) -> int:
+    from ..parser import MarkdownParser
+    from ..validator.schema_validator import CLI_MAX_ERRORS, SchemaValidator
+
     input_path = Path(args.input)
 
     if not input_path.exists():
@@ -431,7 +1164,8 @@ def cmd_validate(args: argparse.Namespace) -> int:
         print(f"   ✓ 解析完成，共 {field_count} 個欄位")
 
         print("\n🔍 執行驗證...")
-        validator = SchemaValidator()
+        max_errors = CLI_MAX_ERRORS if args.max_errors is None else args.max_errors
+        validator = SchemaValidator(max_errors=max_errors, compiled=args.compiled)
 
         if args.schema:
             schema_path = Path(args.schema)
@@ -455,7 +1189,10 @@ def cmd_validate(args: argparse.Namespace) -> int:
                     print(f"   {key}: {preview}")
             return 0
         else:
-            print(f"❌ 驗證失敗，共 {len(errors)} 個問題：")
+            if validator.max_errors is not None and len(errors) >= validator.max_errors:
+                print(f"❌ 驗證失敗，列出前 {len(errors)} 個問題（--max-errors 0 可全部列出）：")
+            else:
+                print(f"❌ 驗證失敗，共 {len(errors)} 個問題：")
             for error in errors:
                 print(f"   - {error}")
             return 1
@@ -464,6 +1201,258 @@ def cmd_validate(args: argparse.Namespace) -> int:
         return 1
 
 
+def cmd_serve(args: argparse.Namespace) -> int:
+    from .daemon import DaemonError, RenderDaemon, default_socket_path, send_request
+
+    socket_path = args.socket or default_socket_path()
+
+    if args.stop:
+        try:
+            send_request(socket_path, {"command": "shutdown"})
+        except (OSError, DaemonError):
+            print(f"⚠ 警告：沒有執行中的 daemon（{socket_path}）")
+            return 1
+        print(f"✅ 已通知 daemon 結束: {socket_path}")
+        return 0
+
+    metrics = describe_render_metrics(MetricsRegistry()) if args.metrics_file else None
+    daemon = RenderDaemon(socket_path=socket_path, preload=args.preload, metrics=metrics)
+    metrics_writer = (_metrics_writer_from_args(args, metrics, before_write=daemon.update_metrics)
+                      if metrics is not None else None)
+    print(f"🚀 md2word daemon 監聽中: {socket_path}（Ctrl+C 結束）")
+    try:
+        if metrics_writer is not None:
+            metrics_writer.start()
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (DaemonError, OSError) as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    finally:
+        if metrics_writer is not None:
+            metrics_writer.stop()
+    stats = daemon.stats()
+    print(f"📊 daemon 結束：共處理 {stats['jobs']} 個工作（失敗 {stats['failures']} 個）")
+    return 0
+
+
+def cmd_http(args: argparse.Namespace) -> int:
+    import asyncio
+    from .http_server import RenderService, TemplateRegistry
+
+    registry = TemplateRegistry()
+    try:
+        for spec in args.template:
+            template_id, sep, template_path = spec.partition("=")
+            if not sep:
+                template_path = template_id
+                template_id = Path(template_id).stem
+            registry.register(template_id, template_path)
+        for directory in args.template_dir:
+            registry.add_directory(directory)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+
+    if not len(registry):
+        print("❌ 錯誤：至少需要一個樣板（--template ID=PATH 或 --template-dir DIR）")
+        return 1
+
+    service = RenderService(
+        registry,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        max_body=args.max_body,
+    )
+    print(f"📝 已登錄 {len(registry)} 個樣板：{', '.join(t['id'] for t in registry.describe())}")
+    print(f"🚀 md2word HTTP 服務: http://{args.host}:{args.port}（workers={service.workers}，Ctrl+C 結束）")
+    metrics_writer = _metrics_writer_from_args(
+        args, service.metrics,
+        before_write=lambda metrics: metrics.set_gauge("pending_jobs", service.pending),
+    )
+    try:
+        if metrics_writer is not None:
+            metrics_writer.start()
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    finally:
+        if metrics_writer is not None:
+            metrics_writer.stop()
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    from .watch import WatchSession
+
+    template_path = Path(args.template)
+    if not template_path.exists():
+        print(f"❌ 錯誤：找不到模板檔案 {template_path}")
+        return 1
+    try:
+        fmt = resolve_format(str(template_path), args.format)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+
+    md_files: List[Path] = []
+    for raw in args.inputs:
+        path = Path(raw)
+        if path.is_dir():
+            md_files.extend(sorted(path.glob(args.pattern)))
+        elif path.exists():
+            md_files.append(path)
+        else:
+            print(f"❌ 錯誤：找不到輸入檔案 {path}")
+            return 1
+    if not md_files:
+        print("⚠ 警告：沒有可監看的 Markdown 檔案")
+        return 1
+
+    output = Path(args.output)
+    if len(md_files) == 1 and output.suffix.lower() in (".docx", ".xlsx"):
+        outputs = {str(md_files[0]): str(output)}
+    else:
+        output.mkdir(parents=True, exist_ok=True)
+        outputs = {str(md): str(output / f"{md.stem}.{fmt}") for md in md_files}
+
+    session = WatchSession(
+        outputs, str(template_path), fmt, validate=not args.no_validate,
+    )
+    print(f"📂 監看 {len(outputs)} 個檔案 (格式: {fmt})")
+    try:
+        session.run(polling=args.polling, interval=args.interval, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+    print(f"\n📊 監看結束：共渲染 {session.renders} 次（失敗 {session.failures} 次）")
+    return 0
+
+
+def cmd_cache(args: argparse.Namespace) -> int:
+    from ..utils.output_cache import OutputCache, format_size, parse_size
+
+    try:
+        max_bytes = parse_size(args.max_size)
+    except ValueError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    cache = OutputCache(cache_dir=args.cache_dir, max_bytes=max_bytes)
+
+    if args.action == "prune":
+        removed = cache.prune()
+        print(f"🧹 已淘汰 {removed} 個快取項目")
+    elif args.action == "clear":
+        removed = cache.clear()
+        print(f"🧹 已清除 {removed} 個快取項目")
+
+    stats = cache.stats()
+    print(f"📦 輸出快取: {stats['cache_dir']}")
+    print(f"   項目: {stats['entries']} 個")
+    print(f"   大小: {format_size(stats['bytes'])} / 上限 {format_size(stats['max_bytes'])}")
+    if stats["entries"]:
+        print(f"   最舊使用: {stats['oldest_access']}")
+        print(f"   最近使用: {stats['newest_access']}")
+    return 0
+
+
+def cmd_profile_report(args: argparse.Namespace) -> int:
+    import json
+
+    from ..utils.file_utils import FileUtils
+    from ..utils.profiling import find_profiles, format_profile_summary, summarize_profiles
+
+    try:
+        files = find_profiles(args.paths)
+    except FileNotFoundError as e:
+        print(f"❌ 錯誤：{e}")
+        return 1
+    if not files:
+        print(f"⚠ 警告：{', '.join(args.paths)} 中沒有 .pstats 紀錄")
+        return 1
+    try:
+        summary = summarize_profiles(files, top=args.top, sort=args.sort)
+    except Exception as e:
+        print(f"❌ 無法讀取 profile 紀錄：{e}")
+        return 1
+
+    print(f"🐢 慢檔案 profile 彙整（依 {args.sort} 排序）")
+    print(format_profile_summary(summary))
+    if args.json:
+        FileUtils.atomic_write_bytes(
+            args.json, json.dumps(summary, ensure_ascii=False, indent=2).encode("utf-8"))
+        print(f"   已寫入彙整結果至 {args.json}")
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    import shutil
+    import tempfile
+
+    from ..bench import suite
+
+    cases = suite.select_cases(args.only)
+    if not cases:
+        print(f"❌ 錯誤：沒有符合 {', '.join(args.only)} 的案例")
+        return 1
+    if args.list_cases:
+        for name, group, scenario, size in cases:
+            print(f"   {name:<20}{size:>9}")
+        return 0
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = suite.load_results(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"❌ 錯誤：無法讀取基準 {args.baseline}：{e}")
+            return 1
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="md2word-bench-")
+    print(f"⏱ 執行 {len(cases)} 個案例（倍率 {args.scale:g}，各 {max(args.repeat, 1)} 次）")
+
+    def on_case(name, result):
+        print(f"   {name:<20}{result['median_s'] * 1000:>10.1f} ms")
+
+    try:
+        results = suite.run_suite(workdir, scale=args.scale, repeat=args.repeat,
+                                  patterns=args.only, on_case=on_case)
+    except Exception as e:
+        print(f"❌ 量測失敗：{e}")
+        return 1
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n📊 量測結果：")
+    print(suite.format_results(results))
+    if args.output:
+        suite.write_results(args.output, results)
+        print(f"   已寫入量測結果至 {args.output}")
+
+    if baseline is None:
+        return 0
+    rows = suite.compare_results(results, baseline, tolerance=args.tolerance)
+    if args.only:
+        # 只跑部分案例時，基準中其他案例不列為未執行
+        rows = [row for row in rows if row["status"] != "missing"]
+    print(f"\n🔍 與基準比較（{args.baseline}）：")
+    print(suite.format_comparison(rows, args.tolerance))
+    for diff in suite.environment_differences(results, baseline):
+        print(f"   ⚠ 環境不同，比較僅供參考：{diff}")
+    regressed = [row["name"] for row in rows if row["status"] == "regressed"]
+    if regressed:
+        print(f"❌ {len(regressed)} 個案例變慢超過 {args.tolerance * 100:.0f}%：{', '.join(regressed)}")
+        return 1
+    print("✅ 沒有超出容許範圍的變慢")
+    return 0
+
+
 def cmd_info() -> int:
     print("""
 ╔══════════════════════════════════════════════════╗
@@ -509,8 +1498,22 @@ def cli(args: Optional[List[str]] = None) -> int:
         return cmd_batch(parsed_args)
     elif parsed_args.command == "batch-templates":
         return cmd_batch_templates(parsed_args)
+    elif parsed_args.command == "run":
+        return cmd_run(parsed_args)
     elif parsed_args.command == "validate":
         return cmd_validate(parsed_args)
+    elif parsed_args.command == "serve":
+        return cmd_serve(parsed_args)
+    elif parsed_args.command == "http":
+        return cmd_http(parsed_args)
+    elif parsed_args.command == "watch":
+        return cmd_watch(parsed_args)
+    elif parsed_args.command == "cache":
+        return cmd_cache(parsed_args)
+    elif parsed_args.command == "profile-report":
+        return cmd_profile_report(parsed_args)
+    elif parsed_args.command == "bench":
+        return cmd_bench(parsed_args)
     elif parsed_args.command == "info":
         return cmd_info()
     else:
@@ -0,0 +1,142 @@
+"""
+監看模式（``md2word watch``）
+
+輸入 Markdown、樣板或引用的圖片有變動時，只重新渲染受影響的輸出：
+
+- Markdown 變動 → 重新解析該檔並渲染對應輸出
+- 樣板變動 → 沿用已解析的資料，重新渲染全部輸出
+- 圖片變動 → 重新渲染引用該圖片的輸出
+
+解析結果與樣板內容（``TemplateCache``）在迴圈間保留；Excel 的已編譯 cell 樣板
+本來就在行程內共用，因此每次變動只需付出「載入樣板 + 渲染 + 存檔」的成本。
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from ..parser import MarkdownParser
+from ..renderer.factory import build_renderer
+from ..utils.fingerprint import collect_image_paths
+from ..utils.template_cache import TemplateCache
+from ..utils.watcher import create_watcher, wait_for_changes
+
+
+class WatchSession:
+    """
+    一組（輸入 → 輸出）的監看與重新渲染
+
+    Args:
+        outputs: ``{輸入 Markdown 路徑: 輸出路徑}``
+        template_path: 樣板
+        fmt: ``docx`` / ``xlsx``
+        log: 訊息輸出函式（預設 ``print``）
+    """
+
+    def __init__(
+        self,
+        outputs: Dict[str, str],
+        template_path: str,
+        fmt: str,
+        validate: bool = False,
+        log: Callable[[str], None] = print,
+    ):
+        self.outputs = {str(Path(k).resolve()): v for k, v in outputs.items()}
+        self.template_path = str(Path(template_path).resolve())
+        self.fmt = fmt
+        self.validate = validate
+        self.log = log
+        self.template_cache = TemplateCache(max_entries=4)
+        self._parsed: Dict[str, Dict[str, Any]] = {}
+        self._images: Dict[str, List[str]] = {}
+        self.renders = 0
+        self.failures = 0
+
+    # ------------------------------------------------------------ rendering
+
+    def _parse(self, input_path: str) -> Dict[str, Any]:
+        data = MarkdownParser().parse(input_path)
+        self._parsed[input_path] = data
+        self._images[input_path] = collect_image_paths(data)
+        if self.validate:
+            from ..validator import SchemaValidator
+
+            is_valid, errors = SchemaValidator().validate(data)
+            if not is_valid:
+                self.log(f"   ⚠ {Path(input_path).name}：資料驗證有 {len(errors)} 個問題")
+        return data
+
+    def render(self, input_path: str, reparse: bool = True) -> bool:
+        start = time.perf_counter()
+        output_path = self.outputs[input_path]
+        try:
+            data = self._parsed.get(input_path)
+            if reparse or data is None:
+                data = self._parse(input_path)
+            renderer = build_renderer(template_path=self.template_path, format_hint=self.fmt)
+            renderer.load_template(self.template_path,
+                                   source=self.template_cache.get_bytes(self.template_path))
+            renderer.render(data)
+            renderer.save(output_path)
+        except Exception as exc:
+            self.failures += 1
+            self.log(f"   ✗ {Path(input_path).name}：{exc}")
+            return False
+        self.renders += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        self.log(f"   ✓ {Path(input_path).name} → {output_path}（{elapsed:.0f} ms）")
+        return True
+
+    def render_all(self, reparse: bool = True) -> None:
+        for input_path in self.outputs:
+            self.render(input_path, reparse=reparse)
+
+    # ------------------------------------------------------------- watching
+
+    def watched_paths(self) -> Set[str]:
+        paths = set(self.outputs) | {self.template_path}
+        for images in self._images.values():
+            paths.update(str(Path(p).resolve()) for p in images)
+        return paths
+
+    def affected(self, changed: Set[str]) -> Dict[str, bool]:
+        """變動的檔案 → ``{需重新渲染的輸入: 是否需重新解析}``"""
+        if self.template_path in changed:
+            result = {path: False for path in self.outputs}
+        else:
+            result = {}
+        for input_path, images in self._images.items():
+            if any(str(Path(p).resolve()) in changed for p in images):
+                result.setdefault(input_path, False)
+        for path in changed:
+            if path in self.outputs:
+                result[path] = True
+        return result
+
+    def handle(self, changed: Set[str]) -> int:
+        targets = self.affected(changed)
+        if not targets:
+            return 0
+        names = ", ".join(sorted(Path(p).name for p in changed))
+        self.log(f"🔄 偵測到變動：{names}")
+        for input_path, reparse in targets.items():
+            self.render(input_path, reparse=reparse)
+        return len(targets)
+
+    def run(self, polling: bool = False, interval: float = 0.25, debounce: float = 0.15,
+            stop: Optional[threading.Event] = None) -> None:
+        """先完整渲染一次，之後持續監看直到 ``stop`` 被設定（或 Ctrl+C）"""
+        self.render_all()
+        watcher = create_watcher(self.watched_paths(), polling=polling, interval=interval)
+        self.log(f"👀 監看中（{watcher.name}，{len(self.watched_paths())} 個檔案；Ctrl+C 結束）")
+        try:
+            while stop is None or not stop.is_set():
+                changed = wait_for_changes(watcher, debounce=debounce, timeout=0.5)
+                if not changed:
+                    continue
+                self.handle(changed)
+                # 圖片引用可能隨 Markdown 內容改變
+                watcher.set_paths(self.watched_paths())
+        finally:
+            watcher.close()
@@ -4,6 +4,8 @@
 處理多個 Markdown 檔案的批量轉換
 """
 
+import os
+
 import customtkinter as ctk
 from pathlib import Path
 from threading import Thread
@@ -12,7 +14,7 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 
 from .config_manager import ConfigManager
-from md_word_renderer.renderer.factory import build_renderer, detect_format
+from md_word_renderer.renderer.factory import detect_format
 
 
 class BatchWindow(ctk.CTkToplevel):
@@ -303,47 +305,46 @@ class BatchWindow(ctk.CTkToplevel):
     def _do_batch(self) -> None:
         """執行批次處理"""
         try:
-            from md_word_renderer.parser.markdown_parser import MarkdownParser
             from md_word_renderer.renderer.factory import detect_format
+            from md_word_renderer.utils.pipeline import BatchPipeline
 
-            parser = MarkdownParser()
             template = self.template_path.get()
             fmt = detect_format(template)
             output_ext = f".{fmt}"
             output_dir = Path(self.output_dir.get())
 
             total = len(self.file_list)
-            success = 0
-            failed = 0
-
-            for i, (md_path, _) in enumerate(self.file_list):
-                try:
-                    # 更新狀態
-                    self._update_item_status(md_path, "處理中...")
-                    self.after(0, lambda p=(i+1)/total: self.progress_bar.set(p))
-                    self.after(0, lambda s=f"處理 {i+1}/{total}":
-                               self.status_label.configure(text=s))
+            done = 0
 
-                    # 解析
-                    data = parser.parse(md_path)
+            for md_path, _ in self.file_list:
+                self._update_item_status(md_path, "處理中...")
 
-                    # 透過 factory 依樣板挑 renderer
-                    renderer = build_renderer(template_path=template, format_hint=fmt)
-                    output_name = Path(md_path).stem + output_ext
-                    output_path = output_dir / output_name
-                    renderer.render_to_file(data, template, str(output_path))
+            def on_result(job) -> None:
+                # 於 pipeline 的 writer thread 執行；UI 更新一律透過 after()
+                nonlocal done
+                done += 1
+                if job.error is None:
+                    self._update_item_status(job.input_path, "✅ 完成")
+                else:
+                    self._update_item_status(job.input_path, f"❌ {job.error[:20]}")
+                self.after(0, lambda p=done / total: self.progress_bar.set(p))
+                self.after(0, lambda s=f"處理 {done}/{total}":
+                           self.status_label.configure(text=s))
 
-                    # 成功
-                    self._update_item_status(md_path, "✅ 完成")
-                    success += 1
+            # 讀檔 / 解析渲染 / 寫檔重疊執行
+            pipeline = BatchPipeline(
+                workers=min(os.cpu_count() or 1, total),
+                continue_on_error=self.config_manager.get("continue_on_error", True),
+                on_result=on_result,
+            )
+            jobs = [
+                (md_path, template, str(output_dir / (Path(md_path).stem + output_ext)))
+                for md_path, _ in self.file_list
+            ]
+            results = pipeline.run(jobs, fmt=fmt)
+            success = results["success_count"]
+            failed = results["failed_count"]
 
-                except Exception as e:
-                    self._update_item_status(md_path, f"❌ {str(e)[:20]}")
-                    failed += 1
-
-                    if not self.config_manager.get("continue_on_error", True):
-                        break
-            
             # 完成
             self.after(0, lambda: self.progress_bar.set(1))
             self.after(0, lambda: self.status_label.configure(
@@ -11,6 +11,8 @@ from typing import Dict, List, Any, Optional
 
 from .indent_detector import IndentDetector
 from .escape_handler import EscapeHandler
+from ..utils.memprofile import checkpoint
+from ..utils.timing import span
 
 
 class ParseError(Exception):
@@ -77,8 +79,9 @@ class MarkdownParser:
         # 記住來源目錄，用於解析相對圖片路徑
         self._source_dir = path.parent
         
-        with open(path, 'r', encoding=encoding) as f:
-            content = f.read()
+        with span("read"):
+            with open(path, 'r', encoding=encoding) as f:
+                content = f.read()
         
         return self.parse_content(content)
     
@@ -95,18 +98,20 @@ class MarkdownParser:
         """
         if source_dir:
             self._source_dir = source_dir
-            
-        lines = content.split('\n')
-        
-        # 偵測縮排類型
-        indent_type, indent_unit = self.indent_detector.detect(lines)
-        
-        # 解析所有行
-        parsed_items = self._parse_lines(lines, indent_type, indent_unit)
-        
-        # 建立階層結構
-        result = self._build_hierarchy(parsed_items)
-        
+
+        with span("parse"):
+            lines = content.split('\n')
+
+            # 偵測縮排類型
+            indent_type, indent_unit = self.indent_detector.detect(lines)
+
+            # 解析所有行
+            parsed_items = self._parse_lines(lines, indent_type, indent_unit)
+
+            # 建立階層結構
+            result = self._build_hierarchy(parsed_items)
+        checkpoint("parse")
+
         return result
     
     def _parse_lines(self, lines: List[str], 
@@ -3,11 +3,9 @@ Word / Excel 渲染模組
 
 提供 Word 模板渲染（基於 docxtpl + Jinja2）與 Excel 樣板渲染（基於 openpyxl）。
 支援圖片插入功能。
-"""
 
-from .word_renderer import WordRenderer
-from .error_handler import RenderErrorHandler
-from .image_handler import ImageHandler
+所有 renderer 都在第一次取用時才 import，只用到 Excel 或只推斷格式時不載入 docxtpl / python-docx。
+"""
 
 __all__ = [
     "WordRenderer",
@@ -21,7 +19,16 @@ __all__ = [
 
 
 def __getattr__(name):
-    """Lazily expose ExcelRenderer so environments without ``openpyxl`` don't break."""
+    """Lazily expose renderers so environments without ``openpyxl`` don't break."""
+    if name == "WordRenderer":
+        from .word_renderer import WordRenderer  # noqa: WPS433
+        return WordRenderer
+    if name == "RenderErrorHandler":
+        from .error_handler import RenderErrorHandler  # noqa: WPS433
+        return RenderErrorHandler
+    if name == "ImageHandler":
+        from .image_handler import ImageHandler  # noqa: WPS433
+        return ImageHandler
     if name == "ExcelRenderer":
         from .excel_renderer import ExcelRenderer  # noqa: WPS433
         return ExcelRenderer
@@ -0,0 +1,98 @@
+"""
+Excel 欄寬追蹤
+
+``ColumnWidthTracker`` 在 cell 寫入時（攤平、for 展開、模板 pass）即時累計各欄最大顯示寬度，
+渲染結束後直接套用，不必再掃描整張 sheet。
+
+顯示寬度依 East Asian Width 計算：全形 / 寬字元（中日韓文字等）算 2 格，其餘算 1 格；
+同一字串的計算結果以 ``lru_cache`` 記憶。
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from openpyxl.utils import get_column_letter
+    HAS_OPENPYXL = True
+except ImportError:  # pragma: no cover
+    get_column_letter = None  # type: ignore[assignment]
+    HAS_OPENPYXL = False
+
+
+MIN_COL_WIDTH = 8.0
+MAX_COL_WIDTH = 100.0
+COL_PADDING = 2.0
+
+_WIDE = frozenset(("W", "F"))
+
+
+@lru_cache(maxsize=8192)
+def _text_width(text: str) -> int:
+    best = 0
+    for line in text.split("\n"):
+        if line.isascii():
+            width = len(line)
+        else:
+            width = 0
+            for ch in line:
+                width += 2 if unicodedata.east_asian_width(ch) in _WIDE else 1
+        if width > best:
+            best = width
+    return best
+
+
+def display_width(value: Any) -> int:
+    """cell 值的顯示寬度（多行取最寬的一行；``None`` 為 0）"""
+    if value is None:
+        return 0
+    if not isinstance(value, str):
+        value = str(value)
+    return _text_width(value)
+
+
+class ColumnWidthTracker:
+    """
+    逐 cell 累計各 sheet 各欄的最大顯示寬度
+
+    Example:
+        >>> widths = ColumnWidthTracker()
+        >>> widths.observe(sheet, 2, "中文說明")
+        >>> widths.apply(sheet)
+    """
+
+    def __init__(self):
+        self._widths: Dict[Any, Dict[int, int]] = {}
+
+    def observe(self, sheet, column: int, value: Any) -> None:
+        if value is None:
+            return
+        width = display_width(value)
+        columns = self._widths.get(sheet)
+        if columns is None:
+            columns = self._widths[sheet] = {}
+        if width > columns.get(column, 0):
+            columns[column] = width
+
+    def seed(self, sheet, skip: Optional[Callable[[Any], bool]] = None) -> None:
+        """記錄樣板原有的 cell 值
+
+        ``skip`` 為真的值（例如含 ``{{...}}`` 待替換的 cell）不列入，
+        其替換結果會在模板 pass 時再行記錄。
+        """
+        for row in sheet.iter_rows():
+            for cell in row:
+                value = cell.value
+                if value is None or (skip is not None and skip(value)):
+                    continue
+                self.observe(sheet, cell.column, value)
+
+    def width_for(self, sheet, column: int) -> float:
+        measured = self._widths.get(sheet, {}).get(column, 0)
+        return min(max(MIN_COL_WIDTH, float(measured) + COL_PADDING), MAX_COL_WIDTH)
+
+    def apply(self, sheet) -> None:
+        """將累計結果寫入 ``sheet.column_dimensions``"""
+        for column in range(1, sheet.max_column + 1):
+            letter = get_column_letter(column)
+            sheet.column_dimensions[letter].width = self.width_for(sheet, column)
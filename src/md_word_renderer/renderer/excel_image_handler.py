@@ -2,22 +2,47 @@
 Excel 圖片處理器
 
 將圖片嵌入 Excel 工作表的指定儲存格，並等比縮放至最大寬高。
+
+同一張圖片（以內容 hash 判定）只讀取、解碼一次：bytes 與尺寸快取在 handler 內，
+每次嵌入只建立輕量的 ``CachedImage`` anchor。搭配 ``save_workbook_dedup`` 儲存時，
+相同內容的圖片在 ``xl/media`` 只寫入一份，多個 anchor 共用。
+
+``CachedImage``、``_DedupImageWriter`` 依賴 openpyxl 的內部實作（``Image`` 的屬性、
+``ExcelWriter._write_drawing``），只在測試過的 ``OPENPYXL_TESTED`` 版本範圍內啟用去重；
+其他版本改用 ``Workbook.save``，輸出正確但重複的圖片各寫一份。
 """
 
+import datetime
+import hashlib
 import re
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile
 
 try:
+    from openpyxl import __version__ as OPENPYXL_VERSION
     from openpyxl.drawing.image import Image as XLImage
+    from openpyxl.packaging.relationship import get_rels_path
     from openpyxl.worksheet.worksheet import Worksheet
+    from openpyxl.writer.excel import ExcelWriter
+    from openpyxl.xml.functions import tostring
     HAS_OPENPYXL = True
 except ImportError:  # pragma: no cover - guarded import for environments without openpyxl
-    XLImage = None  # type: ignore[assignment]
+    OPENPYXL_VERSION = None
+    XLImage = object  # type: ignore[assignment,misc]
+    get_rels_path = None  # type: ignore[assignment]
     Worksheet = None  # type: ignore[assignment]
+    ExcelWriter = object  # type: ignore[assignment,misc]
+    tostring = None  # type: ignore[assignment]
     HAS_OPENPYXL = False
 
 
+# 圖片去重測試過的 openpyxl 版本範圍 [下限, 上限)；與 requirements.txt 一致
+OPENPYXL_TESTED = ((3, 1), (3, 2))
+
+
 class ExcelImageError(Exception):
     """圖片處理錯誤"""
 
@@ -33,6 +58,48 @@ def parse_cell_ref(ref: str) -> tuple:
     return match.group(1), int(match.group(2))
 
 
+class ImageBlob:
+    """已載入的圖片內容：寫入 ``xl/media`` 的 bytes、原始尺寸與格式"""
+
+    __slots__ = ("digest", "data", "width", "height", "format")
+
+    def __init__(self, digest: str, data: bytes, width: int, height: int, fmt: str):
+        self.digest = digest
+        self.data = data
+        self.width = width
+        self.height = height
+        self.format = fmt
+
+
+class CachedImage(XLImage):
+    """
+    以 ``ImageBlob`` 建立的 openpyxl Image
+
+    不再經過 Pillow 開檔；``content_key`` 供 ``save_workbook_dedup`` 辨識相同內容。
+    ``Image.__init__`` 會以 Pillow 開檔，因此不呼叫，改為設定 openpyxl 3.1 的
+    ``Image`` 寫入時用到的屬性（``ref``、``width``、``height``、``format``、``_data``）。
+    """
+
+    def __init__(self, blob: ImageBlob):
+        self.ref = None
+        self.content_key = blob.digest
+        self._blob = blob
+        self.width = blob.width
+        self.height = blob.height
+        self.format = blob.format
+
+    def _data(self) -> bytes:
+        return self._blob.data
+
+
+@lru_cache(maxsize=1024)
+def _scaled_size(width: int, height: int, max_width: int, max_height: int) -> Tuple[int, int]:
+    if width <= max_width and height <= max_height:
+        return width, height
+    ratio = min(max_width / width, max_height / height)
+    return int(width * ratio), int(height * ratio)
+
+
 class ExcelImageHandler:
     """
     將圖片嵌入 Excel 儲存格
@@ -49,6 +116,9 @@ class ExcelImageHandler:
             )
         self.max_width_px = max_width_px
         self.max_height_px = max_height_px
+        # (路徑, mtime, 大小) → 內容 hash；內容 hash → ImageBlob
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._blobs: Dict[str, ImageBlob] = {}
 
     def embed(
         self,
@@ -76,11 +146,7 @@ class ExcelImageHandler:
         if not path.exists():
             raise ExcelImageError(f"找不到圖片: {image_path}")
 
-        try:
-            image = XLImage(str(path))
-        except Exception as exc:  # pragma: no cover - 取決於 PIL 行為
-            raise ExcelImageError(f"無法載入圖片 {image_path}: {exc}") from exc
-
+        image = CachedImage(self._load_blob(path))
         scaled = self._scale(image)
         image.width = scaled["width"]
         image.height = scaled["height"]
@@ -97,21 +163,93 @@ class ExcelImageHandler:
             "height": scaled["height"],
         }
 
+    # -------------------------------------------------------------------- cache
+
+    def _load_blob(self, path: Path) -> ImageBlob:
+        """取得圖片內容；同一檔案（路徑 + mtime + 大小）不重讀，同一內容不重新解碼"""
+        stat = path.stat()
+        file_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(file_key)
+        if digest is not None:
+            return self._blobs[digest]
+
+        raw = path.read_bytes()
+        digest = hashlib.sha1(raw).hexdigest()
+        blob = self._blobs.get(digest)
+        if blob is None:
+            try:
+                image = XLImage(BytesIO(raw))
+                data = image._data()
+            except Exception as exc:  # pragma: no cover - 取決於 PIL 行為
+                raise ExcelImageError(f"無法載入圖片 {path}: {exc}") from exc
+            blob = ImageBlob(digest, data, image.width, image.height, image.format)
+            self._blobs[digest] = blob
+        self._digests[file_key] = digest
+        return blob
+
     # --------------------------------------------------------------------- size
 
     def _scale(self, image: XLImage) -> dict:
-        """根據 ``max_width_px`` 與 ``max_height_px`` 等比縮放"""
+        """根據 ``max_width_px`` 與 ``max_height_px`` 等比縮放（依尺寸記憶）"""
         width = image.width or self.max_width_px
         height = image.height or self.max_height_px
+        scaled_w, scaled_h = _scaled_size(width, height, self.max_width_px, self.max_height_px)
+        return {"width": scaled_w, "height": scaled_h}
+
+
+# ----------------------------------------------------------------- saving
+
+
+class _DedupImageWriter(ExcelWriter):
+    """相同 ``content_key`` 的圖片共用同一個 ``xl/media`` 檔案"""
+
+    def __init__(self, workbook, archive):
+        super().__init__(workbook, archive)
+        self._image_owners: Dict[str, XLImage] = {}
+
+    def _write_drawing(self, drawing):
+        # 同 ExcelWriter._write_drawing；差別在重複內容的圖片沿用第一張的 _id（即同一 media 路徑）
+        self._drawings.append(drawing)
+        drawing._id = len(self._drawings)
+        for chart in drawing.charts:
+            self._charts.append(chart)
+            chart._id = len(self._charts)
+        for img in drawing.images:
+            key = getattr(img, "content_key", None)
+            owner = self._image_owners.get(key) if key else None
+            if owner is not None:
+                img._id = owner._id
+                continue
+            self._images.append(img)
+            img._id = len(self._images)
+            if key:
+                self._image_owners[key] = img
+        rels_path = get_rels_path(drawing.path)[1:]
+        self._archive.writestr(drawing.path[1:], tostring(drawing._write()))
+        self._archive.writestr(rels_path, tostring(drawing._write_rels()))
+        self.manifest.append(drawing)
+
+
+def dedup_supported(version: Optional[str] = OPENPYXL_VERSION) -> bool:
+    """openpyxl 版本是否在 ``OPENPYXL_TESTED`` 範圍內"""
+    match = re.match(r"(\d+)\.(\d+)", version or "")
+    if not match:
+        return False
+    low, high = OPENPYXL_TESTED
+    return low <= (int(match.group(1)), int(match.group(2))) < high
 
-        if width <= self.max_width_px and height <= self.max_height_px:
-            return {"width": width, "height": height}
 
-        ratio_w = self.max_width_px / width
-        ratio_h = self.max_height_px / height
-        ratio = min(ratio_w, ratio_h)
+def save_workbook_dedup(workbook, filename) -> None:
+    """
+    與 ``Workbook.save`` 相同，但重複內容的圖片只寫入一次（``filename`` 可為路徑或 file-like）
 
-        return {
-            "width": int(width * ratio),
-            "height": int(height * ratio),
-        }
+    openpyxl 不在 ``OPENPYXL_TESTED`` 範圍內時直接呼叫 ``Workbook.save``。
+    """
+    if not dedup_supported():
+        workbook.save(filename)
+        return
+    archive = ZipFile(filename, "w", ZIP_DEFLATED, allowZip64=True)
+    workbook.properties.modified = datetime.datetime.now(
+        tz=datetime.timezone.utc
+    ).replace(tzinfo=None)
+    _DedupImageWriter(workbook, archive).save()
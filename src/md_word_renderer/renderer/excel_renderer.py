@@ -8,6 +8,7 @@ Excel 渲染器（v2.2.1）
 4. 樣板若提供隱藏 ``LAYOUT`` 工作表可覆寫 ``LayoutConfig`` 設定
 """
 
+from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -22,11 +23,13 @@ except ImportError:  # pragma: no cover
 
 from .error_handler import RenderErrorHandler
 from .excel_layout import LayoutConfig, sanitize_sheet_name
-from .excel_image_handler import ExcelImageHandler, ExcelImageError
+from .excel_image_handler import ExcelImageHandler, ExcelImageError, save_workbook_dedup
+from .excel_styles import StyleRegistry, get_style_registry
+from .excel_columns import ColumnWidthTracker
 from .excel_template_engine import ExcelTemplateEngine
-
-
-_EXCEL_MAX_COL_WIDTH = 100.0
+from ..utils.file_utils import FileUtils
+from ..utils.memprofile import checkpoint
+from ..utils.timing import span
 
 
 class ExcelRenderError(Exception):
@@ -65,6 +68,8 @@ class ExcelRenderer:
         self.layout = layout or LayoutConfig()
         self.template_path: Optional[str] = None
         self.workbook = None
+        self.styles: Optional[StyleRegistry] = None
+        self.widths: Optional[ColumnWidthTracker] = None
         self.error_handler = RenderErrorHandler(
             show_errors=show_errors, error_format=error_format
         )
@@ -82,23 +87,34 @@ class ExcelRenderer:
 
     # ------------------------------------------------------------- public API
 
-    def load_template(self, template_path: str) -> None:
+    def load_template(self, template_path: str, source: Optional[bytes] = None) -> None:
         path = Path(template_path)
         if not path.exists():
             raise FileNotFoundError(f"模板檔案不存在: {template_path}")
 
         self.template_path = str(path)
-        self.workbook = load_workbook(str(path))
-        self._apply_template_metadata()
+        # source：已讀入記憶體的樣板內容（例如 TemplateCache），提供時不再讀檔
+        with span("load_template"):
+            self.workbook = load_workbook(BytesIO(source) if source is not None else str(path))
+            self.styles = get_style_registry(self.workbook)
+            self._apply_template_metadata()
+        checkpoint("load_template")
 
     def render(self, data: Dict[str, Any]) -> None:
         if self.workbook is None:
             raise ExcelRenderError("請先使用 load_template() 載入樣板")
 
+        # 圖片在 auto-flatten / for 展開時逐一嵌入，記憶體剖析上算在 render
+        with span("render"):
+            self._render(data)
+        checkpoint("render")
+
+    def _render(self, data: Dict[str, Any]) -> None:
         processed = self._prepare_context(data)
         context = self._build_template_context(processed)
         existing_sheets = set(self.workbook.sheetnames)
         used_sheet_names: set = set()
+        self._init_column_widths()
 
         # 1. 標頭 sheet：只套模板，不 append
         if self.layout.header_sheet.enabled:
@@ -124,7 +140,7 @@ class ExcelRenderer:
                 continue
             sheet = self.workbook[sheet_name]
             if self.engine.has_for_marker(sheet):
-                self.engine.expand_for_loops(sheet, context, processed)
+                self.engine.expand_for_loops(sheet, context, processed, widths=self.widths)
                 used_sheet_names.add(sheet_name)
             elif self.layout.template_engine.auto_flatten_lists:
                 # 對應不到資料 key、沒 for marker、auto_flatten=true → 不建立新 sheet（既有的沒資料）
@@ -134,9 +150,9 @@ class ExcelRenderer:
         # 3. 對所有 sheet 套模板 pass（含 cell 內的 {{var}}）
         self._apply_template_pass_to_all(processed)
 
-        if self.layout.auto_fit_columns:
-            for sheet_name in self.workbook.sheetnames:
-                self._auto_fit_columns(self.workbook[sheet_name])
+        if self.widths is not None:
+            for sheet in self.workbook.worksheets:
+                self.widths.apply(sheet)
 
     def save(self, output_path: str) -> None:
         if self.workbook is None:
@@ -146,9 +162,26 @@ class ExcelRenderer:
         output.parent.mkdir(parents=True, exist_ok=True)
 
         try:
-            self.workbook.save(str(output))
+            # 重複內容的圖片只寫入一次 xl/media；先寫暫存檔再取代
+            with span("save"), FileUtils.atomic_output(str(output)) as tmp:
+                save_workbook_dedup(self.workbook, tmp)
         except Exception as exc:
             raise ExcelRenderError(f"儲存失敗: {exc}") from exc
+        checkpoint("save")
+
+    def to_bytes(self) -> bytes:
+        """以 bytes 取得渲染結果（不寫檔，供 HTTP 服務等使用）"""
+        if self.workbook is None:
+            raise ExcelRenderError("請先載入並渲染樣板")
+
+        buffer = BytesIO()
+        try:
+            with span("save"):
+                save_workbook_dedup(self.workbook, buffer)
+        except Exception as exc:
+            raise ExcelRenderError(f"儲存失敗: {exc}") from exc
+        checkpoint("save")
+        return buffer.getvalue()
 
     def render_to_file(
         self,
@@ -171,6 +204,16 @@ class ExcelRenderer:
         context["data"] = data
         return context
 
+    def _init_column_widths(self) -> None:
+        """開啟 auto_fit_columns 時建立欄寬追蹤器，並記錄樣板原有的 cell 值"""
+        if not self.layout.auto_fit_columns:
+            self.widths = None
+            return
+        self.widths = ColumnWidthTracker()
+        skip = self.engine._has_marker if self.engine.enabled else None
+        for sheet in self.workbook.worksheets:
+            self.widths.seed(sheet, skip=skip)
+
     def _apply_template_pass_to_all(self, data: Dict[str, Any]) -> None:
         """對 workbook 中所有 sheet 跑 Jinja2 模板 pass
 
@@ -184,7 +227,7 @@ class ExcelRenderer:
         for sheet_name in self.workbook.sheetnames:
             if sheet_name == self.LIST_SHEET_METADATA_NAME:
                 continue
-            self.engine.render_sheet(self.workbook[sheet_name], context)
+            self.engine.render_sheet(self.workbook[sheet_name], context, widths=self.widths)
 
     # ----------------------------------------------------------- sheet helpers
 
@@ -307,7 +350,7 @@ class ExcelRenderer:
             sheet = self.workbook[key]
             if self.engine.has_for_marker(sheet):
                 # 走 for 展開（auto_flatten 在此 sheet 不啟用）
-                self.engine.expand_for_loops(sheet, context, data)
+                self.engine.expand_for_loops(sheet, context, data, widths=self.widths)
                 return
             if self.layout.template_engine.auto_flatten_lists:
                 # 向後相容：v2.2 行為（auto-flatten）
@@ -353,41 +396,42 @@ class ExcelRenderer:
 
         if not children:
             row = sheet.max_row + 1 if sheet.max_row else 2
-            sheet.cell(row=row, column=1, value=number)
-            value_cell = sheet.cell(row=row, column=2, value=_coerce_str(value))
-            sheet.cell(row=row, column=3, value=item_type)
+            self._write_cell(sheet, row, 1, number)
+            value_cell = self._write_cell(sheet, row, 2, _coerce_str(value))
+            self._write_cell(sheet, row, 3, item_type)
             if "\n" in (value or ""):
-                value_cell.alignment = self._wrap_alignment()
+                self.styles.apply_wrap_text(value_cell)
 
             extra_start = 4
             for offset, col_name in enumerate(self.layout.extra_columns):
-                sheet.cell(row=row, column=extra_start + offset, value=self._extra_column_value(col_name, field_key, current_path, depth, item))
+                self._write_cell(sheet, row, extra_start + offset, self._extra_column_value(col_name, field_key, current_path, depth, item))
 
             if item_type == "image":
                 image_path = item.get("image_path")
                 if image_path:
                     try:
-                        self.image_handler.embed(
-                            worksheet=sheet,
-                            cell_ref=f"B{row}",
-                            image_path=image_path,
-                            alt_text=item.get("image_alt"),
-                        )
+                        with span("images"):
+                            self.image_handler.embed(
+                                worksheet=sheet,
+                                cell_ref=f"B{row}",
+                                image_path=image_path,
+                                alt_text=item.get("image_alt"),
+                            )
                     except ExcelImageError as exc:
-                        sheet.cell(row=row, column=3, value=f"image-missing: {exc}")
+                        self._write_cell(sheet, row, 3, f"image-missing: {exc}")
             return
 
         row = sheet.max_row + 1 if sheet.max_row else 2
         if number:
-            sheet.cell(row=row, column=1, value=number)
-            value_cell = sheet.cell(row=row, column=2, value=_coerce_str(value))
-            sheet.cell(row=row, column=3, value="group" if item_type == "text" else item_type)
+            self._write_cell(sheet, row, 1, number)
+            value_cell = self._write_cell(sheet, row, 2, _coerce_str(value))
+            self._write_cell(sheet, row, 3, "group" if item_type == "text" else item_type)
             if "\n" in (value or ""):
-                value_cell.alignment = self._wrap_alignment()
+                self.styles.apply_wrap_text(value_cell)
 
             extra_start = 4
             for offset, col_name in enumerate(self.layout.extra_columns):
-                sheet.cell(row=row, column=extra_start + offset, value=self._extra_column_value(col_name, field_key, current_path, depth, item))
+                self._write_cell(sheet, row, extra_start + offset, self._extra_column_value(col_name, field_key, current_path, depth, item))
 
         for child in children:
             self._flatten_into_sheet(sheet, field_key, child, path_so_far=current_path + "." if current_path else "")
@@ -410,11 +454,6 @@ class ExcelRenderer:
             return item.get("type", "text")
         return item.get(col_name, "")
 
-    @staticmethod
-    def _wrap_alignment():
-        from openpyxl.styles import Alignment
-        return Alignment(wrap_text=True)
-
     def _ensure_header_row(self, sheet: Worksheet, headers: List[str]) -> None:
         first_row = list(sheet.iter_rows(min_row=1, max_row=1, values_only=True))
         first_non_empty = False
@@ -426,24 +465,14 @@ class ExcelRenderer:
         if first_non_empty:
             return
         for col_idx, header in enumerate(headers, start=1):
-            sheet.cell(row=1, column=col_idx, value=header)
-
-    @staticmethod
-    def _auto_fit_columns(sheet: Worksheet) -> None:
-        for column_cells in sheet.columns:
-            if not column_cells:
-                continue
-            column_letter = column_cells[0].column_letter  # type: ignore[attr-defined]
-            max_len = 0
-            for cell in column_cells:
-                value = cell.value
-                if value is None:
-                    continue
-                length = max((len(str(line)) for line in str(value).split("\n")), default=0)
-                if length > max_len:
-                    max_len = length
-            adjusted = min(max(8.0, float(max_len) + 2.0), _EXCEL_MAX_COL_WIDTH)
-            sheet.column_dimensions[column_letter].width = adjusted
+            self._write_cell(sheet, 1, col_idx, header)
+
+    def _write_cell(self, sheet: Worksheet, row: int, column: int, value: Any):
+        """寫入 cell 並同步更新欄寬追蹤"""
+        cell = sheet.cell(row=row, column=column, value=value)
+        if self.widths is not None:
+            self.widths.observe(sheet, column, value)
+        return cell
 
 
 # ----------------------------------------------------------------- helpers
@@ -0,0 +1,180 @@
+"""
+Excel 樣式 interning
+
+openpyxl 每次 ``cell.alignment = Alignment(...)`` 都會建構新的樣式物件，再到 workbook
+的 style table 內 hash / 去重。``StyleRegistry`` 針對同一個 workbook 預先算好 style id，
+之後直接寫入 cell 的 ``StyleArray``（by id），大量 cell 不必重複建構樣式物件。
+
+``RowBlockStyle`` 則把一段樣板列（例如 ``{% for %}`` 的 body）的樣式 id、列高與
+合併儲存格擷取一次，再套用到每一組產生的列。
+"""
+
+from copy import copy
+from typing import Any, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+try:
+    from openpyxl.cell.cell import MergedCell
+    from openpyxl.styles.cell_style import StyleArray
+    from openpyxl.worksheet.cell_range import CellRange
+    from openpyxl.worksheet.merge import MergedCellRange
+    HAS_OPENPYXL = True
+except ImportError:  # pragma: no cover
+    MergedCell = None  # type: ignore[assignment]
+    StyleArray = None  # type: ignore[assignment]
+    CellRange = None  # type: ignore[assignment]
+    MergedCellRange = None  # type: ignore[assignment]
+    HAS_OPENPYXL = False
+
+
+class StyleRegistry:
+    """
+    單一 workbook 的樣式 id 快取
+
+    - ``apply_wrap_text(cell)``：在 cell 既有的 alignment 上開啟 wrap_text（保留水平/垂直對齊）
+    - ``capture(cell)`` / ``apply(cell, style)``：以 ``StyleArray``（各樣式 id）複製整組 cell 樣式
+
+    Args:
+        workbook: openpyxl ``Workbook``
+    """
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        # 原 alignmentId → 開啟 wrap_text 後的 alignmentId
+        self._wrap_ids: Dict[int, int] = {}
+
+    def wrap_alignment_id(self, alignment_id: int = 0) -> int:
+        """回傳 ``alignment_id`` 對應、且 ``wrap_text=True`` 的 alignment id"""
+        cached = self._wrap_ids.get(alignment_id)
+        if cached is not None:
+            return cached
+        alignments = self.workbook._alignments
+        base = alignments[alignment_id]
+        if base.wrap_text:
+            wrap_id = alignment_id
+        else:
+            wrapped = copy(base)
+            wrapped.wrap_text = True
+            wrap_id = alignments.add(wrapped)
+        self._wrap_ids[alignment_id] = wrap_id
+        return wrap_id
+
+    def apply_wrap_text(self, cell) -> None:
+        style = cell._style
+        if style is None:
+            style = cell._style = StyleArray()
+        style.alignmentId = self.wrap_alignment_id(style.alignmentId)
+
+    @staticmethod
+    def capture(cell) -> Optional[Any]:
+        """取出 cell 的樣式 id 組；無樣式時回傳 ``None``"""
+        if not cell.has_style:
+            return None
+        return StyleArray(cell._style)
+
+    @staticmethod
+    def apply(cell, style) -> None:
+        """套用 ``capture`` 取得的樣式 id 組
+
+        openpyxl 會就地修改 ``cell._style``，因此每個 cell 各自持有一份副本。
+        """
+        if style is None:
+            return
+        cell._style = StyleArray(style)
+
+
+class RowBlockStyle:
+    """
+    一段連續樣板列的樣式快照
+
+    擷取內容：每個 cell 的樣式 id 組（字型、框線、填色、數字格式、對齊…）、列高，
+    以及完全落在這段列內的合併儲存格（以相對列位記錄）。
+
+    Args:
+        styles: 每列各欄的樣式 id 組（``None`` 表示無樣式）
+        heights: 每列列高（``None`` 表示未自訂）
+        merges: ``(起始相對列, 起始欄, 結束相對列, 結束欄)``
+    """
+
+    def __init__(
+        self,
+        styles: List[List[Optional[Any]]],
+        heights: List[Optional[float]],
+        merges: List[Tuple[int, int, int, int]],
+    ):
+        self.styles = styles
+        self.heights = heights
+        self.merges = merges
+
+    @classmethod
+    def capture(cls, sheet, first_row: int, last_row: int, max_column: int) -> "RowBlockStyle":
+        """擷取 ``first_row``..``last_row`` 的樣式，並解除這段列內的合併儲存格
+
+        合併範圍會在 ``apply_merges`` 時依相對位置重建；先解除可避免刪列後殘留失效的範圍。
+        """
+        styles: List[List[Optional[Any]]] = []
+        heights: List[Optional[float]] = []
+        for r in range(first_row, last_row + 1):
+            styles.append([
+                StyleRegistry.capture(sheet.cell(row=r, column=c))
+                for c in range(1, max_column + 1)
+            ])
+            dim = sheet.row_dimensions.get(r)
+            heights.append(dim.height if dim is not None else None)
+
+        merges: List[Tuple[int, int, int, int]] = []
+        for mr in list(sheet.merged_cells.ranges):
+            if first_row <= mr.min_row and mr.max_row <= last_row:
+                merges.append((mr.min_row - first_row, mr.min_col, mr.max_row - first_row, mr.max_col))
+                sheet.merged_cells.remove(mr)
+        return cls(styles, heights, merges)
+
+    @property
+    def is_plain(self) -> bool:
+        """沒有任何樣式、列高與合併時為真（可整段略過套用）"""
+        return (
+            not self.merges
+            and all(h is None for h in self.heights)
+            and all(st is None for row in self.styles for st in row)
+        )
+
+    def apply_row(self, sheet, offset: int, row_idx: int) -> None:
+        """把第 ``offset`` 列的樣式與列高套到 ``row_idx``"""
+        for column, style in enumerate(self.styles[offset], start=1):
+            if style is not None:
+                StyleRegistry.apply(sheet.cell(row=row_idx, column=column), style)
+        height = self.heights[offset]
+        if height is not None:
+            sheet.row_dimensions[row_idx].height = height
+
+    def apply_merges(self, sheet, base_row: int) -> None:
+        """以 ``base_row`` 為第 0 列重建合併儲存格
+
+        覆蓋區的 ``MergedCell`` 直接沿用已套好的樣式 id（含框線），
+        不走 ``Worksheet.merge_cells`` 逐格重算框線。
+        """
+        for r0, c0, r1, c1 in self.merges:
+            cr = CellRange(min_col=c0, min_row=base_row + r0, max_col=c1, max_row=base_row + r1)
+            mcr = MergedCellRange(sheet, cr.coord)
+            # 產生的列必定是新範圍；直接放入 set，略過 MultiCellRange.add 的線性重複檢查
+            sheet.merged_cells.ranges.add(mcr)
+            cells = mcr.cells
+            next(cells)  # 左上角保留原 cell
+            for row, col in cells:
+                merged = MergedCell(sheet, row=row, column=col)
+                style = self.styles[row - base_row][col - 1]
+                if style is not None:
+                    merged._style = StyleArray(style)
+                sheet._cells[(row, col)] = merged
+
+
+_REGISTRIES: "WeakKeyDictionary[Any, StyleRegistry]" = WeakKeyDictionary()
+
+
+def get_style_registry(workbook) -> StyleRegistry:
+    """取得（必要時建立）``workbook`` 專屬的 ``StyleRegistry``"""
+    registry = _REGISTRIES.get(workbook)
+    if registry is None:
+        registry = StyleRegistry(workbook)
+        _REGISTRIES[workbook] = registry
+    return registry
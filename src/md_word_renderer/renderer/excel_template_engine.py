@@ -8,16 +8,30 @@ Excel 樣板模板引擎（v2.2.1）
 - ``expand_for_loops(sheet, context, data)`` — 對 for 區段做 stack-based 展開
 
 缺變數策略：使用 ``Undefined`` + 自定 ``finalize``，未提供變數靜默替換為空字串。
+
+Context 採分層（``ChainMap``）傳遞：for 展開時只在最上層推入 loop 變數與
+重複使用的 ``loop`` 物件，不再為每個 item 複製整份 context。
 """
 
 from __future__ import annotations
 
 import re
+from collections import ChainMap
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 from jinja2 import Environment, StrictUndefined, exceptions as jinja_exc
 
+from .excel_columns import ColumnWidthTracker
+from .excel_styles import RowBlockStyle, get_style_registry
+
+
+# Environment 與編譯結果皆與引擎設定（missing_variable 等）無關，於行程內共用：
+# 同一行程內的多個 renderer（batch、常駐 daemon）不必重新編譯相同的 cell 字串。
+_SHARED_ENV: Optional[Environment] = None
+_TEMPLATE_CACHE: Dict[str, Any] = {}
+_EXPR_CACHE: Dict[str, Any] = {}
+_COMPILE_CACHE_LIMIT = 4096
 
 _FOR_RE = re.compile(r"^\s*\{%\s*for\s+(\w+)\s+in\s+(.+?)\s*%\}\s*$")
 _END_FOR_RE = re.compile(r"^\s*\{%\s*endfor\s*%\}\s*$")
@@ -40,6 +54,38 @@ class ForMarker:
         return self.row_idx
 
 
+class LoopState:
+    """``{% for %}`` 展開時的 ``loop`` 物件
+
+    整個 for 區段共用一個實例，每個 item 只更新 ``index0``；
+    其餘屬性皆由 ``index0`` / ``length`` 推得。
+    """
+
+    __slots__ = ("index0", "length")
+
+    def __init__(self, length: int):
+        self.index0 = 0
+        self.length = length
+
+    @property
+    def index(self) -> int:
+        return self.index0 + 1
+
+    @property
+    def first(self) -> bool:
+        return self.index0 == 0
+
+    @property
+    def last(self) -> bool:
+        return self.index0 == self.length - 1
+
+    def __getitem__(self, key: str) -> Any:
+        # 相容舊版 dict 形式的 ``loop["index"]``
+        if key in ("index", "index0", "first", "last", "length"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+
 class ExcelTemplateEngine:
     """
     Excel 樣板模板引擎
@@ -63,15 +109,20 @@ class ExcelTemplateEngine:
         self.error_format = error_format
         self._syntax_error_cb = syntax_error_cb
         self.env = self._build_env()
+        self._template_cache = _TEMPLATE_CACHE
+        self._expr_cache = _EXPR_CACHE
 
     def _build_env(self) -> Environment:
         """建立 Jinja2 Environment
 
         採 ``StrictUndefined`` 讓缺變數拋例外，再於 ``render_cell`` 內依
         ``missing_variable`` 設定決定替換為空字串、保留字面、或套 error_format。
+        設定固定，因此整個行程共用同一個 Environment。
         """
-        env = Environment(undefined=StrictUndefined)
-        return env
+        global _SHARED_ENV
+        if _SHARED_ENV is None:
+            _SHARED_ENV = Environment(undefined=StrictUndefined)
+        return _SHARED_ENV
 
     def set_syntax_error_callback(self, cb) -> None:
         self._syntax_error_cb = cb
@@ -81,7 +132,7 @@ class ExcelTemplateEngine:
             return False
         return "{{" in value or "{%" in value or "{#" in value
 
-    def render_cell(self, value: Any, context: Dict[str, Any]) -> Any:
+    def render_cell(self, value: Any, context: Mapping[str, Any]) -> Any:
         """渲染單一 cell 值
 
         - 非字串或不含 marker → 原值
@@ -94,8 +145,8 @@ class ExcelTemplateEngine:
             return value
 
         try:
-            template = self.env.from_string(value)
-            return template.render(**context)
+            template = self._compile_cell(value)
+            return self._render_template(template, context)
         except jinja_exc.UndefinedError as exc:
             if self.missing_variable == "keep":
                 return value
@@ -110,6 +161,36 @@ class ExcelTemplateEngine:
         except Exception:
             return value
 
+    def _compile_cell(self, source: str):
+        """編譯 cell 字串為 Jinja2 Template，同一字串只編譯一次
+
+        for 展開時 body cell 會對每個 item 重複渲染，快取可避免重複 parse / compile。
+        快取為行程層級，超過 ``_COMPILE_CACHE_LIMIT`` 筆時整批清空。
+        """
+        template = self._template_cache.get(source)
+        if template is None:
+            template = self.env.from_string(source)
+            if len(self._template_cache) >= _COMPILE_CACHE_LIMIT:
+                self._template_cache.clear()
+            self._template_cache[source] = template
+        return template
+
+    def _render_template(self, template, context: Mapping[str, Any]) -> str:
+        """以分層 context 渲染，避免 ``Template.render(**context)`` 每次複製 dict
+
+        ``shared=True`` 時 Jinja2 直接以傳入的 mapping 作為 parent，
+        因此需自行把 ``env.globals`` 疊在最底層（``range`` / ``dict`` 等才可用）。
+        """
+        if isinstance(context, ChainMap):
+            scope = ChainMap(*context.maps, self.env.globals)
+        else:
+            scope = ChainMap(context, self.env.globals)
+        ctx = template.new_context(scope, shared=True)
+        try:
+            return self.env.concat(template.root_render_func(ctx))
+        except Exception:
+            self.env.handle_exception()
+
     def _extract_var_name(self, msg: str) -> str:
         """從 Jinja2 UndefinedError 訊息中取出變數名（盡力而為）"""
         # 訊息範例：'foo' is undefined
@@ -120,11 +201,17 @@ class ExcelTemplateEngine:
                     return parts[1]
         return "?"
 
-    def render_sheet(self, sheet, context: Dict[str, Any]) -> int:
+    def render_sheet(
+        self,
+        sheet,
+        context: Mapping[str, Any],
+        widths: Optional[ColumnWidthTracker] = None,
+    ) -> int:
         """走過整張 sheet 套模板
 
         對含 ``{{``/``{%``/``{#`` 標記的 cell 渲染；含換行的取代結果會自動設 wrap_text。
         非字串 cell（數字、bool、None、日期、formula）跳過。
+        提供 ``widths`` 時，替換後的值會一併記入欄寬追蹤。
 
         Returns:
             int: 實際替換的 cell 數
@@ -132,24 +219,24 @@ class ExcelTemplateEngine:
         if not self.enabled:
             return 0
         replaced = 0
+        styles = None
         for row in sheet.iter_rows():
             for cell in row:
                 if not self._has_marker(cell.value):
                     continue
                 new_value = self.render_cell(cell.value, context)
+                if widths is not None:
+                    widths.observe(sheet, cell.column, new_value)
                 if new_value != cell.value:
                     cell.value = new_value
                     replaced += 1
                     # 含換行的字串自動啟用 wrap_text
                     if isinstance(new_value, str) and "\n" in new_value:
-                        cell.alignment = self._wrap_alignment()
+                        if styles is None:
+                            styles = get_style_registry(sheet.parent)
+                        styles.apply_wrap_text(cell)
         return replaced
 
-    @staticmethod
-    def _wrap_alignment():
-        from openpyxl.styles import Alignment
-        return Alignment(wrap_text=True)
-
     # ---------------------------------------------------------- for loops
 
     def has_for_marker(self, sheet) -> bool:
@@ -163,8 +250,10 @@ class ExcelTemplateEngine:
         markers: List[ForMarker] = []
         stack: List[Tuple[int, int, str, str]] = []
 
-        for row_idx in range(1, sheet.max_row + 1):
-            for col_idx in range(1, sheet.max_column + 1):
+        # max_row / max_column 每次呼叫都會掃過所有 cell，先取一次
+        max_row, max_column = sheet.max_row, sheet.max_column
+        for row_idx in range(1, max_row + 1):
+            for col_idx in range(1, max_column + 1):
                 cell = sheet.cell(row=row_idx, column=col_idx)
                 v = cell.value
                 if not isinstance(v, str):
@@ -194,8 +283,9 @@ class ExcelTemplateEngine:
     def expand_for_loops(
         self,
         sheet,
-        context: Dict[str, Any],
+        context: Mapping[str, Any],
         data: Dict[str, Any],
+        widths: Optional[ColumnWidthTracker] = None,
     ) -> int:
         """對 sheet 內所有 ``{% for %}`` 區段做展開
 
@@ -203,6 +293,8 @@ class ExcelTemplateEngine:
         內層 for 先展開，展開後行數變動，外層 for 在重新掃描時仍能正確定位。
         為避免 openpyxl insert_rows 帶來的格式不穩定，採用「刪除 + append 到底部」。
         收尾時 sweep 一次清掉殘留的 ``{% for %}`` / ``{% endfor %}`` 標記。
+        body rows 的樣式（字型、框線、填色、數字格式）、列高與合併儲存格會套到每組產生的列。
+        提供 ``widths`` 時，展開寫入的值會一併記入欄寬追蹤。
 
         Returns:
             int: 展開後新增的 row 數
@@ -216,7 +308,7 @@ class ExcelTemplateEngine:
             if not markers:
                 break
             inserted = self._expand_single_for(
-                sheet, markers[0], context, data
+                sheet, markers[0], context, data, widths
             )
             total_inserted += inserted
 
@@ -239,110 +331,117 @@ class ExcelTemplateEngine:
         self,
         sheet,
         marker: ForMarker,
-        context: Dict[str, Any],
+        context: Mapping[str, Any],
         data: Dict[str, Any],
+        widths: Optional[ColumnWidthTracker] = None,
     ) -> int:
         items = self._resolve_list_expr(marker.list_expr, context, data)
-        if not isinstance(items, list):
-            items = []
 
         # 取出 body rows 的所有 cell 值（包含可能的 inner for/endfor 標記）
+        max_column = sheet.max_column
         body_rows: List[List[Tuple[int, Any]]] = []
         for r in range(marker.body_start, marker.body_end + 1):
             row_cells = []
-            for c in range(1, sheet.max_column + 1):
+            for c in range(1, max_column + 1):
                 row_cells.append((c, sheet.cell(row=r, column=c).value))
             body_rows.append(row_cells)
 
+        # body rows 的樣式 id / 列高 / 合併儲存格只擷取一次，之後套到每組產生的列
+        block_style = RowBlockStyle.capture(
+            sheet, marker.body_start, marker.body_end, max_column
+        )
+        if block_style.is_plain:
+            block_style = None
+
         # 刪除 marker row + body rows + endfor row（從下往上刪）
         rows_to_delete = list(range(marker.marker_row, marker.endfor_row + 1))
         rows_to_delete.sort(reverse=True)
         for r in rows_to_delete:
             sheet.delete_rows(r, 1)
 
+        # 分層 context：上層只放 loop 變數與共用的 loop 物件，下層沿用原 context
+        loop = LoopState(len(items))
+        layer: Dict[str, Any] = {"loop": loop}
+        child_context = ChainMap(layer, context)
+
+        # ``sheet.max_row`` 每次呼叫都要掃過所有 cell；只取一次，之後自行遞增
+        next_row = sheet.max_row + 1
         inserted = 0
         for idx, item in enumerate(items):
-            child_context = dict(context)
-            child_context[marker.var] = item
-            child_context["loop"] = {
-                "index": idx + 1,
-                "index0": idx,
-                "first": idx == 0,
-                "last": idx == len(items) - 1,
-                "length": len(items),
-            }
-            for row_cells in body_rows:
-                new_row_idx = sheet.max_row + 1
+            layer[marker.var] = item
+            loop.index0 = idx
+            base_row = next_row
+            for offset, row_cells in enumerate(body_rows):
+                new_row_idx = next_row
+                next_row += 1
                 for (col, raw_value) in row_cells:
                     new_value = self.render_cell(raw_value, child_context)
                     sheet.cell(row=new_row_idx, column=col, value=new_value)
+                    if widths is not None:
+                        widths.observe(sheet, col, new_value)
+                if block_style is not None:
+                    block_style.apply_row(sheet, offset, new_row_idx)
                 inserted += 1
                 self._maybe_attach_image(sheet, new_row_idx, item, child_context)
+            if block_style is not None and block_style.merges:
+                block_style.apply_merges(sheet, base_row)
         return inserted
 
     def _resolve_list_expr(
         self,
         list_expr: str,
-        context: Dict[str, Any],
+        context: Mapping[str, Any],
         data: Dict[str, Any],
     ) -> List[Any]:
         """解析 ``{% for x in LIST_EXPR %}`` 中的 LIST_EXPR
 
-        支援：
-        - 純變數：``test_cases``（在 context 中取）
+        LIST_EXPR 以 ``env.compile_expression`` 編譯（依字串快取），直接取得求值後的
+        Python 物件，因此任意 Jinja2 運算式皆可用：
+
+        - 純變數：``test_cases``
         - 透過 data：``data["test_cases"]`` / ``data["#16"].children``
-        - Jinja2 形式：當作 template 渲染後再取值（支援 ``case.children`` 形式）
-        """
-        expr = list_expr.strip()
+        - 屬性 / filter / slice：``case.children`` / ``items | selectattr("value")`` / ``items[:3]``
 
-        # 1. 嘗試以 Jinja2 形式渲染（最通用；支援 case.children 等）
+        結果正規化：list → 原樣；dict → 其 ``children``；其他可迭代物件（filter 產生的
+        generator 等）→ ``list(...)``；字串、None 或求值失敗 → ``[]``。
+        """
         try:
-            template = self.env.from_string("{{ (" + expr + ") | default(none) }}")
-            rendered = template.render(**context)
-            # 渲染後可能是 "[1, 2, 3]" 字面 — 我們不解析，直接走「走 context」的 path
+            compiled = self._compile_expression(list_expr.strip())
+            # context 內的 data 優先；context 未帶 data 時以參數補上
+            value = compiled(ChainMap(context, {"data": data}))
         except Exception:
-            pass
+            return []
+        return self._as_item_list(value)
 
-        # 2. 走 context（處理最常見的純變數與 data["..."] 形式）
-        # data["key"].attr / data["key"][idx]
-        m = re.match(
-            r'^data\[\s*[\"\']([^\"\']+)[\"\']\s*\]\s*(?:\.([\w]+)|\[(\d+)\])?$',
-            expr,
-        )
-        if m:
-            key, attr, idx = m.group(1), m.group(2), m.group(3)
-            val = data.get(key)
-            if attr and isinstance(val, dict):
-                val = val.get(attr)
-            if idx and isinstance(val, list) and int(idx) < len(val):
-                val = val[int(idx)]
-            if isinstance(val, list):
-                return val
+    def _compile_expression(self, expr: str):
+        compiled = self._expr_cache.get(expr)
+        if compiled is None:
+            compiled = self.env.compile_expression(expr, undefined_to_none=True)
+            if len(self._expr_cache) >= _COMPILE_CACHE_LIMIT:
+                self._expr_cache.clear()
+            self._expr_cache[expr] = compiled
+        return compiled
+
+    @staticmethod
+    def _as_item_list(value: Any) -> List[Any]:
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict):
+            children = value.get("children")
+            return children if isinstance(children, list) else []
+        if value is None or isinstance(value, (str, bytes)):
             return []
-        m = re.match(r'^data\[\s*[\"\']#(\d+)[\"\']\s*\](?:\.([\w]+))?', expr)
-        if m:
-            num = m.group(1)
-            attr = m.group(2)
-            entry = data.get(f"#{num}")
-            if attr and isinstance(entry, dict):
-                entry = entry.get(attr)
-            if isinstance(entry, list):
-                return entry
-            if isinstance(entry, dict):
-                children = entry.get("children") or []
-                return children if isinstance(children, list) else []
+        try:
+            return list(value)
+        except TypeError:
             return []
-        if expr in context:
-            val = context[expr]
-            return val if isinstance(val, list) else []
-        return []
 
     def _maybe_attach_image(
         self,
         sheet,
         row_idx: int,
         item: Any,
-        context: Dict[str, Any],
+        context: Mapping[str, Any],
     ) -> None:
         if not isinstance(item, dict):
             return
@@ -2,14 +2,18 @@
 Renderer factory
 
 依據樣板副檔名或明確的 ``format_hint`` 建立 ``WordRenderer`` 或 ``ExcelRenderer``。
+
+renderer 於 ``build_renderer`` 內才 import：只用到 docx 時不載入 openpyxl，反之亦然；
+``detect_format`` / ``output_extension_for`` 不載入任何渲染依賴。
 """
 
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from .word_renderer import WordRenderer
-from .excel_renderer import ExcelRenderer
-from .excel_layout import LayoutConfig
+if TYPE_CHECKING:
+    from .word_renderer import WordRenderer
+    from .excel_renderer import ExcelRenderer
+    from .excel_layout import LayoutConfig
 
 
 SUPPORTED_FORMATS = ("docx", "xlsx")
@@ -31,8 +35,8 @@ def detect_format(template_path: Union[str, Path]) -> str:
 def build_renderer(
     template_path: Optional[Union[str, Path]] = None,
     format_hint: str = "auto",
-    layout: Optional[LayoutConfig] = None,
-) -> Union[WordRenderer, ExcelRenderer]:
+    layout: Optional["LayoutConfig"] = None,
+) -> Union["WordRenderer", "ExcelRenderer"]:
     """
     建立合適的 renderer
 
@@ -55,9 +59,13 @@ def build_renderer(
         raise ValueError(f"不支援的格式: {fmt!r}；可用值：{SUPPORTED_FORMATS}")
 
     if fmt == "docx":
+        from .word_renderer import WordRenderer
+
         return WordRenderer()
 
     # xlsx
+    from .excel_renderer import ExcelRenderer
+
     return ExcelRenderer(layout=layout)
 
 
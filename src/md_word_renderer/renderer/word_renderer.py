@@ -5,6 +5,7 @@ Word 渲染器
 支援圖片插入功能
 """
 
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -12,6 +13,9 @@ from docxtpl import DocxTemplate
 
 from .error_handler import RenderErrorHandler
 from .image_handler import ImageHandler
+from ..utils.file_utils import FileUtils
+from ..utils.memprofile import checkpoint
+from ..utils.timing import span
 
 try:
     from docx.shared import Cm, Mm
@@ -66,12 +70,13 @@ class WordRenderer:
         self.image_width = image_width or self.DEFAULT_IMAGE_WIDTH
         self.image_height = image_height
     
-    def load_template(self, template_path: str) -> None:
+    def load_template(self, template_path: str, source: Optional[bytes] = None) -> None:
         """
         載入 Word 模板
         
         Args:
             template_path: 模板檔案路徑（.docx）
+            source: 已讀入記憶體的樣板內容（例如 ``TemplateCache``）；提供時不再讀檔
             
         Raises:
             FileNotFoundError: 模板檔案不存在
@@ -86,9 +91,11 @@ class WordRenderer:
             raise RenderError(f"不支援的檔案格式: {path.suffix}，請使用 .docx")
         
         try:
-            self.template = DocxTemplate(template_path)
+            with span("load_template"):
+                self.template = DocxTemplate(BytesIO(source) if source is not None else template_path)
         except Exception as e:
             raise RenderError(f"無法載入模板: {e}")
+        checkpoint("load_template")
     
     def render(self, data: Dict[str, Any]) -> None:
         """
@@ -113,15 +120,19 @@ class WordRenderer:
         )
         
         # 處理資料中的圖片
-        processed_data = self.image_handler.process_data(data)
+        with span("images"):
+            processed_data = self.image_handler.process_data(data)
+        checkpoint("images")
         
         # 準備渲染上下文
-        context = self._prepare_context(processed_data)
-        
-        try:
-            self.template.render(context)
-        except Exception as e:
-            raise RenderError(f"渲染失敗: {e}")
+        with span("render"):
+            context = self._prepare_context(processed_data)
+            
+            try:
+                self.template.render(context)
+            except Exception as e:
+                raise RenderError(f"渲染失敗: {e}")
+        checkpoint("render")
     
     def get_missing_images(self) -> list:
         """取得渲染過程中找不到的圖片列表"""
@@ -147,9 +158,31 @@ class WordRenderer:
         output.parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            self.template.save(output_path)
+            # 先寫暫存檔再取代，中斷時不會留下寫到一半的 docx
+            with span("save"), FileUtils.atomic_output(output_path) as tmp:
+                self.template.save(tmp)
+        except Exception as e:
+            raise RenderError(f"儲存失敗: {e}")
+        checkpoint("save")
+    
+    def to_bytes(self) -> bytes:
+        """
+        以 bytes 取得渲染後的文件（不寫檔，供 HTTP 服務等使用）
+        
+        Raises:
+            RenderError: 尚未載入模板或儲存失敗
+        """
+        if self.template is None:
+            raise RenderError("請先載入並渲染模板")
+        
+        buffer = BytesIO()
+        try:
+            with span("save"):
+                self.template.save(buffer)
         except Exception as e:
             raise RenderError(f"儲存失敗: {e}")
+        checkpoint("save")
+        return buffer.getvalue()
     
     def _prepare_context(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -4,5 +4,7 @@
 
 from .file_utils import FileUtils
 from .batch_processor import BatchProcessor
+from .template_cache import TemplateCache
+from .metrics import MetricsRegistry
 
-__all__ = ["FileUtils", "BatchProcessor"]
+__all__ = ["FileUtils", "BatchProcessor", "TemplateCache", "MetricsRegistry"]
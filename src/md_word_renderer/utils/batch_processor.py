@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Callable, Optional
 
 from .file_utils import FileUtils
+from .journal import BatchJournal
 
 
 class BatchProcessor:
@@ -49,7 +50,8 @@ class BatchProcessor:
                      output_dir: str,
                      process_func: Callable[[str, str, str], None],
                      output_extension: str = '.docx',
-                     output_pattern: str = '{name}') -> Dict[str, Any]:
+                     output_pattern: str = '{name}',
+                     journal: Optional[BatchJournal] = None) -> Dict[str, Any]:
         """
         批次處理檔案
 
@@ -60,6 +62,8 @@ class BatchProcessor:
             process_func: 處理函數，簽章為 (input, template, output) -> None
             output_extension: 輸出檔案副檔名，預設 ``.docx``；Excel 流程可傳 ``.xlsx``
             output_pattern: 輸出檔名 pattern（不含副檔名；副檔名由 ``output_extension`` 自動附加）
+            journal: 批次日誌；提供時記錄每個檔案的狀態，並略過日誌中已完成
+                （或已用完重試次數）的檔案
 
         Returns:
             dict: 處理結果統計
@@ -68,7 +72,9 @@ class BatchProcessor:
                 'failed': [...],
                 'total': int,
                 'success_count': int,
-                'failed_count': int
+                'failed_count': int,
+                'resumed_count': int,     # 日誌中已完成而略過
+                'exhausted_count': int    # 已用完重試次數而略過
             }
         """
         results = {
@@ -76,24 +82,37 @@ class BatchProcessor:
             'failed': [],
             'total': len(input_files),
             'success_count': 0,
-            'failed_count': 0
+            'failed_count': 0,
+            'resumed_count': 0,
+            'exhausted_count': 0,
         }
 
+        jobs = [
+            (input_file, FileUtils.generate_output_path(
+                input_file, output_dir,
+                extension=output_extension,
+                pattern=output_pattern,
+            ))
+            for input_file in input_files
+        ]
+        if journal is not None:
+            jobs, done, exhausted = journal.partition(jobs)
+            results['resumed_count'] = len(done)
+            results['exhausted_count'] = len(exhausted)
+
         if self.verbose:
-            self.logger.info(f"開始批次處理，共 {len(input_files)} 個檔案")
+            self.logger.info(f"開始批次處理，共 {len(jobs)} 個檔案")
 
-        for i, input_file in enumerate(input_files, 1):
+        for i, (input_file, output_file) in enumerate(jobs, 1):
             try:
-                output_file = FileUtils.generate_output_path(
-                    input_file, output_dir,
-                    extension=output_extension,
-                    pattern=output_pattern,
-                )
-
                 if self.verbose:
-                    self.logger.info(f"[{i}/{len(input_files)}] 處理: {input_file}")
+                    self.logger.info(f"[{i}/{len(jobs)}] 處理: {input_file}")
 
+                if journal is not None:
+                    journal.start(input_file, output_file)
                 process_func(input_file, template_path, output_file)
+                if journal is not None:
+                    journal.done(input_file, output_file)
 
                 results['success'].append({
                     'input': input_file,
@@ -111,6 +130,8 @@ class BatchProcessor:
                 }
                 results['failed'].append(error_info)
                 results['failed_count'] += 1
+                if journal is not None:
+                    journal.failed(input_file, output_file, str(e))
 
                 self.logger.error(f"✗ {input_file} - {str(e)}")
 
@@ -125,6 +146,95 @@ class BatchProcessor:
 
         return results
 
+    def process_pipeline(self,
+                         input_files: List[str],
+                         template_path: str,
+                         output_dir: str,
+                         output_extension: str = '.docx',
+                         output_pattern: str = '{name}',
+                         workers: Optional[int] = None,
+                         io_threads: int = 2,
+                         validate: bool = False,
+                         journal: Optional[BatchJournal] = None,
+                         max_tasks_per_worker: Optional[int] = None,
+                         max_worker_rss: Optional[int] = None) -> Dict[str, Any]:
+        """
+        以管線方式批次處理（讀檔 / 解析渲染 / 寫檔重疊執行）
+
+        與 ``process_files`` 不同，解析與渲染固定使用內建流程（``MarkdownParser`` +
+        ``build_renderer``），在 worker 行程中執行；詳見 :class:`BatchPipeline`。
+
+        Args:
+            input_files: 輸入檔案列表
+            template_path: 模板路徑
+            output_dir: 輸出目錄
+            output_extension: 輸出檔案副檔名
+            output_pattern: 輸出檔名 pattern（不含副檔名）
+            workers: worker 行程數（預設為 CPU 核心數；0 表示在本行程內執行）
+            io_threads: 讀檔與寫檔各自的 thread 數
+            validate: 是否執行資料驗證
+            journal: 批次日誌（同 ``process_files``）
+            max_tasks_per_worker: 每個 worker 行程處理幾個檔案後換新
+            max_worker_rss: worker 行程 RSS 超過此值（bytes）時換新
+
+        Returns:
+            dict: 與 ``process_files`` 相同的統計，另含 ``stages``（各階段 ``StageStats``）
+            與 ``wall_s``
+        """
+        from .pipeline import BatchPipeline
+
+        def on_start(job) -> None:
+            journal.start(job.input_path, job.output_path)
+
+        def on_result(job) -> None:
+            if job.error is not None:
+                self.logger.error(f"✗ {job.input_path} - {job.error}")
+            elif self.verbose:
+                self.logger.info(f"✓ {job.input_path} → {job.output_path}")
+            if journal is not None:
+                if job.error is None:
+                    journal.done(job.input_path, job.output_path)
+                else:
+                    journal.failed(job.input_path, job.output_path, job.error)
+
+        jobs = [
+            (input_file, template_path, FileUtils.generate_output_path(
+                input_file, output_dir,
+                extension=output_extension,
+                pattern=output_pattern,
+            ))
+            for input_file in input_files
+        ]
+        done, exhausted = [], []
+        if journal is not None:
+            jobs, done, exhausted = journal.partition(jobs)
+
+        if self.verbose:
+            self.logger.info(f"開始批次處理，共 {len(jobs)} 個檔案")
+
+        pipeline = BatchPipeline(
+            workers=workers,
+            io_threads=io_threads,
+            validate=validate,
+            continue_on_error=self.continue_on_error,
+            on_result=on_result,
+            on_start=on_start if journal is not None else None,
+            max_tasks_per_worker=max_tasks_per_worker,
+            max_worker_rss=max_worker_rss,
+        )
+        results = pipeline.run(jobs)
+        results['resumed_count'] = len(done)
+        results['exhausted_count'] = len(exhausted)
+
+        if self.verbose:
+            self.logger.info(
+                f"批次處理完成！成功: {results['success_count']}, "
+                f"失敗: {results['failed_count']}"
+            )
+            self.logger.info("各階段吞吐量：\n" + pipeline.format_stats(results['stages'], results['wall_s']))
+
+        return results
+
     def expand_file_patterns(self, patterns: List[str]) -> List[str]:
         """
         展開檔案 patterns
@@ -0,0 +1,118 @@
+"""
+批次工作的成本估計
+
+平行批次時，排在最後的一個大檔會讓其他 worker 閒置等待。``BatchPipeline`` 在開始前
+以 ``CostModel`` 估計每個檔案的處理時間，由大到小派工（LPT），讓長工作先開始。
+
+估計只做一次 byte 掃描（不解析）：
+
+- 檔案大小
+- 行數（``\\n`` 個數；解析時間大致與行數成正比）
+- 圖片行數（``![...](...)``；每張圖需讀檔、解碼、縮放與嵌入）
+
+預測值（秒）= ``base + per_kib × KiB + per_line × 行數 + per_image × 圖片數``。
+預設係數取自 ``simple_template.docx`` 的量測；實際比例可用 ``md2word batch --cost-log``
+輸出的預測 / 實際時間校正。
+"""
+
+import csv
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+_IMAGE_LINE = re.compile(rb"!\[[^\]\r\n]*\]\([^)\r\n]*\)")
+
+
+class JobCost:
+    """單一輸入檔的特徵與預測時間"""
+
+    __slots__ = ("nbytes", "lines", "images", "predicted")
+
+    def __init__(self, nbytes: int = 0, lines: int = 0, images: int = 0, predicted: float = 0.0):
+        self.nbytes = nbytes
+        self.lines = lines
+        self.images = images
+        self.predicted = predicted
+
+
+def scan_input(path: str) -> Tuple[int, int, int]:
+    """``(位元組數, 行數, 圖片數)``；只讀取 bytes，不解碼、不解析"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    lines = raw.count(b"\n") + (1 if raw and not raw.endswith(b"\n") else 0)
+    images = len(_IMAGE_LINE.findall(raw)) if b"![" in raw else 0
+    return len(raw), lines, images
+
+
+class CostModel:
+    """
+    線性成本模型
+
+    Args:
+        base: 每個檔案的固定成本（載入樣板、存檔等）
+        per_kib: 每 KiB 輸入
+        per_line: 每行
+        per_image: 每張圖片
+    """
+
+    def __init__(self, base: float = 0.025, per_kib: float = 0.0002,
+                 per_line: float = 0.00001, per_image: float = 0.005):
+        self.base = base
+        self.per_kib = per_kib
+        self.per_line = per_line
+        self.per_image = per_image
+
+    def predict(self, nbytes: int, lines: int, images: int) -> float:
+        return (self.base + self.per_kib * nbytes / 1024
+                + self.per_line * lines + self.per_image * images)
+
+    def estimate(self, path: str) -> JobCost:
+        """掃描檔案並預測；讀不到的檔案預測為 0（reader 階段會回報錯誤）"""
+        try:
+            nbytes, lines, images = scan_input(path)
+        except OSError:
+            return JobCost()
+        return JobCost(nbytes, lines, images, self.predict(nbytes, lines, images))
+
+    @staticmethod
+    def summarize(samples: Iterable[Tuple[str, JobCost, float]]) -> Optional[Dict[str, Any]]:
+        """
+        預測與實際時間的比較
+
+        Args:
+            samples: ``(input_path, JobCost, 實際秒數)``
+
+        Returns:
+            dict: ``predicted_s`` / ``actual_s`` / ``scale``（實際 ÷ 預測，係數應乘上的倍率）/
+            ``worst``（預測偏差最大的檔案）；沒有樣本時為 ``None``
+        """
+        samples = [s for s in samples if s[1] is not None and s[2] is not None]
+        if not samples:
+            return None
+        predicted = sum(cost.predicted for _, cost, _ in samples)
+        actual = sum(seconds for _, _, seconds in samples)
+        scale = actual / predicted if predicted > 0 else 0.0
+        # 以整體倍率校正後，仍偏差最大的檔案代表模型漏掉的特徵
+        worst = max(samples, key=lambda s: abs(s[2] - s[1].predicted * scale))
+        return {
+            "samples": len(samples),
+            "predicted_s": predicted,
+            "actual_s": actual,
+            "scale": scale,
+            "worst": {"input": worst[0], "predicted_s": worst[1].predicted, "actual_s": worst[2]},
+        }
+
+    @staticmethod
+    def write_log(path: str, samples: Iterable[Tuple[str, JobCost, float]]) -> int:
+        """把每個檔案的特徵、預測與實際時間寫成 CSV（供校正係數）；回傳筆數"""
+        rows: List[List[Any]] = []
+        for input_path, cost, actual in samples:
+            if cost is None or actual is None:
+                continue
+            rows.append([input_path, cost.nbytes, cost.lines, cost.images,
+                         f"{cost.predicted:.6f}", f"{actual:.6f}"])
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["input", "bytes", "lines", "images", "predicted_s", "actual_s"])
+            writer.writerows(rows)
+        return len(rows)
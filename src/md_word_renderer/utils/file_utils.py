@@ -5,8 +5,50 @@
 """
 
 import glob
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+
+_UMASK_LOCK = threading.Lock()
+
+
+def _umask() -> int:
+    """
+    目前的 umask
+
+    ``os.umask`` 只能以「設定」的方式讀取，多執行緒同時寫檔時會互相干擾；
+    Linux 上改讀 ``/proc/self/status``，其他平台才暫時設定再還原。
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    with _UMASK_LOCK:
+        mask = os.umask(0o022)
+        os.umask(mask)
+    return mask
+
+
+def _fsync_directory(directory: Path) -> None:
+    """讓 rename 本身也落盤；Windows 無法開啟目錄，略過"""
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 
 class FileUtils:
@@ -17,6 +59,7 @@ class FileUtils:
     - 檔案路徑處理
     - 批次檔案搜尋
     - 檔名生成
+    - 原子寫入
     """
     
     @staticmethod
@@ -50,6 +93,62 @@ class FileUtils:
         directory.mkdir(parents=True, exist_ok=True)
         return directory
     
+    @staticmethod
+    @contextmanager
+    def atomic_output(path: str, mode: Optional[int] = None) -> Iterator[str]:
+        """
+        原子寫入輸出檔
+
+        產生同目錄下的暫存檔路徑供寫入，成功結束時 fsync 暫存檔後以 ``os.replace`` 取代目標；
+        發生例外時刪除暫存檔。行程中途被終止或系統當機時，目標檔不是舊內容就是完整的新內容，
+        不會留下寫到一半（或長度為 0）的檔案。
+
+        Args:
+            path: 目標檔路徑
+            mode: 目標檔權限；預設沿用既有目標檔的權限，目標不存在時依 umask
+                （與一般 ``open(path, "w")`` 相同，而非 ``mkstemp`` 的 0600）
+
+        Example:
+            >>> with FileUtils.atomic_output("out/a.docx") as tmp:
+            ...     document.save(tmp)
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if mode is None:
+            try:
+                mode = stat.S_IMODE(os.stat(target).st_mode)
+            except OSError:
+                mode = 0o666 & ~_umask()
+        fd, tmp = tempfile.mkstemp(dir=str(target.parent), prefix=f".{target.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            yield tmp
+            # 寫入端可能以路徑重新開檔，權限與 fsync 都在寫完後對最終的檔案處理
+            fd = os.open(tmp, os.O_RDONLY)
+            try:
+                if hasattr(os, "fchmod"):
+                    os.fchmod(fd, mode)
+                else:
+                    os.chmod(tmp, mode)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp, target)
+            _fsync_directory(target.parent)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def atomic_write_bytes(path: str, data: bytes, mode: Optional[int] = None) -> None:
+        """以 :meth:`atomic_output` 寫入 bytes"""
+        with FileUtils.atomic_output(path, mode) as tmp:
+            with open(tmp, "wb") as f:
+                f.write(data)
+
     @staticmethod
     def generate_output_path(input_file: str, 
                              output_dir: str, 
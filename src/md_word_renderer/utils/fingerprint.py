@@ -0,0 +1,102 @@
+"""
+內容指紋
+
+增量建置（manifest）與輸出快取用來判斷「輸入是否改變」的共用工具：
+
+- ``FileDigests``：檔案 SHA-1，依（mtime, 大小）記憶，未變動的檔案不重新讀取
+- ``collect_image_paths``：從解析後資料中找出所有引用的圖片路徑
+- ``data_digest`` / ``settings_digest``：資料與渲染設定的穩定 hash
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import __version__ as RENDERER_VERSION
+
+
+_CHUNK = 1024 * 1024
+
+Stat = Tuple[int, int]
+
+
+def file_stat(path: str) -> Optional[Stat]:
+    """``(mtime_ns, size)``；檔案不存在時回傳 ``None``"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileDigests:
+    """
+    檔案 SHA-1 快取（執行緒安全）
+
+    同一個檔案（路徑、mtime、大小皆相同）只計算一次，例如 2,000 個輸入共用的樣板。
+    """
+
+    def __init__(self):
+        self._memo: Dict[str, Tuple[Stat, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str) -> Optional[str]:
+        """檔案 SHA-1；檔案不存在時回傳 ``None``"""
+        key = os.path.abspath(path)
+        stat = file_stat(key)
+        if stat is None:
+            return None
+        with self._lock:
+            entry = self._memo.get(key)
+        if entry is not None and entry[0] == stat:
+            return entry[1]
+        value = hash_file(key)
+        with self._lock:
+            self._memo[key] = (stat, value)
+        return value
+
+    def stat_and_digest(self, path: str) -> Tuple[Optional[Stat], Optional[str]]:
+        digest = self.digest(path)
+        return (file_stat(os.path.abspath(path)) if digest is not None else None), digest
+
+
+def collect_image_paths(data: Any) -> List[str]:
+    """找出資料中所有 ``image_path``（``MarkdownParser`` 的圖片欄位），去重並排序"""
+    found = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            path = node.get("image_path")
+            if isinstance(path, str) and path:
+                found.add(path)
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return sorted(found)
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def data_digest(data: Any) -> str:
+    """解析後資料的穩定 hash（鍵排序後序列化）"""
+    return hashlib.sha1(_canonical(data)).hexdigest()
+
+
+def settings_digest(settings: Optional[Dict[str, Any]] = None) -> str:
+    """渲染設定的 hash；自動納入 renderer 版本"""
+    payload = {"version": RENDERER_VERSION, "settings": settings or {}}
+    return hashlib.sha1(_canonical(payload)).hexdigest()
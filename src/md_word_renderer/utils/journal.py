@@ -0,0 +1,240 @@
+"""
+可續跑的批次日誌
+
+批次執行時把每個工作的狀態以 JSON Lines 附加到輸出目錄的 ``.md2word-journal.jsonl``：
+
+    {"event": "start",  "output": "...", "input": "...", "t": 1700000000.0}
+    {"event": "done",   "output": "...", "input": "...", "size": 12345, "t": ...}
+    {"event": "failed", "output": "...", "input": "...", "error": "...", "t": ...}
+
+- 每筆紀錄寫入後立即 flush 到作業系統；``fsync`` 以群組進行（每 ``fsync_every`` 筆或
+  每 ``fsync_interval`` 秒一次，以及結束時），行程被終止最多只會遺失最後一組紀錄，
+  遺失的工作下次會重做
+- ``--resume`` 時重播日誌：已完成且輸出檔大小與紀錄相符者略過；失敗或停在 ``start``
+  （執行中被中斷）者重做，直到用完重試次數。停在 ``start`` 也算一次嘗試，
+  避免每次都讓行程當掉的檔案無限重跑
+- 輸出檔一律原子寫入（``FileUtils.atomic_output``），「已完成」必定對應完整的檔案
+- 續跑時先把日誌壓縮成每個輸出一筆最新狀態（原子取代），日誌不會無限成長
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+JOURNAL_NAME = ".md2word-journal.jsonl"
+
+DONE = "done"
+FAILED = "failed"
+STARTED = "start"
+
+
+class JobState:
+    """日誌重播後單一輸出的狀態"""
+
+    __slots__ = ("status", "attempts", "error", "size")
+
+    def __init__(self):
+        self.status: Optional[str] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.size: Optional[int] = None
+
+
+def _key(output_path: str) -> str:
+    return os.path.normcase(os.path.abspath(output_path))
+
+
+def replay(path: str) -> Dict[str, JobState]:
+    """
+    讀取日誌並依序套用，回傳 ``{輸出路徑: JobState}``
+
+    最後一行可能因中斷而不完整，無法解析的行直接忽略。
+    """
+    states: Dict[str, JobState] = {}
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return states
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                key = _key(record["output"])
+                event = record["event"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            state = states.setdefault(key, JobState())
+            if event == STARTED:
+                state.status = STARTED
+                state.attempts += 1
+            elif event == DONE:
+                state.status = DONE
+                state.size = record.get("size")
+                state.error = None
+            elif event == FAILED:
+                if state.status != STARTED:
+                    # 未進入渲染即失敗（例如讀檔錯誤）也算一次嘗試
+                    state.attempts += 1
+                state.status = FAILED
+                state.error = record.get("error")
+            # 壓縮後的紀錄帶有累計的嘗試次數
+            if "attempts" in record:
+                state.attempts = record["attempts"]
+    return states
+
+
+class BatchJournal:
+    """
+    批次工作日誌
+
+    Args:
+        path: 日誌檔路徑（通常為 ``<output_dir>/.md2word-journal.jsonl``）
+        resume: 為 True 時沿用既有日誌；否則清空重新開始
+        retries: 失敗（或中斷）的工作在續跑時最多再嘗試幾次
+        fsync_every: 每累積幾筆紀錄 fsync 一次
+        fsync_interval: 距上次 fsync 超過幾秒時 fsync
+
+    Example:
+        >>> with BatchJournal.for_output_dir("out/", resume=True) as journal:
+        ...     todo, done, exhausted = journal.partition(jobs)
+        ...     for job in todo:
+        ...         journal.start(job[0], job[2])
+        ...         ...
+        ...         journal.done(job[0], job[2])
+    """
+
+    def __init__(self, path: str, resume: bool = False, retries: int = 2,
+                 fsync_every: int = 64, fsync_interval: float = 1.0):
+        self.path = Path(path)
+        self.retries = max(retries, 0)
+        self.fsync_every = max(fsync_every, 1)
+        self.fsync_interval = fsync_interval
+        self.states: Dict[str, JobState] = replay(str(self.path)) if resume else {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.states:
+            self._compact()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str, **kwargs) -> "BatchJournal":
+        return cls(str(Path(output_dir) / JOURNAL_NAME), **kwargs)
+
+    # ----------------------------------------------------------------- resume
+
+    def _compact(self) -> None:
+        """每個輸出只保留最新狀態（含累計嘗試次數），原子取代日誌"""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for key, state in self.states.items():
+                if state.status is None:
+                    continue
+                record: Dict[str, Any] = {"event": state.status, "output": key,
+                                          "attempts": state.attempts}
+                if state.status == DONE:
+                    record["size"] = state.size
+                elif state.error is not None:
+                    record["error"] = state.error
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def is_done(self, output_path: str) -> bool:
+        """已完成，且輸出檔仍存在、大小與紀錄相符"""
+        state = self.states.get(_key(output_path))
+        if state is None or state.status != DONE:
+            return False
+        try:
+            size = os.path.getsize(output_path)
+        except OSError:
+            return False
+        return state.size is None or size == state.size
+
+    def is_exhausted(self, output_path: str) -> bool:
+        """失敗 / 中斷的次數已超過重試上限"""
+        state = self.states.get(_key(output_path))
+        return (state is not None and state.status in (FAILED, STARTED)
+                and state.attempts > self.retries)
+
+    def partition(self, jobs: Sequence[Tuple[str, ...]]) -> Tuple[List, List, List]:
+        """
+        依日誌分類工作（以最後一欄為輸出路徑）
+
+        Returns:
+            ``(待執行, 已完成, 已用完重試次數)``
+        """
+        todo, done, exhausted = [], [], []
+        for job in jobs:
+            output = job[-1]
+            if self.is_done(output):
+                done.append(job)
+            elif self.is_exhausted(output):
+                exhausted.append(job)
+            else:
+                todo.append(job)
+        return todo, done, exhausted
+
+    def last_error(self, output_path: str) -> Optional[str]:
+        state = self.states.get(_key(output_path))
+        return state.error if state is not None else None
+
+    # ---------------------------------------------------------------- writing
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["t"] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def start(self, input_path: str, output_path: str) -> None:
+        self._append({"event": STARTED, "output": output_path, "input": input_path})
+
+    def done(self, input_path: str, output_path: str) -> None:
+        try:
+            size: Optional[int] = os.path.getsize(output_path)
+        except OSError:
+            size = None
+        self._append({"event": DONE, "output": output_path, "input": input_path, "size": size})
+
+    def failed(self, input_path: str, output_path: str, error: str) -> None:
+        self._append({"event": FAILED, "output": output_path, "input": input_path,
+                      "error": error})
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "BatchJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
@@ -0,0 +1,169 @@
+"""
+增量建置 manifest
+
+``md2word batch --incremental`` 在輸出目錄保存 ``.md2word-manifest.json``，每個輸出檔記錄：
+
+- 輸入 Markdown、樣板與所有引用圖片的（mtime, 大小）與 SHA-1
+- renderer 版本與相關設定（格式、是否驗證等）的 hash
+
+再次執行時，輸出檔存在且上述內容全部相符者即略過。檔案的 mtime / 大小未變時
+直接視為相同，不重新計算 hash；只有 touch 過但內容不變的檔案會重新 hash 一次。
+
+紀錄必須對應輸出實際根據的內容：輸入與樣板的指紋在讀檔前取得後傳給 ``record``；
+圖片要渲染後才知道路徑，修改時間落在工作開始前 ``RACY_WINDOW_NS`` 之後的圖片可能在
+渲染期間被改過，記錄為無效，下次一定重建。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .fingerprint import FileDigests, file_stat, settings_digest
+
+
+MANIFEST_NAME = ".md2word-manifest.json"
+MANIFEST_VERSION = 1
+
+# 檔案系統 mtime 的精度可能只到秒（FAT 為 2 秒），判斷「渲染期間被修改」時多留的餘裕
+RACY_WINDOW_NS = 2_000_000_000
+
+_UNSET = object()
+
+
+class BuildManifest:
+    """
+    輸出目錄的增量建置紀錄
+
+    Example:
+        >>> manifest = BuildManifest.load("outputs/")
+        >>> if not manifest.is_up_to_date("a.md", "tpl.docx", "outputs/a.docx", settings):
+        ...     input_file = manifest.fingerprint("a.md")  # 讀檔前
+        ...     render(...)
+        ...     manifest.record("a.md", "tpl.docx", "outputs/a.docx", images, settings,
+        ...                     input_file=input_file)
+        >>> manifest.save()
+    """
+
+    def __init__(self, output_dir: str, entries: Optional[Dict[str, Any]] = None,
+                 digests: Optional[FileDigests] = None):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.entries: Dict[str, Any] = entries or {}
+        self.digests = digests or FileDigests()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, output_dir: str, digests: Optional[FileDigests] = None) -> "BuildManifest":
+        """讀取 manifest；不存在、損毀或版本不符時視為空白"""
+        path = Path(output_dir) / MANIFEST_NAME
+        entries: Dict[str, Any] = {}
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            if raw.get("version") == MANIFEST_VERSION:
+                entries = raw.get("outputs") or {}
+        except (OSError, ValueError, AttributeError):
+            entries = {}
+        return cls(output_dir, entries, digests)
+
+    # ------------------------------------------------------------- queries
+
+    def _key(self, output_path: str) -> str:
+        return os.path.relpath(os.path.abspath(output_path), os.path.abspath(self.output_dir))
+
+    def _file_matches(self, path: str, recorded: Any) -> bool:
+        """``recorded`` 為 ``[mtime_ns, size, sha1]``；``None`` 表示當時檔案不存在"""
+        if recorded is None:
+            return file_stat(path) is None
+        if len(recorded) != 3:
+            return False
+        stat = file_stat(path)
+        if stat is None:
+            return False
+        if list(stat) == list(recorded[:2]):
+            return True
+        if self.digests.digest(path) != recorded[2]:
+            return False
+        # 只被 touch、內容未變：更新紀錄的 stat，下次不必再 hash
+        recorded[0], recorded[1] = stat
+        return True
+
+    def is_up_to_date(self, input_path: str, template_path: str, output_path: str,
+                      settings: Optional[Dict[str, Any]] = None) -> bool:
+        with self._lock:
+            entry = self.entries.get(self._key(output_path))
+        if entry is None or not os.path.exists(output_path):
+            return False
+        if entry.get("settings") != settings_digest(settings):
+            return False
+        if entry.get("input") != os.path.abspath(input_path):
+            return False
+        if entry.get("template") != os.path.abspath(template_path):
+            return False
+        if not self._file_matches(input_path, entry.get("input_file")):
+            return False
+        if not self._file_matches(template_path, entry.get("template_file")):
+            return False
+        for image_path, recorded in (entry.get("images") or {}).items():
+            if not self._file_matches(image_path, recorded):
+                return False
+        return True
+
+    # ------------------------------------------------------------- updates
+
+    def fingerprint(self, path: str) -> Optional[List[Any]]:
+        """``[mtime_ns, size, sha1]``；檔案不存在時為 ``None``。應在讀取檔案之前取得"""
+        stat, digest = self.digests.stat_and_digest(path)
+        if stat is None:
+            return None
+        return [stat[0], stat[1], digest]
+
+    def _image_fingerprint(self, path: str, since_ns: Optional[int]) -> Optional[List[Any]]:
+        entry = self.fingerprint(path)
+        if entry is not None and since_ns is not None and entry[0] >= since_ns - RACY_WINDOW_NS:
+            # 可能在渲染期間被修改：記錄一個不會相符的指紋
+            return [0, 0, None]
+        return entry
+
+    def record(self, input_path: str, template_path: str, output_path: str,
+               images: Iterable[str] = (), settings: Optional[Dict[str, Any]] = None,
+               input_file: Any = _UNSET, template_file: Any = _UNSET,
+               since_ns: Optional[int] = None) -> None:
+        """
+        記錄一個已完成的輸出
+
+        Args:
+            input_file / template_file: 讀檔前以 :meth:`fingerprint` 取得的指紋；未提供時
+                現在才計算（只適用於確定檔案在渲染期間未被修改的情況）
+            since_ns: 工作開始的時間（``time.time_ns()``），用來判斷圖片是否在渲染期間被修改
+        """
+        if input_file is _UNSET:
+            input_file = self.fingerprint(input_path)
+        if template_file is _UNSET:
+            template_file = self.fingerprint(template_path)
+        entry = {
+            "input": os.path.abspath(input_path),
+            "input_file": input_file,
+            "template": os.path.abspath(template_path),
+            "template_file": template_file,
+            # 不存在的圖片也記錄（None），之後補上檔案時會觸發重建
+            "images": {os.path.abspath(p): self._image_fingerprint(p, since_ns) for p in images},
+            "settings": settings_digest(settings),
+        }
+        with self._lock:
+            self.entries[self._key(output_path)] = entry
+
+    def forget(self, output_path: str) -> None:
+        with self._lock:
+            self.entries.pop(self._key(output_path), None)
+
+    def save(self) -> None:
+        """原子寫入（先寫暫存檔再取代）"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {"version": MANIFEST_VERSION, "outputs": self.entries}
+            text = json.dumps(payload, ensure_ascii=False, indent=1, sort_keys=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,59 @@
+"""
+行程記憶體量測（RSS）
+
+不依賴 psutil：
+
+- Linux：讀 ``/proc/self/statm``（目前 RSS）與 ``/proc/self/status`` 的 ``VmHWM``（峰值）；
+  寫入 ``/proc/self/clear_refs`` 可把峰值歸零，因此能量到「單一工作期間」的峰值
+- 其他 POSIX：``resource.getrusage`` 的 ``ru_maxrss``（行程生命週期的峰值）
+- 無法量測時回傳 ``None``
+"""
+
+import os
+import sys
+from typing import Optional
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> Optional[int]:
+    """目前的 RSS（bytes）"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    return _ru_maxrss()
+
+
+def peak_rss() -> Optional[int]:
+    """峰值 RSS（bytes）；Linux 上為上次 :func:`reset_peak_rss` 之後的峰值"""
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return _ru_maxrss()
+
+
+def reset_peak_rss() -> bool:
+    """把峰值 RSS 歸零（Linux 4.0+）；不支援時回傳 False"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _ru_maxrss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 單位為 KiB，macOS 為 bytes
+    return value if sys.platform == "darwin" else value * 1024
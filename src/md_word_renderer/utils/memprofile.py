@@ -0,0 +1,241 @@
+"""
+各步驟的記憶體剖析（``--memprofile``）
+
+在步驟交界（解析、載入樣板、圖片處理、渲染、存檔之後）以 tracemalloc 取快照，
+與前一個快照比較，得到每個步驟新配置最多的程式位置，並記錄 RSS 與步驟期間的峰值 RSS：
+
+    from ..utils.memprofile import checkpoint
+
+    data = parse(...)
+    checkpoint("parse")
+
+- 未啟用時 ``checkpoint()`` 只檢查一個模組變數，幾乎沒有成本
+- tracemalloc 只追蹤經由 Python 配置器的記憶體；lxml（docx XML）等 C 擴充直接 malloc 的部分
+  只會反映在 RSS，報告中以「未追蹤」（RSS 增量 − Python 增量）列出
+- tracemalloc 為整個行程共用：同一行程同時只剖析一個工作（批次時每個 worker 行程各自剖析）
+- 開啟後執行速度會明顯變慢（每次配置都要記錄呼叫位置），只用於診斷
+"""
+
+import json
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import memory
+from .memory import current_rss, peak_rss, reset_peak_rss
+from .output_cache import format_size
+from .profiling import short_path
+
+
+_ACTIVE: Optional["MemoryProfile"] = None
+
+# 排除 tracemalloc 與量測本身的配置
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, memory.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def checkpoint(stage: str) -> None:
+    """步驟結束；未啟用記憶體剖析時不做任何事"""
+    if _ACTIVE is not None:
+        _ACTIVE.checkpoint(stage)
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+class MemoryProfile:
+    """
+    剖析一個工作的記憶體使用
+
+    Args:
+        top: 每個步驟保留幾個配置最多的位置
+        nframes: tracemalloc 記錄的呼叫堆疊深度（位置以最內層 frame 表示）
+
+    Example:
+        >>> with MemoryProfile() as mem:
+        ...     process_one("a.md", "tpl.docx", "out.docx")
+        >>> mem.report()["stages"][0]["stage"]
+        'parse'
+    """
+
+    def __init__(self, top: int = 10, nframes: int = 1):
+        self.top = top
+        self.nframes = nframes
+        self.stages: List[Dict[str, Any]] = []
+        self.peak_rss: Optional[int] = None
+        self._started = False
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._previous_traced = 0
+        self._previous_rss: Optional[int] = None
+
+    def __enter__(self) -> "MemoryProfile":
+        global _ACTIVE
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._started = True
+        self._previous = _snapshot()
+        self._previous_traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._previous_rss = current_rss()
+        reset_peak_rss()
+        _ACTIVE = self
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        global _ACTIVE
+        _ACTIVE = None
+        self._previous = None
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+        return False
+
+    def checkpoint(self, stage: str) -> None:
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        rss, stage_peak = current_rss(), peak_rss()
+        snapshot = _snapshot()
+        sites = []
+        for stat in snapshot.compare_to(self._previous, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            sites.append({
+                "site": f"{short_path(frame.filename)}:{frame.lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            })
+            if len(sites) >= self.top:
+                break
+        traced_diff = traced - self._previous_traced
+        rss_diff = rss - self._previous_rss if rss is not None and self._previous_rss is not None else None
+        self.stages.append({
+            "stage": stage,
+            "traced_diff": traced_diff,
+            "traced_peak": traced_peak,
+            "rss": rss,
+            "rss_diff": rss_diff,
+            "peak_rss": stage_peak,
+            # C 擴充（lxml 等）直接配置、tracemalloc 看不到的部分
+            "untraced_diff": rss_diff - traced_diff if rss_diff is not None else None,
+            "top": sites,
+        })
+        if stage_peak is not None:
+            self.peak_rss = max(self.peak_rss or 0, stage_peak)
+
+        self._previous = snapshot
+        self._previous_traced = traced
+        self._previous_rss = rss
+        tracemalloc.reset_peak()
+        reset_peak_rss()
+
+    def report(self) -> Dict[str, Any]:
+        """``stages``（依發生順序）與 ``peak_rss``；可 pickle，worker 行程回傳給主行程用"""
+        return {"stages": list(self.stages), "peak_rss": self.peak_rss}
+
+
+def _size(nbytes: Optional[int], signed: bool = False) -> str:
+    if nbytes is None:
+        return "-"
+    text = format_size(abs(nbytes))
+    if not signed:
+        return text
+    return f"-{text}" if nbytes < 0 else f"+{text}"
+
+
+class MemoryReport:
+    """
+    多個檔案的記憶體剖析結果
+
+    Example:
+        >>> report = MemoryReport()
+        >>> report.add("a.md", mem.report())
+        >>> print(report.format())
+    """
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, file: str, report: Optional[Dict[str, Any]]) -> None:
+        if report is not None:
+            self.files[file] = report
+
+    def summary(self, top: int = 5) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: ``files``、``peak_rss`` / ``peak_file``、``stages``（依步驟：``count``、
+            ``max_traced_diff`` / ``max_rss_diff`` 與其檔案、``max_peak_rss``、``total_untraced_diff``、
+            ``top``：各檔案合計新配置最多的位置）
+        """
+        stages: Dict[str, Dict[str, Any]] = {}
+        sites: Dict[str, Dict[str, Dict[str, int]]] = {}
+        peak, peak_file = None, None
+        for file, report in self.files.items():
+            if report.get("peak_rss") is not None and report["peak_rss"] > (peak or 0):
+                peak, peak_file = report["peak_rss"], file
+            for st in report["stages"]:
+                agg = stages.setdefault(st["stage"], {
+                    "stage": st["stage"], "count": 0,
+                    "max_traced_diff": None, "max_traced_file": None,
+                    "max_rss_diff": None, "max_rss_file": None,
+                    "max_peak_rss": None, "total_untraced_diff": 0,
+                })
+                agg["count"] += 1
+                if agg["max_traced_diff"] is None or st["traced_diff"] > agg["max_traced_diff"]:
+                    agg["max_traced_diff"], agg["max_traced_file"] = st["traced_diff"], file
+                if st["rss_diff"] is not None and (agg["max_rss_diff"] is None
+                                                   or st["rss_diff"] > agg["max_rss_diff"]):
+                    agg["max_rss_diff"], agg["max_rss_file"] = st["rss_diff"], file
+                if st["peak_rss"] is not None:
+                    agg["max_peak_rss"] = max(agg["max_peak_rss"] or 0, st["peak_rss"])
+                agg["total_untraced_diff"] += st["untraced_diff"] or 0
+                stage_sites = sites.setdefault(st["stage"], {})
+                for site in st["top"]:
+                    entry = stage_sites.setdefault(site["site"], {"size_diff": 0, "count_diff": 0, "files": 0})
+                    entry["size_diff"] += site["size_diff"]
+                    entry["count_diff"] += site["count_diff"]
+                    entry["files"] += 1
+        for name, agg in stages.items():
+            ranked = sorted(sites.get(name, {}).items(), key=lambda kv: -kv[1]["size_diff"])[:top]
+            agg["top"] = [dict(site=site, **values) for site, values in ranked]
+        return {
+            "files": len(self.files),
+            "peak_rss": peak,
+            "peak_file": peak_file,
+            "stages": list(stages.values()),
+        }
+
+    def format(self, top: int = 5) -> str:
+        data = self.summary(top)
+        lines = []
+        if data["peak_rss"] is not None:
+            lines.append(f"   峰值 RSS：{_size(data['peak_rss'])}（{Path(data['peak_file']).name}）")
+        # 全形字佔兩格，標題欄寬扣掉字數才能與數值對齊
+        lines.append(f"   {'步驟':<14}{'Python 增量':>12}{'RSS 增量':>12}{'未追蹤合計':>9}{'步驟峰值 RSS':>10}")
+        for st in data["stages"]:
+            lines.append(f"   {st['stage']:<16}{_size(st['max_traced_diff'], True):>14}"
+                         f"{_size(st['max_rss_diff'], True):>14}"
+                         f"{_size(st['total_untraced_diff'], True):>14}{_size(st['max_peak_rss']):>14}")
+        for st in data["stages"]:
+            if not st["top"]:
+                continue
+            worst = f"（最多：{Path(st['max_traced_file']).name}）" if data["files"] > 1 else ""
+            lines.append(f"   {st['stage']} 新配置最多的位置{worst}：")
+            for site in st["top"]:
+                lines.append(f"     {_size(site['size_diff'], True):>12}  {site['count_diff']:>8} 個  {site['site']}")
+        return "\n".join(lines)
+
+    def write_json(self, path: str, top: int = 20) -> None:
+        """寫出機器可讀的結果（原子取代），含每個檔案的各步驟明細"""
+        from .file_utils import FileUtils
+
+        payload = self.summary(top)
+        payload["per_file"] = self.files
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+        FileUtils.atomic_write_bytes(path, text.encode("utf-8"))
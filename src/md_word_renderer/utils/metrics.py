@@ -0,0 +1,310 @@
+"""
+執行期指標
+
+``MetricsRegistry`` 收集 counter / gauge / 延遲 histogram，可輸出為
+Prometheus text exposition 格式或 JSON（``to_dict``）。只使用標準函式庫。
+
+``write_metrics`` / ``MetricsFileWriter`` 把指標以原子取代的方式寫成檔案，
+供 node-exporter 的 textfile collector 收集（``*.prom``），或寫成 JSON（``*.json``）：
+
+    md2word batch in/ tpl.docx out/ --metrics-file /var/lib/node_exporter/md2word.prom
+"""
+
+import bisect
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+
+# 秒；涵蓋單一小檔（數 ms）到大型 Excel（數十秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    固定 bucket 的累積 histogram
+
+    Args:
+        buckets: 各 bucket 上界（遞增）；``+Inf`` 自動附加
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """``[(上界, 累積次數), ...]``，最後一項上界為 ``inf``"""
+        total = 0
+        result = []
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            total += n
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """以 bucket 上界估計分位數（無資料時為 0）"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound if not math.isinf(bound) else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    執行緒安全的指標集合
+
+    Example:
+        >>> metrics = MetricsRegistry(prefix="md2word")
+        >>> metrics.inc("requests_total", {"route": "/render"})
+        >>> metrics.observe("request_duration_seconds", 0.12, {"route": "/render"})
+        >>> text = metrics.to_prometheus()
+    """
+
+    def __init__(self, prefix: str = "md2word", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def counter_value(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    # ------------------------------------------------------------- export
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(store):
+                    full = f"{self.prefix}_{name}"
+                    if name in self._help:
+                        lines.append(f"# HELP {full} {self._help[name]}")
+                    lines.append(f"# TYPE {full} {kind}")
+                    for key, value in sorted(store[name].items()):
+                        lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                full = f"{self.prefix}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    for bound, total in hist.cumulative():
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{full}_bucket{_format_labels(key, le)} {total}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {_format_value(hist.sum)}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        def series_list(store):
+            return [{"labels": dict(key), "value": value} for key, value in sorted(store.items())]
+
+        with self._lock:
+            return {
+                "counters": {name: series_list(s) for name, s in sorted(self._counters.items())},
+                "gauges": {name: series_list(s) for name, s in sorted(self._gauges.items())},
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": hist.count,
+                            "sum": round(hist.sum, 6),
+                            "p50": hist.quantile(0.5),
+                            "p95": hist.quantile(0.95),
+                            "p99": hist.quantile(0.99),
+                            "buckets": [
+                                [None if math.isinf(bound) else bound, total]
+                                for bound, total in hist.cumulative()
+                            ],
+                        }
+                        for key, hist in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+
+# ----------------------------------------------------------------- render metrics
+
+
+# 批次、daemon、HTTP 服務共用的渲染指標
+RENDER_METRICS: Dict[str, str] = {
+    "files_rendered_total": "Files rendered successfully by output format",
+    "failures_total": "Failed files by exception type",
+    "input_bytes_total": "Markdown bytes read",
+    "output_bytes_total": "Rendered document bytes written",
+    "images_embedded_total": "Images referenced by rendered documents",
+    "cache_hits_total": "Cache hits by cache",
+    "cache_misses_total": "Cache misses by cache",
+    "cache_hit_ratio": "Cache hit ratio by cache (hits / lookups so far)",
+    "stage_duration_seconds": "Time spent in each pipeline stage per file",
+}
+
+
+def describe_render_metrics(registry: MetricsRegistry) -> MetricsRegistry:
+    for name, help_text in RENDER_METRICS.items():
+        registry.describe(name, help_text)
+    return registry
+
+
+def record_cache(registry: MetricsRegistry, cache: str, hits: int = 0, misses: int = 0) -> None:
+    """累計快取命中 / 未命中，並更新 ``cache_hit_ratio``"""
+    labels = {"cache": cache}
+    if hits:
+        registry.inc("cache_hits_total", labels, hits)
+    if misses:
+        registry.inc("cache_misses_total", labels, misses)
+    total_hits = registry.counter_value("cache_hits_total", labels)
+    lookups = total_hits + registry.counter_value("cache_misses_total", labels)
+    if lookups:
+        registry.set_gauge("cache_hit_ratio", total_hits / lookups, labels)
+
+
+# ----------------------------------------------------------------- file export
+
+METRICS_FILE_MODE = 0o644
+
+
+def write_metrics(registry: MetricsRegistry, path: str) -> None:
+    """
+    寫出指標檔（原子取代，collector 不會讀到寫到一半的檔案）
+
+    副檔名為 ``.json`` 時寫成 JSON（``to_dict``），其餘為 Prometheus text 格式。
+    權限固定為 0644：node-exporter 的 textfile collector 通常以其他使用者執行。
+    """
+    from .file_utils import FileUtils
+
+    if path.lower().endswith(".json"):
+        text = json.dumps(registry.to_dict(), ensure_ascii=False, indent=2) + "\n"
+    else:
+        text = registry.to_prometheus()
+    FileUtils.atomic_write_bytes(path, text.encode("utf-8"), mode=METRICS_FILE_MODE)
+
+
+class MetricsFileWriter:
+    """
+    定期寫出指標檔；結束時再寫一次最終值
+
+    Args:
+        registry: 要輸出的指標
+        path: 輸出路徑（``.json`` 或 Prometheus textfile，例如 ``md2word.prom``）
+        interval: 寫出間隔（秒）；``None`` 或 ``0`` 時只在結束時寫出
+        before_write: 每次寫出前呼叫，可用來更新由其他物件統計的 gauge
+
+    Example:
+        >>> with MetricsFileWriter(metrics, "md2word.prom", interval=15):
+        ...     pipeline.run(jobs)
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: Optional[float] = 15.0,
+                 before_write: Optional[Callable[[MetricsRegistry], None]] = None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval or None
+        self.before_write = before_write
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    def write(self) -> None:
+        with self._write_lock:
+            if self.before_write is not None:
+                self.before_write(self.registry)
+            write_metrics(self.registry, self.path)
+
+    def start(self) -> "MetricsFileWriter":
+        if self.interval is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="metrics-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                # 暫時無法寫入（磁碟滿、目錄被移除）不影響渲染；下一輪再試
+                pass
+
+    def __enter__(self) -> "MetricsFileWriter":
+        return self.start()
+
+    def __exit__(self, *exc) -> bool:
+        self.stop()
+        return False
@@ -0,0 +1,282 @@
+"""
+內容定址的輸出快取
+
+同一組（解析後資料、樣板內容、圖片內容、renderer 設定）必定產生相同的文件，
+``OutputCache`` 以這組內容的 hash 為 key 保存完成的 docx / xlsx：
+
+    <cache_dir>/objects/ab/abcdef...0123.docx
+
+- 命中時以單次複製（或 ``link=True`` 時以 hardlink）寫出，不再渲染
+- 總大小超過上限時依最近使用時間（物件檔的 mtime，命中時更新）淘汰最舊者
+- 寫入時先寫暫存檔再 ``os.replace``，多個行程共用同一個快取目錄也安全
+
+快取目錄預設為 ``$MD2WORD_CACHE_DIR``，否則為 ``$XDG_CACHE_HOME/md2word/outputs``
+（未設定時為 ``~/.cache/md2word/outputs``）。
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_utils import FileUtils
+from .fingerprint import FileDigests, collect_image_paths, data_digest, settings_digest
+
+
+CACHE_ENV_VAR = "MD2WORD_CACHE_DIR"
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?", re.IGNORECASE)
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def default_cache_dir() -> str:
+    env = os.environ.get(CACHE_ENV_VAR)
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "md2word", "outputs")
+
+
+def parse_size(text: str) -> int:
+    """``"500M"`` / ``"2GiB"`` / ``"1048576"`` → bytes"""
+    match = _SIZE_PATTERN.fullmatch(text.strip())
+    if match is None:
+        raise ValueError(f"無法解析的大小: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.upper()])
+
+
+def format_size(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if nbytes < 1024 or unit == "GiB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GiB"
+
+
+class OutputCache:
+    """
+    內容定址的渲染結果快取
+
+    Args:
+        cache_dir: 快取目錄（預設 ``default_cache_dir()``）
+        max_bytes: 總大小上限，超過時淘汰最久未使用者
+        link: 命中時以 hardlink 寫出（同一檔案系統時）；預設為複製，
+            避免之後就地修改輸出檔時連帶改到快取內容
+
+    Example:
+        >>> cache = OutputCache()
+        >>> key = cache.key_for(data, "template.docx", {"format": "docx"})
+        >>> if not cache.fetch(key, "out.docx", "docx"):
+        ...     render(...)
+        ...     cache.store(key, "out.docx", "docx")
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 link: bool = False, digests: Optional[FileDigests] = None):
+        self.cache_dir = Path(cache_dir or default_cache_dir())
+        self.objects_dir = self.cache_dir / "objects"
+        self.max_bytes = max_bytes
+        self.link = link
+        self.digests = digests or FileDigests()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ keys
+
+    def key_for(self, data: Dict[str, Any], template_path: str,
+                settings: Optional[Dict[str, Any]] = None) -> str:
+        """（資料、樣板內容、圖片內容、設定）→ 快取 key"""
+        digest = hashlib.sha256()
+        digest.update(data_digest(data).encode("ascii"))
+        digest.update(b"\0")
+        digest.update((self.digests.digest(template_path) or "missing").encode("ascii"))
+        for image_path in collect_image_paths(data):
+            digest.update(b"\0")
+            digest.update((self.digests.digest(image_path) or "missing").encode("ascii"))
+        digest.update(b"\0")
+        digest.update(settings_digest(settings).encode("ascii"))
+        return digest.hexdigest()
+
+    def _object_path(self, key: str, fmt: str) -> Path:
+        return self.objects_dir / key[:2] / f"{key}.{fmt}"
+
+    # ---------------------------------------------------------------- access
+
+    def fetch(self, key: str, output_path: str, fmt: str) -> bool:
+        """命中時把快取內容寫到 ``output_path`` 並回傳 True"""
+        obj = self._object_path(key, fmt)
+        if not obj.exists():
+            with self._lock:
+                self.misses += 1
+            return False
+
+        output = Path(output_path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._materialize(obj, output)
+        except FileNotFoundError:
+            # 與其他行程的淘汰競爭：視為未命中
+            with self._lock:
+                self.misses += 1
+            return False
+        try:
+            os.utime(obj)  # LRU：最近使用時間
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def _materialize(self, obj: Path, output: Path) -> None:
+        # 暫存檔名以 mkstemp 取得：daemon 的多個 thread 可能同時寫出同一個輸出
+        if self.link:
+            fd, tmp = tempfile.mkstemp(dir=str(output.parent), prefix=f".{output.name}.")
+            os.close(fd)
+            try:
+                os.unlink(tmp)
+                os.link(obj, tmp)
+                os.replace(tmp, output)
+                return
+            except FileNotFoundError:
+                _discard(tmp)
+                raise
+            except OSError:
+                _discard(tmp)  # 跨檔案系統等情況改為複製
+        with FileUtils.atomic_output(str(output)) as tmp:
+            shutil.copyfile(obj, tmp)
+
+    def read(self, key: str, fmt: str) -> Optional[bytes]:
+        """命中時回傳快取的文件內容（批次管線由 writer 寫出），未命中回傳 None"""
+        obj = self._object_path(key, fmt)
+        try:
+            data = obj.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(obj)  # LRU：最近使用時間
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def store(self, key: str, source_path: str, fmt: str) -> None:
+        """把已寫出的輸出檔存入快取"""
+        self._install(key, fmt, lambda tmp: shutil.copyfile(source_path, tmp))
+
+    def store_bytes(self, key: str, data: bytes, fmt: str) -> None:
+        """把渲染好的文件內容存入快取"""
+        self._install(key, fmt, lambda tmp: Path(tmp).write_bytes(data))
+
+    def _install(self, key: str, fmt: str, fill) -> None:
+        obj = self._object_path(key, fmt)
+        if obj.exists():
+            return
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(obj.parent), prefix=".tmp-")
+        os.close(fd)
+        try:
+            fill(tmp)
+            os.replace(tmp, obj)
+        except BaseException:
+            _discard(tmp)
+            raise
+        size = obj.stat().st_size
+        with self._lock:
+            self.stores += 1
+            if self._size is not None:
+                self._size += size
+        self._evict_if_needed()
+
+    # -------------------------------------------------------------- eviction
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """``[(最近使用時間, 大小, 路徑), ...]``"""
+        entries = []
+        if not self.objects_dir.exists():
+            return entries
+        for bucket in os.scandir(self.objects_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            size = self._size
+        if size is not None and size <= self.max_bytes:
+            return
+        self.prune(self.max_bytes)
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """淘汰最久未使用的物件直到總大小不超過 ``max_bytes``；回傳淘汰數量"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._size = total
+            self.evictions += removed
+        return removed
+
+    def clear(self) -> int:
+        return self.prune(0)
+
+    # ----------------------------------------------------------------- stats
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        with self._lock:
+            self._size = total
+            result = {
+                "cache_dir": str(self.cache_dir),
+                "entries": len(entries),
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+        if entries:
+            times = [mtime for mtime, _, _ in entries]
+            result["oldest_access"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(min(times)))
+            result["newest_access"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(max(times)))
+        return result
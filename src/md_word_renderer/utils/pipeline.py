@@ -0,0 +1,613 @@
+"""
+管線式批次處理
+
+把「讀檔 → 解析 → 渲染 → 寫檔」拆成各自獨立的階段，以有界佇列串接：
+
+    reader threads ──(read_q)──> render drivers ──> process pool ──(write_q)──> writer threads
+
+- 讀 Markdown 與寫輸出檔在 I/O threads 執行，慢速磁碟 / 網路磁碟的等待與 CPU 工作重疊
+- 解析與渲染在 worker 行程執行（``workers=0`` 時在本行程內執行）
+- 佇列有上限：下游較慢時上游會暫停，記憶體中最多只保留固定數量的檔案內容
+- 每個階段記錄處理數、忙碌時間與位元組數（``StageStats``），用來找出瓶頸
+- 預設依預估成本由大到小派工（``CostModel``），避免最後剩一個大檔讓其他 worker 閒置
+- 提供 ``output_cache`` 時 worker 在解析後查詢輸出快取，命中則不渲染，未命中則渲染後存入
+- 每個 driver 擁有自己的 worker 行程；處理 N 個檔案或 RSS 超過上限時換一個新行程，
+  長時間批次的記憶體不會持續累積（DocxTemplate、lxml、Pillow、openpyxl 的殘留）
+- worker 行程以 forkserver（不支援時為 spawn）啟動：管線的 I/O threads、GUI 的 Tk thread
+  執行中時 fork 會複製其他 thread 持有的鎖（logging、日誌、import lock），子行程可能死結
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cost_model import CostModel, JobCost
+from .file_utils import FileUtils
+from .memory import current_rss, peak_rss, reset_peak_rss
+from .memprofile import MemoryProfile, MemoryReport
+from .metrics import MetricsRegistry, record_cache
+from .profiling import PROFILE_DIR_NAME, assign_profile_paths, profile_slow
+from .timing import Timings, collecting, span
+
+
+STAGES = ("read", "parse", "render", "write")
+SCHEDULES = ("cost", "input")
+
+_DONE = object()
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """
+    單一階段的統計
+
+    Attributes:
+        concurrency: 此階段可同時處理的數量（threads / worker 行程數）
+        busy: 累計處理時間（秒，各 thread / 行程加總）
+    """
+
+    __slots__ = ("name", "concurrency", "items", "busy", "bytes")
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.items = 0
+        self.busy = 0.0
+        self.bytes = 0
+
+    def add(self, seconds: float, nbytes: int = 0) -> None:
+        self.items += 1
+        self.busy += seconds
+        self.bytes += nbytes
+
+    def throughput(self) -> float:
+        """此階段全力運轉時可達到的處理速度（檔案 / 秒）"""
+        if self.busy <= 0:
+            return 0.0
+        return self.items * self.concurrency / self.busy
+
+    def utilization(self, wall: float) -> float:
+        """忙碌時間佔（牆鐘時間 × 並行數）的比例；最高者即為瓶頸"""
+        if wall <= 0:
+            return 0.0
+        return min(self.busy / (wall * self.concurrency), 1.0)
+
+    def to_dict(self, wall: float) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "concurrency": self.concurrency,
+            "items": self.items,
+            "busy_s": round(self.busy, 4),
+            "bytes": self.bytes,
+            "throughput_per_s": round(self.throughput(), 2),
+            "utilization": round(self.utilization(wall), 3),
+        }
+
+
+class PipelineJob:
+    """一個輸入檔 → 一個輸出檔"""
+
+    __slots__ = ("index", "input_path", "template_path", "output_path", "fmt",
+                 "text", "body", "error", "fields", "validation_errors", "images",
+                 "cost", "actual_s", "peak_rss", "profile_path", "profile",
+                 "input_file", "started_ns")
+
+    def __init__(self, index: int, input_path: str, template_path: str,
+                 output_path: str, fmt: str = "auto"):
+        self.index = index
+        self.input_path = input_path
+        self.template_path = template_path
+        self.output_path = output_path
+        self.fmt = fmt
+        self.text: Optional[str] = None
+        self.body: Optional[bytes] = None
+        self.error: Optional[str] = None
+        self.fields = 0
+        self.validation_errors = 0
+        self.images: List[str] = []
+        self.cost: Optional[JobCost] = None
+        self.actual_s: Optional[float] = None
+        self.peak_rss: Optional[int] = None
+        self.profile_path: Optional[str] = None
+        self.profile: Optional[str] = None
+        # 讀檔前的 (mtime_ns, 大小) 與實際讀到內容的 SHA-1：增量建置記錄的是輸出所根據的內容，
+        # 而非渲染結束後的檔案（渲染期間被修改時兩者不同）
+        self.input_file: Optional[List[Any]] = None
+        self.started_ns: Optional[int] = None
+
+
+# ----------------------------------------------------------------- worker side
+
+
+def worker_context():
+    """worker 行程的啟動方式：forkserver（可用時）或 spawn，不直接 fork 多執行緒的行程"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _new_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=1, mp_context=worker_context())
+
+
+_WORKER_CACHE = None
+_WORKER_OUTPUT_CACHES: Dict[Tuple[str, int, bool], Any] = {}
+
+
+def _worker_output_cache(config: Optional[Tuple[str, int, bool]]):
+    """依（目錄、大小上限、hardlink）取得本行程共用的 ``OutputCache``"""
+    if config is None:
+        return None
+    cache = _WORKER_OUTPUT_CACHES.get(config)
+    if cache is None:
+        from .output_cache import OutputCache
+
+        cache = _WORKER_OUTPUT_CACHES[config] = OutputCache(
+            cache_dir=config[0], max_bytes=config[1], link=config[2]
+        )
+    return cache
+
+
+def _render_in_worker(input_path: str, text: str, template_path: str, fmt: str,
+                      validate: bool, timed: bool = False,
+                      slow_threshold: Optional[float] = None,
+                      profile_path: Optional[str] = None,
+                      memprofile: bool = False,
+                      output_cache: Optional[Tuple[str, int, bool]] = None) -> Dict[str, Any]:
+    """
+    解析 + 渲染（worker 行程或本行程內）；樣板內容在每個行程內快取
+
+    ``output_cache`` 為輸出快取的（目錄、大小上限、hardlink）；命中時回傳快取的內容，
+    ``output_cache_hit`` 為 True（未使用快取時為 None）。
+
+    ``timed`` 為 True 時收集各步驟耗時，以 ``timings``（``[(步驟, 秒), ...]``）回傳。
+    ``slow_threshold`` 有值時在 cProfile 下執行，超過門檻才寫出 ``profile_path``（回傳於 ``profile``）。
+    ``memprofile`` 為 True 時以 tracemalloc 剖析各步驟，結果回傳於 ``memprofile``。
+    """
+    timings = Timings() if timed else None
+    mem = MemoryProfile() if memprofile else None
+    with profile_slow(slow_threshold, profile_path) as prof, collecting(timings), \
+            (mem if mem is not None else nullcontext()):
+        result = _render_job(input_path, text, template_path, fmt, validate, output_cache)
+    result["memprofile"] = mem.report() if mem is not None else None
+    if mem is not None:
+        # 剖析時每個步驟都會把峰值歸零，單檔峰值改取各步驟峰值的最大者
+        result["peak_rss"] = max(result["peak_rss"] or 0, mem.peak_rss or 0) or None
+    result["timings"] = timings.records() if timings is not None else None
+    result["profile"] = prof.kept
+    return result
+
+
+def _render_job(input_path: str, text: str, template_path: str, fmt: str,
+                validate: bool,
+                output_cache: Optional[Tuple[str, int, bool]] = None) -> Dict[str, Any]:
+    global _WORKER_CACHE
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer, detect_format
+    from .fingerprint import collect_image_paths
+    from .template_cache import TemplateCache
+
+    if _WORKER_CACHE is None:
+        _WORKER_CACHE = TemplateCache()
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    data = MarkdownParser().parse_content(text, source_dir=Path(input_path).resolve().parent)
+    parsed = time.perf_counter()
+
+    validation_errors = 0
+    if validate:
+        from ..validator.schema_validator import render_validator
+
+        with span("validate"):
+            is_valid, errors = render_validator().validate(data)
+        validation_errors = 0 if is_valid else len(errors)
+
+    # key 與 process_one 相同（設定為解析後的格式），render --cache 與批次共用快取內容
+    cache = _worker_output_cache(output_cache)
+    cache_key = body = None
+    if cache is not None:
+        with span("cache"):
+            resolved = detect_format(template_path) if fmt == "auto" else fmt
+            cache_key = cache.key_for(data, template_path, {"format": resolved})
+            body = cache.read(cache_key, resolved)
+
+    template_cache_hit = None
+    if body is None:
+        renderer = build_renderer(template_path=template_path, format_hint=fmt)
+        hits = _WORKER_CACHE.hits
+        renderer.load_template(template_path, source=_WORKER_CACHE.get_bytes(template_path))
+        template_cache_hit = _WORKER_CACHE.hits > hits
+        renderer.render(data)
+        body = renderer.to_bytes()
+        if cache is not None:
+            with span("cache"):
+                cache.store_bytes(cache_key, body, resolved)
+    return {
+        "body": body,
+        "fields": len([k for k in data.keys() if not k.startswith("#")]),
+        "validation_errors": validation_errors,
+        "images": collect_image_paths(data),
+        "parse_s": parsed - start,
+        "render_s": time.perf_counter() - parsed,
+        "peak_rss": peak_rss(),
+        "rss": current_rss(),
+        "template_cache_hit": template_cache_hit,
+        "output_cache_hit": None if cache is None else template_cache_hit is None,
+    }
+
+
+# ----------------------------------------------------------------- pipeline
+
+
+class BatchPipeline:
+    """
+    讀檔 / 解析 / 渲染 / 寫檔重疊執行的批次管線
+
+    Args:
+        workers: 解析 + 渲染的 worker 行程數；``0`` 表示在本行程內執行（仍與 I/O 重疊）
+        io_threads: 讀檔與寫檔各自的 thread 數
+        queue_size: 各階段之間佇列的上限（預設為 ``2 × workers``）
+        validate: 是否執行資料驗證（只統計問題數，不中斷）
+        continue_on_error: 為 False 時遇到第一個錯誤即停止讀入新檔案
+        on_result: 每個檔案完成（成功或失敗）時呼叫，參數為 ``PipelineJob``；
+            於 writer thread 內執行
+        on_start: 每個檔案開始解析 / 渲染前呼叫（於 driver thread 內），可用來記錄執行中的工作
+        schedule: ``cost``（預設）依預估成本由大到小派工；``input`` 依輸入順序
+        cost_model: 成本估計（預設 ``CostModel()``）
+        max_tasks_per_worker: 每個 worker 行程處理幾個檔案後換新（``None`` 表示不限）
+        max_worker_rss: worker 行程處理完一個檔案後 RSS 超過此值（bytes）即換新
+        timings: 提供時收集各步驟耗時（讀檔、解析、載入樣板、圖片、渲染、存檔、寫檔），
+            依輸入檔彙整
+        profile_slow: 以 cProfile 執行每個檔案，解析 + 渲染超過此秒數者保留 ``.pstats``
+        profile_dir: ``.pstats`` 的存放目錄（預設 ``.md2word-profiles``），檔名取自輸入檔
+        memprofile: 提供時以 tracemalloc 剖析每個檔案各步驟的記憶體配置，依輸入檔彙整
+        metrics: 提供時累計渲染指標（檔案數、依例外類型的失敗數、讀寫位元組、圖片數、
+            worker 樣板快取命中率、各步驟耗時 histogram），見 ``metrics.RENDER_METRICS``
+        output_cache: 輸出快取（``OutputCache``）；worker 以同一個快取目錄查詢 / 存入，
+            命中的檔案不渲染
+
+    Example:
+        >>> pipeline = BatchPipeline(workers=4)
+        >>> result = pipeline.run([("a.md", "tpl.docx", "out/a.docx")])
+        >>> print(pipeline.format_stats(result["stages"], result["wall_s"]))
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        io_threads: int = 2,
+        queue_size: Optional[int] = None,
+        validate: bool = False,
+        continue_on_error: bool = True,
+        on_result: Optional[Callable[[PipelineJob], None]] = None,
+        schedule: str = "cost",
+        cost_model: Optional[CostModel] = None,
+        on_start: Optional[Callable[[PipelineJob], None]] = None,
+        max_tasks_per_worker: Optional[int] = None,
+        max_worker_rss: Optional[int] = None,
+        timings: Optional[Timings] = None,
+        profile_slow: Optional[float] = None,
+        profile_dir: Optional[str] = None,
+        memprofile: Optional[MemoryReport] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        output_cache=None,
+    ):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"未知的排程方式: {schedule}")
+        self.workers = (os.cpu_count() or 1) if workers is None else max(workers, 0)
+        self.io_threads = max(io_threads, 1)
+        self.queue_size = queue_size or max(2 * max(self.workers, 1), 2)
+        self.validate = validate
+        self.continue_on_error = continue_on_error
+        self.on_result = on_result
+        self.on_start = on_start
+        self.max_tasks_per_worker = max_tasks_per_worker or None
+        self.max_worker_rss = max_worker_rss or None
+        self.timings = timings
+        self.profile_slow = profile_slow
+        self.profile_dir = profile_dir or PROFILE_DIR_NAME
+        self.memprofile = memprofile
+        self.metrics = metrics
+        self.output_cache = output_cache
+        self.schedule = schedule
+        self.cost_model = cost_model or CostModel()
+
+    def run(self, jobs: Iterable[Tuple[str, str, str]], fmt: str = "auto") -> Dict[str, Any]:
+        """
+        執行批次
+
+        Args:
+            jobs: ``(input_path, template_path, output_path)``
+            fmt: 格式（``auto`` 依樣板副檔名）
+
+        Returns:
+            dict: ``success`` / ``failed``（依輸入順序）、``success_count`` / ``failed_count`` /
+            ``total``、``stages``（``StageStats`` 列表）、``wall_s``、``cost``
+            （預測與實際時間的比較，見 ``CostModel.summarize``）、``memory``
+            （單檔峰值 RSS 與 worker 換新次數）、``profiles``（``profile_slow`` 保留的紀錄）、
+            ``output_cache``（輸出快取的 ``hits`` / ``misses``；未使用快取時為 None）
+        """
+        pending = [PipelineJob(i, inp, tpl, out, fmt) for i, (inp, tpl, out) in enumerate(jobs)]
+        if self.profile_slow is not None:
+            profile_paths = assign_profile_paths((j.input_path for j in pending), self.profile_dir)
+            for job in pending:
+                job.profile_path = profile_paths[job.input_path]
+                # 上次留下的同名紀錄先移除，目錄內只會有這次的慢檔案
+                Path(job.profile_path).unlink(missing_ok=True)
+        order = pending
+        if self.schedule == "cost":
+            for job in pending:
+                job.cost = self.cost_model.estimate(job.input_path)
+            # 最長者優先；同成本維持輸入順序
+            order = sorted(pending, key=lambda j: (-j.cost.predicted, j.index))
+        drivers = max(self.workers, 1)
+        stats = {
+            "read": StageStats("read", self.io_threads),
+            "parse": StageStats("parse", drivers),
+            "render": StageStats("render", drivers),
+            "write": StageStats("write", self.io_threads),
+        }
+        stats_lock = threading.Lock()
+        stop = threading.Event()
+        feed_lock = threading.Lock()
+        feed = iter(order)
+        read_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        write_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        finished: List[PipelineJob] = []
+        cache_config = None
+        if self.output_cache is not None:
+            cache = self.output_cache
+            cache_config = (str(cache.cache_dir.resolve()), cache.max_bytes, cache.link)
+        cache_counts = {"hits": 0, "misses": 0}
+
+        def record(stage: str, seconds: float, nbytes: int = 0, job: Optional[PipelineJob] = None) -> None:
+            with stats_lock:
+                stats[stage].add(seconds, nbytes)
+            if self.timings is not None and job is not None:
+                self.timings.add(stage, seconds, job.input_path)
+            if self.metrics is not None and job is not None:
+                self.metrics.observe("stage_duration_seconds", seconds, {"stage": stage})
+
+        def fail(job: PipelineJob, exc: BaseException, kind: Optional[str] = None) -> None:
+            if self.metrics is not None:
+                self.metrics.inc("failures_total", {"exception": kind or type(exc).__name__})
+            job.error = str(exc)
+            job.text = job.body = None
+            if not self.continue_on_error:
+                stop.set()
+
+        def reader() -> None:
+            while not stop.is_set():
+                with feed_lock:
+                    job = next(feed, None)
+                if job is None:
+                    break
+                start = time.perf_counter()
+                try:
+                    job.started_ns = time.time_ns()
+                    st = os.stat(job.input_path)
+                    raw = Path(job.input_path).read_bytes()
+                    job.input_file = [st.st_mtime_ns, st.st_size, hashlib.sha1(raw).hexdigest()]
+                    # 與 read_text 相同的換行轉換
+                    job.text = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+                    record("read", time.perf_counter() - start, len(job.text), job)
+                    if self.metrics is not None:
+                        self.metrics.inc("input_bytes_total", value=len(raw))
+                    read_q.put(job)
+                except Exception as exc:
+                    fail(job, exc)
+                    write_q.put(job)
+
+        recycled = [0]
+
+        # 第一批 executor 在啟動任何 thread 之前建立；換新時於 driver thread 內建立
+        executors: List[Optional[ProcessPoolExecutor]] = [
+            _new_executor() if self.workers else None for _ in range(drivers)
+        ]
+
+        def driver(index: int) -> None:
+            # 每個 driver 一個專屬的 worker 行程，才能個別換新
+            executor = executors[index]
+            tasks = 0
+            try:
+                while True:
+                    job = read_q.get()
+                    if job is _DONE:
+                        break
+                    if stop.is_set():
+                        # 前面的檔案已失敗且不繼續：已讀入但尚未渲染的檔案直接捨棄
+                        job.text = None
+                        continue
+                    if self.workers and executor is None:
+                        executor = _new_executor()
+                        tasks = 0
+                    result = render(job, executor)
+                    if executor is None:
+                        continue
+                    tasks += 1
+                    rss = result.get("rss") if result else None
+                    broken = result is None
+                    if (broken
+                            or (self.max_tasks_per_worker and tasks >= self.max_tasks_per_worker)
+                            or (self.max_worker_rss and rss and rss > self.max_worker_rss)):
+                        executor.shutdown(wait=True)
+                        executor = None
+                        if not broken:
+                            with stats_lock:
+                                recycled[0] += 1
+            finally:
+                if executor is not None:
+                    executor.shutdown(wait=True)
+
+        def render(job: PipelineJob, executor: Optional[ProcessPoolExecutor]) -> Optional[Dict[str, Any]]:
+            """渲染一個檔案並送往 writer；worker 行程異常結束時回傳 None"""
+            if self.on_start is not None:
+                self.on_start(job)
+            result: Optional[Dict[str, Any]] = {}
+            # 指標的各步驟耗時取自 worker 的 timing span
+            timed = self.timings is not None or self.metrics is not None
+            try:
+                args = (job.input_path, job.text, job.template_path, job.fmt, self.validate,
+                        timed, self.profile_slow, job.profile_path,
+                        self.memprofile is not None, cache_config)
+                if executor is not None:
+                    result = executor.submit(_render_in_worker, *args).result()
+                else:
+                    result = _render_in_worker(*args)
+                job.text = None
+                job.body = result["body"]
+                job.fields = result["fields"]
+                job.validation_errors = result["validation_errors"]
+                job.images = result["images"]
+                job.actual_s = result["parse_s"] + result["render_s"]
+                job.peak_rss = result["peak_rss"]
+                job.profile = result["profile"]
+                if self.memprofile is not None:
+                    self.memprofile.add(job.input_path, result["memprofile"])
+                if self.timings is not None:
+                    self.timings.merge(result["timings"], job.input_path)
+                if self.metrics is not None:
+                    for stage, seconds in result["timings"]:
+                        self.metrics.observe("stage_duration_seconds", seconds, {"stage": stage})
+                    self.metrics.inc("images_embedded_total", value=len(job.images))
+                    hit = result["template_cache_hit"]
+                    if hit is not None:
+                        record_cache(self.metrics, "template", hits=int(hit), misses=int(not hit))
+                output_hit = result["output_cache_hit"]
+                if output_hit is not None:
+                    with stats_lock:
+                        cache_counts["hits" if output_hit else "misses"] += 1
+                    if self.metrics is not None:
+                        record_cache(self.metrics, "output", hits=int(output_hit), misses=int(not output_hit))
+                record("parse", result["parse_s"])
+                record("render", result["render_s"], len(job.body))
+            except BrokenProcessPool:
+                # 例如被 OOM killer 終止：此檔案失敗，driver 換一個新的 worker 行程
+                fail(job, RuntimeError("worker 行程異常結束（可能是記憶體不足）"), "BrokenProcessPool")
+                result = None
+            except Exception as exc:
+                fail(job, exc)
+            write_q.put(job)
+            return result
+
+        def writer() -> None:
+            while True:
+                job = write_q.get()
+                if job is _DONE:
+                    break
+                if job.body is not None:
+                    start = time.perf_counter()
+                    try:
+                        FileUtils.atomic_write_bytes(job.output_path, job.body)
+                        record("write", time.perf_counter() - start, len(job.body), job)
+                        if self.metrics is not None:
+                            fmt = Path(job.output_path).suffix.lstrip(".").lower() or job.fmt
+                            self.metrics.inc("files_rendered_total", {"format": fmt})
+                            self.metrics.inc("output_bytes_total", value=len(job.body))
+                    except Exception as exc:
+                        fail(job, exc)
+                    job.body = None
+                with stats_lock:
+                    finished.append(job)
+                if self.on_result is not None:
+                    # callback 出錯不能讓 writer 停下：write_q 有上限，沒人取出時 driver 會永遠等待
+                    try:
+                        self.on_result(job)
+                    except Exception:
+                        logger.exception("on_result callback 失敗：%s", job.input_path)
+
+        started = time.perf_counter()
+        readers = [threading.Thread(target=reader, daemon=True) for _ in range(self.io_threads)]
+        driver_threads = [threading.Thread(target=driver, args=(i,), daemon=True) for i in range(drivers)]
+        writers = [threading.Thread(target=writer, daemon=True) for _ in range(self.io_threads)]
+        for t in readers + driver_threads + writers:
+            t.start()
+        for t in readers:
+            t.join()
+        for _ in driver_threads:
+            read_q.put(_DONE)
+        for t in driver_threads:
+            t.join()
+        for _ in writers:
+            write_q.put(_DONE)
+        for t in writers:
+            t.join()
+        wall = time.perf_counter() - started
+
+        finished.sort(key=lambda j: j.index)
+        success = [
+            {"input": j.input_path, "output": j.output_path, "fields": j.fields,
+             "validation_errors": j.validation_errors, "images": j.images,
+             "predicted_s": j.cost.predicted if j.cost is not None else None,
+             "actual_s": j.actual_s, "peak_rss": j.peak_rss}
+            for j in finished if j.error is None
+        ]
+        failed = [{"input": j.input_path, "error": j.error} for j in finished if j.error is not None]
+        return {
+            "success": success,
+            "failed": failed,
+            "total": len(pending),
+            "success_count": len(success),
+            "failed_count": len(failed),
+            "stages": [stats[name] for name in STAGES],
+            "wall_s": wall,
+            "cost": CostModel.summarize(
+                (j.input_path, j.cost, j.actual_s) for j in finished if j.error is None
+            ),
+            "memory": _memory_summary(finished, recycled[0]),
+            "profiles": [
+                {"input": j.input_path, "path": j.profile, "actual_s": j.actual_s}
+                for j in finished if j.profile is not None
+            ],
+            "output_cache": cache_counts if cache_config is not None else None,
+        }
+
+    @staticmethod
+    def format_memory(memory: Dict[str, Any]) -> str:
+        """單檔峰值 RSS 與 worker 換新次數的文字摘要"""
+        from .output_cache import format_size
+
+        lines = []
+        if memory.get("max_peak_rss"):
+            lines.append(
+                f"   單檔峰值 RSS：最高 {format_size(memory['max_peak_rss'])}"
+                f"（{Path(memory['max_peak_input']).name}），"
+                f"中位數 {format_size(memory['median_peak_rss'])}"
+            )
+        lines.append(f"   worker 行程換新：{memory['recycled']} 次")
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_stats(stages: List[StageStats], wall: float) -> str:
+        """各階段吞吐量的文字摘要，並標出使用率最高（瓶頸）的階段"""
+        busiest = max(stages, key=lambda s: s.utilization(wall), default=None)
+        lines = []
+        for s in stages:
+            marker = "  ← 瓶頸" if s is busiest and s.items else ""
+            lines.append(
+                f"   {s.name:<7} {s.items:>5} 個  忙碌 {s.busy:7.2f}s  "
+                f"×{s.concurrency:<2} 上限 {s.throughput():8.1f} 個/s  "
+                f"使用率 {s.utilization(wall) * 100:5.1f}%{marker}"
+            )
+        return "\n".join(lines)
+
+
+def _memory_summary(finished: List[PipelineJob], recycled: int) -> Dict[str, Any]:
+    peaks = sorted((j.peak_rss, j.input_path) for j in finished if j.peak_rss)
+    summary: Dict[str, Any] = {"recycled": recycled, "max_peak_rss": None,
+                               "max_peak_input": None, "median_peak_rss": None}
+    if peaks:
+        summary["max_peak_rss"], summary["max_peak_input"] = peaks[-1]
+        summary["median_peak_rss"] = peaks[len(peaks) // 2][0]
+    return summary
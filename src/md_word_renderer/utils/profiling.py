@@ -0,0 +1,197 @@
+"""
+慢檔案的 cProfile 紀錄（``--profile-slow``）
+
+每個工作都在 cProfile 下執行，只有耗時超過門檻者才把結果存成 ``<輸入檔名>.pstats``；
+之後以 ``md2word profile-report`` 彙整所有紀錄，列出最耗時的函式：
+
+    md2word batch in/ tpl.docx out/ --profile-slow 2
+    md2word profile-report out/.md2word-profiles/
+
+- 標準函式庫沒有取樣式 profiler，這裡用 cProfile（C 實作，額外成本約一到兩成），
+  只包住解析與渲染，不含排隊與讀寫檔
+- 同一行程內同時只能有一個 profiler（Python 3.12+ 為整個行程）；無法啟用時該工作照常執行、不做紀錄
+- ``.pstats`` 以原子方式寫入，可直接用 ``python -m pstats`` 或 snakeviz 開啟
+"""
+
+import cProfile
+import os
+import sysconfig
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+PROFILE_DIR_NAME = ".md2word-profiles"
+PROFILE_SUFFIX = ".pstats"
+SORT_KEYS = ("tottime", "cumtime", "calls")
+
+
+class profile_slow:
+    """
+    以 cProfile 執行一段程式，耗時達到 ``threshold`` 秒才保留紀錄
+
+    Args:
+        threshold: 門檻（秒）；``None`` 時不做任何事
+        path: 紀錄的輸出路徑
+
+    Example:
+        >>> with profile_slow(2.0, "out/.md2word-profiles/a.pstats") as prof:
+        ...     process_one("a.md", "tpl.docx", "out/a.docx")
+        >>> prof.kept   # 有保留時為路徑，否則為 None
+    """
+
+    def __init__(self, threshold: Optional[float], path: Optional[str]):
+        self.threshold = threshold
+        self.path = path
+        self.elapsed: Optional[float] = None
+        self.kept: Optional[str] = None
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> "profile_slow":
+        if self.threshold is not None and self.path is not None:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._profiler = profiler
+            except ValueError:
+                # 已有其他 profiler 在執行（例如 -j 0 時另一個 driver thread）
+                self._profiler = None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc) -> bool:
+        self.elapsed = time.perf_counter() - self._start
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return False
+        profiler.disable()
+        if exc_type is None and self.elapsed >= self.threshold:
+            from .file_utils import FileUtils
+
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with FileUtils.atomic_output(self.path) as tmp:
+                profiler.dump_stats(tmp)
+            self.kept = self.path
+        return False
+
+
+def assign_profile_paths(inputs: Iterable[str], profile_dir: str) -> Dict[str, str]:
+    """
+    依輸入檔名決定紀錄路徑（``<stem>.pstats``）；檔名重複時加上 ``-2``、``-3``…
+
+    在主行程先分配好，worker 行程之間不需協調。
+    """
+    paths: Dict[str, str] = {}
+    taken = set()
+    for input_path in inputs:
+        if input_path in paths:
+            continue
+        stem = Path(input_path).stem
+        name, n = stem, 1
+        while name.lower() in taken:
+            n += 1
+            name = f"{stem}-{n}"
+        taken.add(name.lower())
+        paths[input_path] = str(Path(profile_dir) / f"{name}{PROFILE_SUFFIX}")
+    return paths
+
+
+# ----------------------------------------------------------------- report
+
+
+def find_profiles(paths: Sequence[str]) -> List[str]:
+    """展開目錄為其中的 ``.pstats``（依名稱排序）"""
+    found: List[str] = []
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            found.extend(str(f) for f in sorted(p.glob(f"*{PROFILE_SUFFIX}")))
+        elif p.exists():
+            found.append(str(p))
+        else:
+            raise FileNotFoundError(f"找不到 {path}")
+    return found
+
+
+_PATH_PREFIXES = sorted(
+    {os.path.normcase(p) for p in (sysconfig.get_paths().get("purelib"),
+                                   sysconfig.get_paths().get("platlib"),
+                                   sysconfig.get_paths().get("stdlib"),
+                                   str(Path(__file__).resolve().parents[2]))
+     if p},
+    key=len, reverse=True,
+)
+
+
+def short_path(filename: str) -> str:
+    """去掉 site-packages / 標準函式庫 / 專案的前綴，方便閱讀"""
+    normalized = os.path.normcase(filename)
+    for prefix in _PATH_PREFIXES:
+        if normalized.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:].replace(os.sep, "/")
+    return filename
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # 內建函式，例如 <built-in method zlib.compress>
+        return name
+    return f"{short_path(filename)}:{line}({name})"
+
+
+def summarize_profiles(files: Sequence[str], top: int = 25, sort: str = "tottime") -> Dict[str, Any]:
+    """
+    彙整多個 ``.pstats``
+
+    Returns:
+        dict: ``files``（``[{file, total_s}]``，依總時間由大到小）、``total_s``、
+        ``functions``（前 ``top`` 名：``function, calls, tottime_s, cumtime_s, share, files``）
+    """
+    import pstats
+
+    if sort not in SORT_KEYS:
+        raise ValueError(f"不支援的排序方式: {sort}（可用：{', '.join(SORT_KEYS)}）")
+    combined: Dict[tuple, List[float]] = {}
+    per_file = []
+    for path in files:
+        stats = pstats.Stats(path)
+        per_file.append({"file": path, "total_s": stats.total_tt})
+        for func, (_cc, calls, tottime, cumtime, _callers) in stats.stats.items():
+            entry = combined.setdefault(func, [0, 0.0, 0.0, 0])
+            entry[0] += calls
+            entry[1] += tottime
+            # 遞迴函式的 cumtime 在 pstats 已去除重複；跨檔案直接相加
+            entry[2] += cumtime
+            entry[3] += 1
+    total = sum(item["total_s"] for item in per_file)
+    index = {"calls": 0, "tottime": 1, "cumtime": 2}[sort]
+    ranked = sorted(combined.items(), key=lambda kv: -kv[1][index])[:top]
+    return {
+        "files": sorted(per_file, key=lambda item: -item["total_s"]),
+        "total_s": total,
+        "functions": [
+            {
+                "function": _label(func),
+                "calls": int(calls),
+                "tottime_s": tottime,
+                "cumtime_s": cumtime,
+                "share": tottime / total if total else 0.0,
+                "files": count,
+            }
+            for func, (calls, tottime, cumtime, count) in ranked
+        ],
+    }
+
+
+def format_profile_summary(summary: Dict[str, Any], slowest: int = 5) -> str:
+    files = summary["files"]
+    lines = [f"   共 {len(files)} 份紀錄，合計 {summary['total_s']:.2f}s"]
+    for item in files[:slowest]:
+        lines.append(f"   {item['total_s']:>8.2f}s  {Path(item['file']).name}")
+    lines.append("")
+    lines.append(f"   {'自身s':>7}{'累計s':>7}{'佔比':>6}{'呼叫數':>7}{'檔數':>4}  函式")
+    for fn in summary["functions"]:
+        lines.append(f"   {fn['tottime_s']:>9.3f}{fn['cumtime_s']:>9.3f}{fn['share'] * 100:>7.1f}%"
+                     f"{fn['calls']:>10}{fn['files']:>6}  {fn['function']}")
+    return "\n".join(lines)
@@ -0,0 +1,397 @@
+"""
+多輸入 × 多樣板的批次渲染計畫（``md2word run``）
+
+``batch`` 是一個樣板 × 多個輸入、``batch-templates`` 是一個輸入 × 多個樣板；
+``run`` 讀取一份清單（YAML 或 CSV），每列為（輸入、樣板、輸出、選項）：
+
+YAML::
+
+    defaults:
+      format: auto
+      validate: false
+    jobs:
+      - input: data/a.md
+        template: templates/form.docx
+        output: out/a.docx
+      # 矩陣：inputs × templates，可用 glob；輸出路徑可用 {input} {template} {ext}
+      - inputs: data/*.md
+        templates: [templates/form.docx, templates/sheet.xlsx]
+        output: out/{input}_{template}.{ext}
+
+CSV（第一列為欄位名稱；``format`` / ``validate`` 可省略，input / template 欄可用 glob）::
+
+    input,template,output,format
+    data/a.md,templates/form.docx,out/a.docx,docx
+
+相對路徑以清單檔所在目錄為基準。
+
+執行時以「輸入檔」分組：同一個輸入的所有樣板交給同一個 worker，輸入只解析一次；
+樣板內容在每個 worker 行程內快取（``TemplateCache``），每個樣板在每個行程只讀取一次。
+群組依預估成本（``CostModel`` × 樣板數）由大到小派工；單一輸入的樣板數多於平均分攤量時
+會拆成數個群組，避免所有工作落在同一個 worker。
+"""
+
+import csv
+import glob
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .cost_model import CostModel
+from .timing import Timings, collecting, span
+
+
+PLAN_FORMATS = ("auto", "docx", "xlsx")
+
+_TRUE = {"1", "true", "yes", "y", "on"}
+_FALSE = {"0", "false", "no", "n", "off", ""}
+
+
+class RenderTask:
+    """清單中的一項：一個輸入 × 一個樣板 → 一個輸出"""
+
+    __slots__ = ("index", "input_path", "template_path", "output_path", "format",
+                 "validate", "error", "fields", "validation_errors", "elapsed")
+
+    def __init__(self, input_path: str, template_path: str, output_path: str,
+                 format: str = "auto", validate: bool = False, index: int = 0):
+        self.index = index
+        self.input_path = input_path
+        self.template_path = template_path
+        self.output_path = output_path
+        self.format = format
+        self.validate = validate
+        self.error: Optional[str] = None
+        self.fields = 0
+        self.validation_errors = 0
+        self.elapsed: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input": self.input_path,
+            "template": self.template_path,
+            "output": self.output_path,
+            "format": self.format,
+            "ok": self.error is None,
+            "error": self.error,
+            "fields": self.fields,
+            "validation_errors": self.validation_errors,
+            "elapsed_s": self.elapsed,
+        }
+
+
+# ----------------------------------------------------------------- loading
+
+
+def _as_bool(value: Any, where: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"{where}：validate 需為 true / false，收到 {value!r}")
+
+
+def _expand(patterns: Any, base: Path, where: str, kind: str) -> List[str]:
+    """單一路徑、glob 或列表 → 絕對路徑列表（glob 結果依名稱排序）"""
+    if patterns is None:
+        raise ValueError(f"{where}：缺少 {kind}")
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    paths: List[str] = []
+    for pattern in patterns:
+        full = str(base / os.path.expanduser(str(pattern)))
+        if glob.has_magic(full):
+            matches = sorted(glob.glob(full, recursive=True))
+            if not matches:
+                raise ValueError(f"{where}：{kind} {pattern!r} 沒有符合的檔案")
+            paths.extend(matches)
+        else:
+            paths.append(full)
+    return paths
+
+
+def _rows_to_tasks(rows: List[Dict[str, Any]], defaults: Dict[str, Any], base: Path,
+                   source: str) -> List[RenderTask]:
+    from ..renderer.factory import detect_format
+
+    tasks: List[RenderTask] = []
+    for number, row in enumerate(rows, 1):
+        where = f"{source} 第 {number} 項"
+        if not isinstance(row, dict):
+            raise ValueError(f"{where}：需為 mapping，收到 {type(row).__name__}")
+        options = dict(defaults)
+        options.update(row.get("options") or {})
+        options.update({k: v for k, v in row.items() if k in ("format", "validate")})
+        fmt = str(options.get("format") or "auto").lower()
+        if fmt not in PLAN_FORMATS:
+            raise ValueError(f"{where}：不支援的格式 {fmt!r}")
+        validate = _as_bool(options.get("validate", False), where)
+
+        inputs = _expand(row.get("inputs", row.get("input")), base, where, "input")
+        templates = _expand(row.get("templates", row.get("template")), base, where, "template")
+        output = row.get("output")
+        if not output:
+            raise ValueError(f"{where}：缺少 output")
+        if (len(inputs) > 1 or len(templates) > 1) and "{" not in str(output):
+            raise ValueError(f"{where}：多個輸入或樣板時 output 需包含 {{input}} / {{template}}")
+
+        for input_path in inputs:
+            for template_path in templates:
+                try:
+                    ext = fmt if fmt != "auto" else detect_format(template_path)
+                except ValueError as e:
+                    raise ValueError(f"{where}：{Path(template_path).name} {e}") from None
+                try:
+                    output_path = str(output).format(
+                        input=Path(input_path).stem, template=Path(template_path).stem, ext=ext,
+                    )
+                except (KeyError, IndexError) as e:
+                    raise ValueError(f"{where}：output 含未知的欄位 {e}") from None
+                tasks.append(RenderTask(input_path, template_path, str(base / output_path),
+                                        format=fmt, validate=validate))
+    return tasks
+
+
+def load_render_plan(path: str) -> List[RenderTask]:
+    """
+    讀取 YAML / CSV 清單
+
+    Raises:
+        ValueError: 清單格式錯誤，或兩項工作寫到同一個輸出檔
+    """
+    plan_path = Path(path)
+    base = plan_path.resolve().parent
+    suffix = plan_path.suffix.lower()
+
+    if suffix == ".csv":
+        with open(plan_path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = {"input", "template", "output"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"{plan_path.name}：CSV 缺少欄位 {', '.join(sorted(missing))}")
+            rows = [{k: v for k, v in row.items() if k and v not in (None, "")} for row in reader]
+        defaults: Dict[str, Any] = {}
+    elif suffix in (".yaml", ".yml"):
+        import yaml
+
+        try:
+            with open(plan_path, encoding="utf-8") as f:
+                loaded = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"清單格式錯誤: {e}") from None
+        if isinstance(loaded, list):
+            loaded = {"jobs": loaded}
+        if not isinstance(loaded, dict) or not isinstance(loaded.get("jobs"), list):
+            raise ValueError(f"{plan_path.name}：需包含 jobs 列表")
+        defaults = loaded.get("defaults") or {}
+        rows = loaded["jobs"]
+    else:
+        raise ValueError(f"不支援的清單格式: {plan_path.suffix}（支援 .yaml / .yml / .csv）")
+
+    tasks = _rows_to_tasks(rows, defaults, base, plan_path.name)
+    seen: Dict[str, RenderTask] = {}
+    for index, task in enumerate(tasks):
+        task.index = index
+        key = os.path.normcase(os.path.abspath(task.output_path))
+        if key in seen:
+            raise ValueError(
+                f"輸出重複：{task.output_path}（{Path(seen[key].input_path).name} × "
+                f"{Path(seen[key].template_path).name} 與 {Path(task.input_path).name} × "
+                f"{Path(task.template_path).name}）"
+            )
+        seen[key] = task
+    return tasks
+
+
+# ----------------------------------------------------------------- grouping
+
+
+def group_tasks(tasks: List[RenderTask], workers: int) -> List[List[RenderTask]]:
+    """
+    依輸入檔分組；每組交給一個 worker，輸入只解析一次
+
+    單一輸入的工作數超過 ``ceil(總數 / workers)`` 時拆成數組，讓工作能分散到各 worker。
+    """
+    by_input: "OrderedDict[str, List[RenderTask]]" = OrderedDict()
+    for task in tasks:
+        by_input.setdefault(task.input_path, []).append(task)
+    limit = max(-(-len(tasks) // max(workers, 1)), 1)
+    groups: List[List[RenderTask]] = []
+    for members in by_input.values():
+        # 同一組內依樣板排序，連續的工作使用同一個已載入的樣板
+        members.sort(key=lambda t: (t.template_path, t.index))
+        for start in range(0, len(members), limit):
+            groups.append(members[start:start + limit])
+    return groups
+
+
+# ----------------------------------------------------------------- worker side
+
+
+_WORKER_CACHE = None
+
+
+def _render_group(input_path: str, items: List[tuple], timed: bool = False) -> List[Dict[str, Any]]:
+    """
+    解析一次輸入，依序渲染多個樣板（worker 行程或本行程內）
+
+    Args:
+        items: ``[(template_path, output_path, format, validate), ...]``
+        timed: 收集各步驟耗時，整組的紀錄放在第一項的 ``timings``
+    """
+    timings = Timings() if timed else None
+    with collecting(timings):
+        results = _render_items(input_path, items)
+    if timings is not None and results:
+        results[0]["timings"] = timings.records()
+    return results
+
+
+def _render_items(input_path: str, items: List[tuple]) -> List[Dict[str, Any]]:
+    global _WORKER_CACHE
+    from ..parser import MarkdownParser
+    from ..renderer.factory import build_renderer
+    from .template_cache import TemplateCache
+
+    if _WORKER_CACHE is None:
+        _WORKER_CACHE = TemplateCache()
+
+    start = time.perf_counter()
+    try:
+        data = MarkdownParser().parse(input_path)
+    except Exception as exc:
+        return [{"error": f"解析失敗：{exc}"} for _ in items]
+    parse_s = time.perf_counter() - start
+    fields = len([k for k in data.keys() if not k.startswith("#")])
+
+    validation_errors = None
+    results = []
+    for template_path, output_path, fmt, validate in items:
+        start = time.perf_counter()
+        try:
+            if validate and validation_errors is None:
+                from ..validator import SchemaValidator
+
+                with span("validate"):
+                    is_valid, errors = SchemaValidator().validate(data)
+                validation_errors = 0 if is_valid else len(errors)
+            renderer = build_renderer(template_path=template_path, format_hint=fmt)
+            renderer.load_template(template_path, source=_WORKER_CACHE.get_bytes(template_path))
+            renderer.render(data)
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            renderer.save(output_path)
+        except Exception as exc:
+            results.append({"error": str(exc)})
+            continue
+        results.append({
+            "fields": fields,
+            "validation_errors": (validation_errors or 0) if validate else 0,
+            # 解析時間攤到同組第一項
+            "elapsed_s": time.perf_counter() - start + (parse_s if not results else 0.0),
+        })
+    return results
+
+
+# ----------------------------------------------------------------- runner
+
+
+class PlanRunner:
+    """
+    依輸入分組平行執行渲染計畫
+
+    Args:
+        workers: worker 行程數；``0`` 表示在本行程內執行
+        continue_on_error: 為 False 時遇到第一個失敗即不再派送新的群組
+        on_result: 每項工作完成時呼叫，參數為 ``RenderTask``（於主執行緒）
+        cost_model: 群組成本估計（預設 ``CostModel()``）
+        timings: 提供時收集各步驟耗時，依輸入檔彙整
+    """
+
+    def __init__(self, workers: Optional[int] = None, continue_on_error: bool = True,
+                 on_result: Optional[Callable[[RenderTask], None]] = None,
+                 cost_model: Optional[CostModel] = None, timings: Optional[Timings] = None):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(workers, 0)
+        self.continue_on_error = continue_on_error
+        self.on_result = on_result
+        self.cost_model = cost_model or CostModel()
+        self.timings = timings
+
+    def _finish(self, group: List[RenderTask], results: List[Dict[str, Any]]) -> bool:
+        failed = False
+        if self.timings is not None and results and results[0].get("timings"):
+            self.timings.merge(results[0]["timings"], group[0].input_path)
+        for task, result in zip(group, results):
+            task.error = result.get("error")
+            task.fields = result.get("fields", 0)
+            task.validation_errors = result.get("validation_errors", 0)
+            task.elapsed = result.get("elapsed_s")
+            failed = failed or task.error is not None
+            if self.on_result is not None:
+                self.on_result(task)
+        return failed
+
+    def run(self, tasks: List[RenderTask]) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: ``tasks``（依清單順序，含未執行者）、``success_count`` / ``failed_count`` /
+            ``skipped_count``、``groups``、``inputs`` / ``templates``（不重複數）、``wall_s``
+        """
+        groups = group_tasks(tasks, self.workers)
+        costs = {task.input_path: self.cost_model.estimate(task.input_path).predicted
+                 for task in tasks}
+        groups.sort(key=lambda g: -costs[g[0].input_path] * len(g))
+        done = set()
+
+        started = time.perf_counter()
+        if self.workers == 0:
+            for group in groups:
+                results = _render_group(group[0].input_path, _items(group), self.timings is not None)
+                failed = self._finish(group, results)
+                done.update(id(t) for t in group)
+                if failed and not self.continue_on_error:
+                    break
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(_render_group, group[0].input_path, _items(group),
+                                self.timings is not None): group
+                    for group in groups
+                }
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    group = futures[future]
+                    try:
+                        results = future.result()
+                    except Exception as exc:
+                        results = [{"error": str(exc)} for _ in group]
+                    failed = self._finish(group, results)
+                    done.update(id(t) for t in group)
+                    if failed and not self.continue_on_error:
+                        # 尚未開始的群組取消；已在執行中的仍會完成並回報
+                        for pending in futures:
+                            pending.cancel()
+        wall = time.perf_counter() - started
+
+        ran = [t for t in tasks if id(t) in done]
+        failed_count = sum(1 for t in ran if t.error is not None)
+        return {
+            "tasks": tasks,
+            "success_count": len(ran) - failed_count,
+            "failed_count": failed_count,
+            "skipped_count": len(tasks) - len(ran),
+            "groups": len(groups),
+            "inputs": len({t.input_path for t in tasks}),
+            "templates": len({t.template_path for t in tasks}),
+            "wall_s": wall,
+        }
+
+
+def _items(group: List[RenderTask]) -> List[tuple]:
+    return [(t.template_path, t.output_path, t.format, t.validate) for t in group]
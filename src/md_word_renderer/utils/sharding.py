@@ -0,0 +1,128 @@
+"""
+批次分片（``--shard i/N``）
+
+把一批輸入切成 N 份分給多台機器執行，每台只處理自己的那一份：
+
+- ``hash``（預設）：以相對路徑的 SHA-1 決定分片。同一個檔案永遠落在同一個分片，
+  與其他檔案是否新增 / 刪除、各機器上的目錄列舉順序都無關
+- ``size``：依檔案大小平衡各分片的總量（由大到小，每次放進目前最輕的分片）。
+  只要各機器看到的是同一組檔案，結果就相同；新增檔案可能改變其他檔案的分片
+
+分片編號對使用者為 1-based（``1/4`` … ``4/4``），內部為 0-based。
+"""
+
+import hashlib
+import heapq
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+SHARD_STRATEGIES = ("hash", "size")
+
+_SHARD_PATTERN = re.compile(r"\s*(\d+)\s*/\s*(\d+)\s*")
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """``"2/4"`` → ``(1, 4)``（0-based 編號, 分片數）"""
+    match = _SHARD_PATTERN.fullmatch(text or "")
+    if match is None:
+        raise ValueError(f"無法解析的分片: {text!r}（格式為 i/N，例如 1/4）")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片編號需介於 1 與 {count} 之間: {text!r}")
+    return index - 1, count
+
+
+def shard_key(path: Path, root: Path) -> str:
+    """分片用的 key：相對於 ``root`` 的 POSIX 路徑（各平台、各機器一致）"""
+    try:
+        return Path(path).relative_to(root).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+def stable_shard(key: str, count: int) -> int:
+    """``key`` 的固定分片（0-based）；不受 ``PYTHONHASHSEED`` 影響"""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def assign_shards(items: Iterable[Tuple[str, int]], count: int,
+                  strategy: str = "hash") -> Dict[str, int]:
+    """
+    ``[(key, 大小), ...]`` → ``{key: 分片}``
+
+    ``size`` 策略為 LPT（longest processing time first）貪婪法：由大到小排序
+    （同大小依 key 排序以保持決定性），每個檔案放進目前總量最小的分片。
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"未知的分片策略: {strategy}")
+    items = list(items)
+    if strategy == "hash":
+        return {key: stable_shard(key, count) for key, _ in items}
+
+    loads = [(0, shard) for shard in range(count)]
+    assignment = {}
+    for key, size in sorted(items, key=lambda item: (-item[1], item[0])):
+        load, shard = heapq.heappop(loads)
+        assignment[key] = shard
+        # 0 byte 的檔案仍佔一個工作量，避免全部落在同一個分片
+        heapq.heappush(loads, (load + max(size, 1), shard))
+    return assignment
+
+
+def _size(path: Path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class ShardPlan:
+    """
+    一組檔案的分片結果
+
+    Args:
+        paths: 所有候選檔案
+        root: 計算相對路徑的根目錄
+        count: 分片數
+        strategy: ``hash`` / ``size``
+    """
+
+    def __init__(self, paths: Sequence[Path], root: Path, count: int, strategy: str = "hash"):
+        self.root = Path(root)
+        self.count = count
+        self.strategy = strategy
+        self.sizes = {Path(p): _size(Path(p)) for p in paths}
+        self.keys = {Path(p): shard_key(Path(p), self.root) for p in paths}
+        by_key = assign_shards(
+            ((self.keys[p], self.sizes[p]) for p in self.sizes), count, strategy
+        )
+        self.assignment = {p: by_key[self.keys[p]] for p in self.sizes}
+
+    def select(self, index: int) -> List[Path]:
+        """分片 ``index``（0-based）的檔案，依相對路徑排序"""
+        return sorted((p for p, s in self.assignment.items() if s == index),
+                      key=lambda p: self.keys[p])
+
+    def totals(self) -> List[Tuple[int, int]]:
+        """每個分片的 ``(檔案數, 總大小)``"""
+        totals = [[0, 0] for _ in range(self.count)]
+        for path, shard in self.assignment.items():
+            totals[shard][0] += 1
+            totals[shard][1] += self.sizes[path]
+        return [tuple(t) for t in totals]
+
+    def format(self, current: int = -1) -> str:
+        """``--list-shard`` 的輸出；``current`` 分片以 ``▶`` 標示"""
+        from .output_cache import format_size
+
+        lines = []
+        for shard, (files, total) in enumerate(self.totals()):
+            marker = "▶" if shard == current else " "
+            lines.append(f"{marker} 分片 {shard + 1}/{self.count}：{files} 個檔案，{format_size(total)}")
+            for path in self.select(shard):
+                lines.append(f"      {self.keys[path]}  ({format_size(self.sizes[path])})")
+        return "\n".join(lines)
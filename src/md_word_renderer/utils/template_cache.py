@@ -0,0 +1,81 @@
+"""
+樣板快取
+
+常駐行程（daemon、HTTP 服務、watch 模式）重複使用同一份樣板時，
+不必每次都從磁碟讀取；檔案異動（mtime / 大小改變）時自動重新載入。
+
+只快取檔案內容（bytes），不快取解析後的 ``DocxTemplate`` / openpyxl ``Workbook``：
+渲染會直接修改這些物件，每個工作都需要一份新的，而兩者都沒有可靠的複製方式
+（``DocxTemplate`` deepcopy 會遞迴過深；openpyxl 不支援複製整本活頁簿，且 deepcopy
+只比重新解析快約 4 ms）。每個工作仍由記憶體中的 bytes 重新解析樣板；常駐行程省下的是
+讀檔與模組載入，docxtpl 本身也是延遲到渲染時才解析 XML。
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+
+class TemplateCache:
+    """
+    依（路徑, mtime, 大小）快取樣板檔案內容（bytes，非解析後的物件）
+
+    Args:
+        max_entries: 最多保留的樣板數，超過時淘汰最久未使用者
+
+    Example:
+        >>> cache = TemplateCache()
+        >>> source = cache.get_bytes("template.docx")
+        >>> renderer.load_template("template.docx", source=source)
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_bytes(self, template_path: str) -> bytes:
+        """
+        取得樣板內容
+
+        Raises:
+            FileNotFoundError: 樣板檔案不存在
+        """
+        path = Path(template_path).resolve()
+        if not path.exists():
+            raise FileNotFoundError(f"模板檔案不存在: {template_path}")
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = str(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        data = path.read_bytes()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (signature, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def preload(self, template_path: str) -> None:
+        """預先載入樣板（服務啟動時使用）"""
+        self.get_bytes(template_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "templates": len(self._entries),
+                "bytes": sum(len(data) for _, data in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
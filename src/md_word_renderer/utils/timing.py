@@ -0,0 +1,200 @@
+"""
+各步驟耗時量測（``--timings``）
+
+程式中以 ``span("步驟")`` 包住各個步驟（讀檔、解析、載入樣板、圖片處理、渲染、存檔…）：
+
+    from ..utils.timing import span
+
+    with span("parse"):
+        ...
+
+- 未啟用時 ``span()`` 只做一次 thread-local 屬性查詢並回傳共用的空 context，幾乎沒有成本
+- 啟用時（``with collecting(timings):``）以 ``time.perf_counter``（單調時鐘）計時
+- 巢狀 span 記錄的是「自身時間」：外層扣除內層，各步驟加總即為總時間，不會重複計算
+- 啟用狀態為 thread-local：批次管線的 driver thread / worker 行程各自收集，
+  完成後以 ``Timings.merge`` 併入主行程，並標註所屬的輸入檔
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+_state = threading.local()
+
+Record = Tuple[str, float]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("timings", "name", "start", "children")
+
+    def __init__(self, timings: "Timings", name: str):
+        self.timings = timings
+        self.name = name
+        self.children = 0.0
+
+    def __enter__(self):
+        stack = _state.__dict__.setdefault("stack", [])
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = _state.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.timings.add(self.name, elapsed - self.children, getattr(_state, "file", None))
+        return False
+
+
+def span(name: str):
+    """量測一個步驟；目前 thread 未啟用收集時不做任何事"""
+    timings = getattr(_state, "timings", None)
+    if timings is None:
+        return _NULL_SPAN
+    return _Span(timings, name)
+
+
+class collecting:
+    """
+    在目前 thread 啟用收集
+
+    Args:
+        timings: 收集目標
+        file: 這段期間的 span 歸屬的輸入檔（可省略）
+    """
+
+    def __init__(self, timings: Optional["Timings"], file: Optional[str] = None):
+        self.timings = timings
+        self.file = file
+
+    def __enter__(self) -> Optional["Timings"]:
+        self._saved = (getattr(_state, "timings", None), getattr(_state, "file", None))
+        _state.timings = self.timings
+        _state.file = self.file
+        return self.timings
+
+    def __exit__(self, *exc):
+        _state.timings, _state.file = self._saved
+        return False
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Timings:
+    """
+    步驟耗時的收集結果（執行緒安全）
+
+    Example:
+        >>> timings = Timings()
+        >>> with collecting(timings, file="a.md"):
+        ...     process_one("a.md", "tpl.docx", "out.docx")
+        >>> print(timings.format())
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.per_file: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, file: Optional[str] = None) -> None:
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if file is not None:
+                stages = self.per_file.setdefault(file, {})
+                stages[name] = stages.get(name, 0.0) + seconds
+
+    def records(self) -> List[Record]:
+        """``[(步驟, 秒), ...]``；worker 行程回傳給主行程用"""
+        with self._lock:
+            return [(name, s) for name, values in self.samples.items() for s in values]
+
+    def merge(self, records: Sequence[Record], file: Optional[str] = None) -> None:
+        for name, seconds in records:
+            self.add(name, seconds, file)
+
+    # ---------------------------------------------------------------- report
+
+    def summary(self, top: int = 5) -> Dict[str, Any]:
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+            per_file = {f: dict(stages) for f, stages in self.per_file.items()}
+        grand_total = sum(sum(values) for values in samples.values())
+        stages = []
+        for name, values in sorted(samples.items(), key=lambda kv: -sum(kv[1])):
+            total = sum(values)
+            stages.append({
+                "stage": name,
+                "count": len(values),
+                "total_s": total,
+                "mean_s": total / len(values),
+                "p50_s": _percentile(values, 0.50),
+                "p90_s": _percentile(values, 0.90),
+                "p99_s": _percentile(values, 0.99),
+                "max_s": values[-1],
+                "share": total / grand_total if grand_total else 0.0,
+            })
+        slowest = sorted(per_file.items(), key=lambda kv: -sum(kv[1].values()))[:top]
+        return {
+            "total_s": grand_total,
+            "files": len(per_file),
+            "stages": stages,
+            "slowest": [
+                {"file": f, "total_s": sum(st.values()),
+                 "stages": dict(sorted(st.items(), key=lambda kv: -kv[1]))}
+                for f, st in slowest
+            ],
+        }
+
+    def format(self, top: int = 5) -> str:
+        data = self.summary(top)
+        ms = lambda s: f"{s * 1000:8.1f}"  # noqa: E731
+        # 全形字佔兩格，標題欄寬扣掉字數才能與數字對齊
+        lines = [f"   {'步驟':<14}{'次數':>4}{'總計ms':>8}{'平均':>6}{'p50':>9}"
+                 f"{'p90':>9}{'p99':>9}{'最大':>7}{'佔比':>6}"]
+        for st in data["stages"]:
+            lines.append(
+                f"   {st['stage']:<16}{st['count']:>6}{st['total_s'] * 1000:>10.1f}"
+                f"{ms(st['mean_s'])} {ms(st['p50_s'])} {ms(st['p90_s'])} {ms(st['p99_s'])} "
+                f"{ms(st['max_s'])} {st['share'] * 100:6.1f}%"
+            )
+        if data["slowest"]:
+            lines.append("   最慢的檔案：")
+            for rank, item in enumerate(data["slowest"], 1):
+                parts = "、".join(f"{name} {sec * 1000:.0f}ms"
+                                 for name, sec in list(item["stages"].items())[:3])
+                lines.append(f"   {rank}. {os.path.basename(item['file'])}  "
+                             f"{item['total_s'] * 1000:.0f}ms（{parts}）")
+        return "\n".join(lines)
+
+    def write_json(self, path: str, top: int = 20) -> None:
+        """寫出機器可讀的結果（原子取代）"""
+        from .file_utils import FileUtils
+
+        payload = self.summary(top)
+        with self._lock:
+            payload["per_file"] = {f: dict(st) for f, st in self.per_file.items()}
+        text = json.dumps(payload, ensure_ascii=False, indent=2)
+        FileUtils.atomic_write_bytes(path, text.encode("utf-8"))
@@ -0,0 +1,183 @@
+"""
+檔案變更監看
+
+- ``InotifyWatcher``：Linux 以 inotify（ctypes 呼叫 libc）監看檔案所在目錄，
+  編輯器以「寫暫存檔再 rename」方式存檔也能偵測
+- ``PollingWatcher``：其他平台或 inotify 不可用時，定期比對（mtime, 大小）
+
+兩者介面相同：``set_paths(paths)`` 設定要監看的檔案，``poll(timeout)`` 回傳這段時間內
+有變動的檔案（絕對路徑）集合；沒有變動時回傳空集合。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class PollingWatcher:
+    """
+    以固定間隔比對檔案（mtime, 大小）
+
+    Args:
+        interval: 檢查間隔（秒）
+    """
+
+    name = "polling"
+
+    def __init__(self, paths: Iterable[str] = (), interval: float = 0.25):
+        self.interval = interval
+        self._stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]) -> None:
+        wanted = {os.path.abspath(p) for p in paths}
+        self._stats = {p: self._stats[p] if p in self._stats else _stat(p) for p in wanted}
+
+    def _changed(self) -> Set[str]:
+        changed = set()
+        for path, old in self._stats.items():
+            new = _stat(path)
+            if new != old:
+                self._stats[path] = new
+                changed.add(path)
+        return changed
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._changed()
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """以 inotify 監看檔案所在目錄（僅 Linux）"""
+
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, paths: Iterable[str] = ()):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 只支援 Linux")
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 失敗: {os.strerror(err)}")
+        self._dirs: Dict[str, int] = {}
+        self._wds: Dict[int, str] = {}
+        self._paths: Set[str] = set()
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]) -> None:
+        self._paths = {os.path.abspath(p) for p in paths}
+        for directory in {os.path.dirname(p) for p in self._paths}:
+            if directory in self._dirs or not os.path.isdir(directory):
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"inotify_add_watch 失敗 ({directory}): {os.strerror(err)}")
+            self._dirs[directory] = wd
+            self._wds[wd] = directory
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset + self._EVENT.size <= len(buf):
+                wd, _mask, _cookie, length = self._EVENT.unpack_from(buf, offset)
+                offset += self._EVENT.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                directory = self._wds.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if path in self._paths:
+                    changed.add(path)
+        return changed
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths: Iterable[str] = (), polling: bool = False, interval: float = 0.25):
+    """優先使用 inotify，不可用時改用輪詢"""
+    paths = list(paths)
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, interval=interval)
+
+
+def wait_for_changes(watcher, debounce: float = 0.15, timeout: Optional[float] = None) -> Set[str]:
+    """
+    等待變動並去彈跳：第一次變動後持續收集，直到 ``debounce`` 秒內沒有新變動
+
+    編輯器存檔常連續觸發多個事件（截斷、寫入、rename），合併成一次重新渲染。
+    """
+    changed = watcher.poll(timeout)
+    if not changed:
+        return changed
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return changed
+        changed |= more
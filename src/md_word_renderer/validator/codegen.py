@@ -0,0 +1,432 @@
+"""
+JSON Schema → Python 驗證函式（``SchemaValidator(compiled=True)``）
+
+把 schema 轉成一份專用的 Python 原始碼：每個（子）schema 一個函式，關鍵字直接展開成
+``isinstance`` / ``in`` / 預先編譯的正規表示式，不再經由 jsonschema 逐一分派關鍵字、
+建立 ``ValidationError``。產生的原始碼依 schema hash 快取於磁碟：
+
+    $MD2WORD_VALIDATOR_CACHE_DIR 或 ~/.cache/md2word/validators/v2-js<版本>-<sha256>.py
+
+快取鍵包含已安裝的 jsonschema 版本（錯誤訊息的文字照抄自 jsonschema，版本不同時重新產生）；
+schema hash 不排序鍵，因為檢查的順序（即錯誤的順序）依 schema 中關鍵字的順序。
+
+- 錯誤的順序、路徑與訊息與 jsonschema（Draft 7）相同；``additionalProperties`` 的子 schema
+  錯誤依資料中的鍵順序產生（jsonschema 走訪 set，順序不固定）
+- 支援的關鍵字：``type``、``required``、``properties``、``additionalProperties``、``items``、
+  ``pattern``、``enum`` / ``const``（純量）、``minLength`` / ``maxLength``、``minItems`` /
+  ``maxItems``、同一份文件內的 ``$ref``（``#`` 與 ``#/definitions/...``，可遞迴）
+- 其餘 Draft 7 關鍵字會拋出 ``UnsupportedSchema``，由呼叫端改用 jsonschema
+- 產生與載入都不需要 import jsonschema
+"""
+
+import importlib.util
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from .schema_validator import schema_hash
+
+
+# 產生的程式碼格式改變時遞增，舊的快取檔自然失效
+CODEGEN_VERSION = 2
+
+CACHE_ENV_VAR = "MD2WORD_VALIDATOR_CACHE_DIR"
+
+# (路徑, 訊息)；路徑為鍵名與索引組成的 tuple，根層為 ()
+ErrorList = List[Tuple[Tuple[Any, ...], str]]
+CompiledSchema = Callable[[Any, Optional[int]], ErrorList]
+
+# Draft 7 有驗證作用的關鍵字中尚未支援者；format 在沒有 format_checker 時不驗證，
+# 與其他非 Draft 7 關鍵字一樣忽略（jsonschema 亦同）
+_UNSUPPORTED = frozenset({
+    "additionalItems", "allOf", "anyOf", "contains", "dependencies", "exclusiveMaximum",
+    "exclusiveMinimum", "if", "maxProperties", "maximum", "minProperties", "minimum",
+    "multipleOf", "not", "oneOf", "patternProperties", "propertyNames", "uniqueItems",
+})
+
+_TYPE_CHECKS = {
+    "object": "isinstance({x}, dict)",
+    "array": "isinstance({x}, list)",
+    "string": "isinstance({x}, str)",
+    "boolean": "isinstance({x}, bool)",
+    "null": "{x} is None",
+    "number": "(isinstance({x}, _Number) and not isinstance({x}, bool))",
+    "integer": "((isinstance({x}, int) and not isinstance({x}, bool))"
+               " or (isinstance({x}, float) and {x}.is_integer()))",
+}
+
+_PRELUDE = '''\
+# 由 md_word_renderer.validator.codegen 產生，請勿手動修改
+import re
+from numbers import Number as _Number
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Errors(list):
+    __slots__ = ("limit",)
+
+
+def _err(errors, path, message):
+    errors.append((path, message))
+    if len(errors) == errors.limit:
+        raise _Stop
+
+
+def _equal(instance, expected):
+    # 與 jsonschema 相同：True/False 不等於 1/0
+    if isinstance(instance, bool) or isinstance(expected, bool):
+        return instance is expected
+    return instance == expected
+
+
+def validate(instance, limit=None):
+    errors = _Errors()
+    errors.limit = limit
+    try:
+        _v0(instance, (), errors)
+    except _Stop:
+        pass
+    return list(errors)
+'''
+
+_LOADED: Dict[str, CompiledSchema] = {}
+_LOADED_LOCK = threading.Lock()
+
+_JSONSCHEMA_VERSION: Optional[str] = None
+
+
+class UnsupportedSchema(ValueError):
+    """schema 用到產生器不支援的關鍵字"""
+
+
+def default_cache_dir() -> str:
+    env = os.environ.get(CACHE_ENV_VAR)
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "md2word", "validators")
+
+
+def jsonschema_version() -> str:
+    """
+    已安裝的 jsonschema 版本；不 import jsonschema（也不用較慢的 ``importlib.metadata``），
+    由套件旁的 ``jsonschema-<版本>.dist-info`` 目錄名稱取得，無法判斷時為 ``"unknown"``
+    """
+    global _JSONSCHEMA_VERSION
+    if _JSONSCHEMA_VERSION is None:
+        version = "unknown"
+        spec = importlib.util.find_spec("jsonschema")
+        if spec is not None and spec.origin:
+            site = Path(spec.origin).parent.parent
+            found = [p.name[len("jsonschema-"):-len(".dist-info")]
+                     for p in site.glob("jsonschema-*.dist-info")]
+            if len(found) == 1:
+                version = found[0]
+        _JSONSCHEMA_VERSION = version
+    return _JSONSCHEMA_VERSION
+
+
+def schema_key(schema: Any) -> str:
+    """快取鍵：產生器版本、jsonschema 版本與 schema 內容（含鍵的順序）的 hash"""
+    version = re.sub(r"[^0-9A-Za-z.]", "_", jsonschema_version())
+    return f"v{CODEGEN_VERSION}-js{version}-{schema_hash(schema)}"
+
+
+def _is_literal(value: Any) -> bool:
+    """可直接以 repr 寫進原始碼的純量（json 允許的 NaN / Infinity 除外）"""
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, (str, int, bool, type(None)))
+
+
+class _Generator:
+    """把一份 schema 產生為原始碼；``$ref`` 指向的定義各自成為一個函式"""
+
+    def __init__(self, root: Any):
+        self.root = root
+        self.constants: List[str] = []
+        self.functions: List[str] = []
+        self.refs: Dict[str, str] = {}
+        self.count = 0
+
+    def source(self) -> str:
+        entry = self.function(self.root)
+        assert entry == "_v0"
+        parts = [_PRELUDE]
+        if self.constants:
+            parts.append("\n".join(self.constants) + "\n")
+        parts.extend(self.functions)
+        return "\n\n".join(parts)
+
+    def constant(self, expr: str) -> str:
+        name = f"_C{len(self.constants)}"
+        self.constants.append(f"{name} = {expr}")
+        return name
+
+    def function(self, schema: Any) -> str:
+        """產生驗證 ``schema`` 的函式，回傳函式名稱"""
+        name = f"_v{self.count}"
+        self.count += 1
+        # 先佔位，子 schema 的函式依產生順序排在後面
+        index = len(self.functions)
+        self.functions.append("")
+        body = self.body(schema)
+        lines = [f"def {name}(x, path, errors):"]
+        lines.extend("    " + line for line in body or ["pass"])
+        self.functions[index] = "\n".join(lines) + "\n"
+        return name
+
+    def call(self, schema: Any, value: str, path: str) -> List[str]:
+        """驗證子 schema 的程式碼；``true`` 與空 schema 不產生任何程式碼"""
+        if schema is True or schema == {}:
+            return []
+        if schema is False:
+            # jsonschema 對 false 子 schema 的錯誤不附加子路徑，沿用目前的 path
+            return [f"_err(errors, path, 'False schema does not allow ' + repr({value}))"]
+        return [f"{self.function(schema)}({value}, {path}, errors)"]
+
+    def ref(self, ref: str) -> str:
+        name = self.refs.get(ref)
+        if name is None:
+            target = self.resolve(ref)
+            # 先登記名稱再產生函式，遞迴引用時才不會無限展開
+            name = self.refs[ref] = f"_v{self.count}"
+            self.function(target)
+        return name
+
+    def resolve(self, ref: str) -> Any:
+        if ref == "#":
+            return self.root
+        if not ref.startswith("#/"):
+            raise UnsupportedSchema(f"不支援的 $ref: {ref!r}")
+        node = self.root
+        for part in ref[2:].split("/"):
+            part = unquote(part).replace("~1", "/").replace("~0", "~")
+            if isinstance(node, dict) and part in node:
+                node = node[part]
+            elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+                node = node[int(part)]
+            else:
+                raise UnsupportedSchema(f"無法解析的 $ref: {ref!r}")
+        return node
+
+    def body(self, schema: Any) -> List[str]:
+        if schema is True:
+            return []
+        if schema is False:
+            return ["_err(errors, path, f'False schema does not allow {x!r}')"]
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"schema 必須是物件或布林值: {schema!r}")
+        if "$ref" in schema:
+            # Draft 7：$ref 旁的關鍵字一律忽略
+            return [f"{self.ref(schema['$ref'])}(x, path, errors)"]
+        if "$id" in schema and schema is not self.root:
+            raise UnsupportedSchema("不支援子 schema 內的 $id")
+
+        lines: List[str] = []
+        # 依 schema 中的順序產生，錯誤順序才會與 jsonschema 相同
+        for keyword, value in schema.items():
+            if keyword in _UNSUPPORTED:
+                raise UnsupportedSchema(f"不支援的關鍵字: {keyword}")
+            handler = getattr(self, f"kw_{keyword}", None)
+            if handler is not None:
+                lines.extend(handler(value, schema))
+        return lines
+
+    # ------------------------------------------------------------ keywords
+
+    def kw_type(self, types: Any, schema: Dict[str, Any]) -> List[str]:
+        types = [types] if isinstance(types, str) else list(types)
+        checks = []
+        for name in types:
+            if name not in _TYPE_CHECKS:
+                raise UnsupportedSchema(f"未知的型別: {name!r}")
+            checks.append(_TYPE_CHECKS[name].format(x="x"))
+        reprs = ", ".join(repr(name) for name in types)
+        message = self.constant(repr(f" is not of type {reprs}"))
+        condition = " or ".join(checks) if checks else "False"
+        return [
+            f"if not ({condition}):",
+            f"    _err(errors, path, repr(x) + {message})",
+        ]
+
+    def kw_required(self, required: List[str], schema: Dict[str, Any]) -> List[str]:
+        if not required:
+            return []
+        lines = ["if isinstance(x, dict):"]
+        for prop in required:
+            lines.append(f"    if {prop!r} not in x:")
+            lines.append(f"        _err(errors, path, {f'{prop!r} is a required property'!r})")
+        return lines
+
+    def kw_properties(self, properties: Dict[str, Any], schema: Dict[str, Any]) -> List[str]:
+        lines = []
+        for prop, subschema in properties.items():
+            call = self.call(subschema, f"x[{prop!r}]", f"path + ({prop!r},)")
+            if call:
+                lines.append(f"    if {prop!r} in x:")
+                lines.extend("        " + line for line in call)
+        return ["if isinstance(x, dict):"] + lines if lines else []
+
+    def kw_additionalProperties(self, ap: Any, schema: Dict[str, Any]) -> List[str]:
+        if ap is True:
+            return []
+        known = self.constant(repr(frozenset(schema.get("properties", {}))))
+        if isinstance(ap, dict):
+            call = self.call(ap, "x[key]", "path + (key,)")
+            if not call:
+                return []
+            return [
+                "if isinstance(x, dict):",
+                "    for key in x:",
+                f"        if key not in {known}:",
+            ] + ["            " + line for line in call]
+        if ap is False:
+            return [
+                "if isinstance(x, dict):",
+                f"    extras = sorted((key for key in x if key not in {known}), key=str)",
+                "    if extras:",
+                "        verb = 'was' if len(extras) == 1 else 'were'",
+                "        _err(errors, path, 'Additional properties are not allowed (%s %s unexpected)'"
+                " % (', '.join(repr(key) for key in extras), verb))",
+            ]
+        raise UnsupportedSchema(f"不支援的 additionalProperties: {ap!r}")
+
+    def kw_items(self, items: Any, schema: Dict[str, Any]) -> List[str]:
+        if isinstance(items, list):
+            lines = []
+            for index, subschema in enumerate(items):
+                call = self.call(subschema, f"x[{index}]", f"path + ({index},)")
+                if call:
+                    lines.append(f"    if len(x) > {index}:")
+                    lines.extend("        " + line for line in call)
+            return ["if isinstance(x, list):"] + lines if lines else []
+        call = self.call(items, "item", "path + (index,)")
+        if not call:
+            return []
+        return [
+            "if isinstance(x, list):",
+            "    for index, item in enumerate(x):",
+        ] + ["        " + line for line in call]
+
+    def kw_pattern(self, pattern: str, schema: Dict[str, Any]) -> List[str]:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            # 交給 jsonschema，拋出與原本相同的錯誤
+            raise UnsupportedSchema(f"無效的 pattern: {pattern!r}") from e
+        compiled = self.constant(f"re.compile({pattern!r})")
+        message = self.constant(repr(f" does not match {pattern!r}"))
+        return [
+            f"if isinstance(x, str) and not {compiled}.search(x):",
+            f"    _err(errors, path, repr(x) + {message})",
+        ]
+
+    def kw_enum(self, enum: List[Any], schema: Dict[str, Any]) -> List[str]:
+        if not all(_is_literal(value) for value in enum):
+            raise UnsupportedSchema("enum 只支援純量值")
+        values = self.constant(repr(tuple(enum)))
+        message = self.constant(repr(f" is not one of {enum!r}"))
+        return [
+            f"if not any(_equal(x, value) for value in {values}):",
+            f"    _err(errors, path, repr(x) + {message})",
+        ]
+
+    def kw_const(self, const: Any, schema: Dict[str, Any]) -> List[str]:
+        if not _is_literal(const):
+            raise UnsupportedSchema("const 只支援純量值")
+        return [
+            f"if not _equal(x, {const!r}):",
+            f"    _err(errors, path, {f'{const!r} was expected'!r})",
+        ]
+
+    def _length(self, kind: str, limit: int, too_short: bool) -> List[str]:
+        op = "<" if too_short else ">"
+        if too_short:
+            message = "should be non-empty" if limit == 1 else "is too short"
+        else:
+            message = "is expected to be empty" if limit == 0 else "is too long"
+        return [
+            f"if isinstance(x, {kind}) and len(x) {op} {limit!r}:",
+            f"    _err(errors, path, repr(x) + {' ' + message!r})",
+        ]
+
+    def kw_minLength(self, limit: int, schema: Dict[str, Any]) -> List[str]:
+        return self._length("str", limit, True)
+
+    def kw_maxLength(self, limit: int, schema: Dict[str, Any]) -> List[str]:
+        return self._length("str", limit, False)
+
+    def kw_minItems(self, limit: int, schema: Dict[str, Any]) -> List[str]:
+        return self._length("list", limit, True)
+
+    def kw_maxItems(self, limit: int, schema: Dict[str, Any]) -> List[str]:
+        return self._length("list", limit, False)
+
+
+def generate_source(schema: Any) -> str:
+    """
+    產生驗證 ``schema`` 的 Python 原始碼
+
+    原始碼定義 ``validate(instance, limit=None)``，回傳 ``[(路徑 tuple, 訊息), ...]``，
+    收集到 ``limit`` 個錯誤即停止。
+
+    Raises:
+        UnsupportedSchema: schema 用到不支援的關鍵字
+    """
+    return _Generator(schema).source()
+
+
+def _load(source: str, filename: str) -> CompiledSchema:
+    namespace: Dict[str, Any] = {"__name__": "md2word_generated_validator"}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["validate"]
+
+
+def compile_schema(schema: Any, cache_dir: Optional[str] = None) -> CompiledSchema:
+    """
+    取得 schema 的驗證函式
+
+    依序查行程內快取、磁碟快取，都沒有時產生原始碼並（原子地）寫入磁碟快取；
+    快取目錄無法寫入時仍回傳函式，只是下次要重新產生。
+
+    Raises:
+        UnsupportedSchema: schema 用到不支援的關鍵字
+    """
+    key = schema_key(schema)
+    with _LOADED_LOCK:
+        func = _LOADED.get(key)
+    if func is not None:
+        return func
+
+    path = Path(cache_dir or default_cache_dir()) / f"{key}.py"
+    try:
+        source = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        source = None
+    if source is not None:
+        try:
+            func = _load(source, str(path))
+        except Exception:
+            # 損毀的快取檔：重新產生並覆寫
+            func = None
+    if func is None:
+        source = generate_source(schema)
+        func = _load(source, str(path))
+        try:
+            from ..utils.file_utils import FileUtils
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            FileUtils.atomic_write_bytes(str(path), source.encode("utf-8"))
+        except OSError:
+            pass
+
+    with _LOADED_LOCK:
+        return _LOADED.setdefault(key, func)
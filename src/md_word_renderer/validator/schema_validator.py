@@ -2,13 +2,81 @@
 Schema 驗證器
 
 使用 JSON Schema 驗證 Markdown 解析後的資料結構
+
+- 編譯好的 ``Draft7Validator`` 依 schema 內容的 hash 快取於行程內，批次中每個檔案
+  建立 ``SchemaValidator()`` 時共用同一個，不再重新建立
+- 只要求「資料為物件」的寬鬆 schema（預設 schema 即是）對 dict 直接通過，不走訪資料，
+  也不建立驗證器；遇到非 dict 的資料才建立
+- ``max_errors`` 收集到指定數量的錯誤後即停止；預設不限，渲染時的驗證（``render_validator``）
+  以 ``CLI_MAX_ERRORS`` 設上限
+- ``compiled=True`` 改用由 schema 產生的 Python 驗證函式（見 ``codegen``），錯誤訊息不變；
+  schema 用到不支援的關鍵字時退回 jsonschema。jsonschema 在需要時才 import
 """
 
+import hashlib
 import json
+import threading
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, Tuple, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, Tuple, List, Optional
+
+if TYPE_CHECKING:
+    from jsonschema import Draft7Validator
+
+
+# 預設最多收集的錯誤數；None 表示不限
+DEFAULT_MAX_ERRORS = None
+
+# CLI（render 的 --validate、validate 指令）最多收集的錯誤數
+CLI_MAX_ERRORS = 100
+
+# 不影響驗證結果的 schema 關鍵字
+_ANNOTATION_KEYS = frozenset({
+    "$schema", "$id", "$comment", "title", "description", "definitions", "examples", "default",
+})
+
+_COMPILED: Dict[str, "Draft7Validator"] = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """
+    schema 內容的 hash
+
+    不排序鍵：關鍵字的順序決定錯誤的順序，只差在鍵順序的兩份 schema 不能共用驗證器。
+    """
+    text = json.dumps(schema, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-from jsonschema import validate, ValidationError, Draft7Validator
+
+def compiled_validator(schema: Dict[str, Any]) -> "Draft7Validator":
+    """取得 schema 對應的 ``Draft7Validator``；相同內容的 schema 在行程內只編譯一次"""
+    from jsonschema import Draft7Validator
+
+    key = schema_hash(schema)
+    with _COMPILED_LOCK:
+        validator = _COMPILED.get(key)
+        if validator is None:
+            validator = _COMPILED[key] = Draft7Validator(schema)
+    return validator
+
+
+def is_permissive(schema: Dict[str, Any]) -> bool:
+    """
+    schema 是否只要求資料為物件（任何 dict 都會通過）
+
+    根層只有註解類關鍵字、``type: object`` 與 ``additionalProperties: true`` 時成立；
+    ``definitions`` 未被根層引用，不影響結果。
+    """
+    for key, value in schema.items():
+        if key in _ANNOTATION_KEYS:
+            continue
+        if key == "type" and value == "object":
+            continue
+        if key == "additionalProperties" and value is True:
+            continue
+        return False
+    return True
 
 
 class SchemaValidator:
@@ -24,15 +92,44 @@ class SchemaValidator:
         ...     print(errors)
     """
     
-    def __init__(self, schema_path: Optional[str] = None):
+    def __init__(self, schema_path: Optional[str] = None,
+                 max_errors: Optional[int] = DEFAULT_MAX_ERRORS,
+                 compiled: bool = False):
         """
         初始化驗證器
         
         Args:
             schema_path: JSON Schema 檔案路徑，若為 None 則使用預設 Schema
+            max_errors: 最多收集的錯誤數，達到後停止驗證；None 或 0 表示不限
+            compiled: 使用由 schema 產生、快取於磁碟的 Python 驗證函式
+        """
+        self.max_errors = max_errors or None
+        self.compiled = compiled
+        self.load_schema(schema_path)
+    
+    def load_schema(self, schema_path: Optional[str]) -> None:
+        """
+        改用另一份 Schema
+        
+        Args:
+            schema_path: Schema 檔案路徑，若為 None 則使用預設 Schema
         """
         self.schema = self._load_schema(schema_path)
-        self.validator = Draft7Validator(self.schema)
+        self.permissive = is_permissive(self.schema)
+        self.generated = None
+        self.validator = None
+        if self.permissive:
+            # dict 直接通過；非 dict 的資料才在 validate() 建立驗證器
+            return
+        if self.compiled:
+            from .codegen import UnsupportedSchema, compile_schema
+
+            try:
+                self.generated = compile_schema(self.schema)
+            except UnsupportedSchema:
+                pass
+        if self.generated is None:
+            self.validator = compiled_validator(self.schema)
     
     def validate(self, data: Dict[str, Any]) -> Tuple[bool, List[str]]:
         """
@@ -42,11 +139,23 @@ class SchemaValidator:
             data: 解析後的資料字典
             
         Returns:
-            tuple: (是否通過, 錯誤訊息列表)
+            tuple: (是否通過, 錯誤訊息列表)；錯誤達 ``max_errors`` 個時只列出前面這些
         """
+        if self.permissive and isinstance(data, dict):
+            return True, []
+        
         errors = []
         
-        for error in self.validator.iter_errors(data):
+        if self.validator is None and self.generated is None:
+            self.validator = compiled_validator(self.schema)
+        
+        if self.generated is not None:
+            for path, message in self.generated(data, self.max_errors):
+                error_path = '.'.join(str(p) for p in path) if path else 'root'
+                errors.append(f"[{error_path}] {message}")
+            return len(errors) == 0, errors
+        
+        for error in islice(self.validator.iter_errors(data), self.max_errors):
             error_path = '.'.join(str(p) for p in error.path) if error.path else 'root'
             errors.append(f"[{error_path}] {error.message}")
         
@@ -62,6 +171,8 @@ class SchemaValidator:
         Raises:
             ValidationError: 驗證失敗
         """
+        from jsonschema import validate
+        
         validate(instance=data, schema=self.schema)
     
     def _load_schema(self, schema_path: Optional[str]) -> Dict[str, Any]:
@@ -97,3 +208,8 @@ class SchemaValidator:
             "additionalProperties": True,
             "description": "Markdown 資料結構 Schema"
         }
+
+
+def render_validator() -> SchemaValidator:
+    """渲染前的資料驗證（``process_one`` 與批次 worker 共用）：預設 schema，最多 ``CLI_MAX_ERRORS`` 個錯誤"""
+    return SchemaValidator(max_errors=CLI_MAX_ERRORS)
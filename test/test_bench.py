@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+效能量測套件測試
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.bench import SCENARIOS, compare_results, run_suite, write_scenario
+from md_word_renderer.bench.synthetic import DEEP_LEVELS, IMAGE_NAME
+from md_word_renderer.cli.main import cli
+from md_word_renderer.parser import MarkdownParser
+
+
+def _results(**medians):
+    return {"cases": {name: {"size": 10, "median_s": s} for name, s in medians.items()}}
+
+
+class TestSynthetic(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def parse(self, scenario, size):
+        paths = write_scenario(str(self.work), scenario, size)
+        for key in ('docx', 'xlsx'):
+            self.assertTrue(Path(paths[key]).exists())
+        return MarkdownParser().parse(paths['input'])
+
+    def test_shapes(self):
+        self.assertEqual(len([k for k in self.parse('wide', 30) if not k.startswith('#')]), 30)
+        self.assertEqual(len(self.parse('list', 250)['清單']), 250)
+        self.assertIn('\n', self.parse('multiline', 2)['說明1'])
+
+        node, depth = {'children': self.parse('deep', 1)['樹1']}, 1
+        while node['children']:
+            node, depth = node['children'][0], depth + 1
+        self.assertEqual(depth, DEEP_LEVELS)
+
+        images = self.parse('images', 5)['圖片']
+        self.assertEqual({item['type'] for item in images}, {'image'})
+        self.assertEqual({Path(item['image_path']).name for item in images}, {IMAGE_NAME})
+
+    def test_every_scenario_renders(self):
+        from md_word_renderer.renderer.factory import build_renderer
+
+        for scenario in SCENARIOS:
+            paths = write_scenario(str(self.work), scenario, 3)
+            data = MarkdownParser().parse(paths['input'])
+            for fmt in ('docx', 'xlsx'):
+                with self.subTest(scenario=scenario, fmt=fmt):
+                    renderer = build_renderer(template_path=paths[fmt], format_hint=fmt)
+                    renderer.load_template(paths[fmt])
+                    renderer.render(data)
+                    self.assertTrue(renderer.to_bytes())
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_tolerance(self):
+        rows = compare_results(_results(a=1.05, b=1.2, c=0.5, d=1.0),
+                               _results(a=1.0, b=1.0, c=1.0, e=1.0), tolerance=0.1)
+        status = {row['name']: row['status'] for row in rows}
+        self.assertEqual(status, {'a': 'ok', 'b': 'regressed', 'c': 'improved',
+                                  'd': 'new', 'e': 'missing'})
+
+    def test_different_size_is_not_compared(self):
+        current = _results(a=2.0)
+        current['cases']['a']['size'] = 20
+        self.assertEqual(compare_results(current, _results(a=1.0))[0]['status'], 'incomparable')
+
+
+class TestBenchCli(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def bench(self, *argv):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(['bench', '--scale', '0.01', '--repeat', '1', '--only', 'parse/*', *argv])
+        return result, buf.getvalue()
+
+    def test_results_and_baseline(self):
+        output = self.work / 'bench.json'
+        result, _ = self.bench('-o', str(output))
+        self.assertEqual(result, 0)
+        data = json.loads(output.read_text(encoding='utf-8'))
+        self.assertEqual(set(data['cases']), {f'parse/{s}' for s in SCENARIOS})
+        self.assertIn('python', data['environment'])
+
+        # 把基準改成快很多：本次必定判定為變慢
+        for case in data['cases'].values():
+            case['median_s'] /= 100
+        output.write_text(json.dumps(data), encoding='utf-8')
+        result, out = self.bench('--baseline', str(output))
+        self.assertEqual(result, 1)
+        self.assertIn('變慢', out)
+
+    def test_run_suite_batch(self):
+        results = run_suite(str(self.work), scale=0.01, repeat=1, patterns=['batch/docx'])
+        case = results['cases']['batch/docx']
+        self.assertEqual(case['size'], 2)
+        self.assertEqual(len(list((self.work / 'batch_docx' / 'batch_out_docx').glob('*.docx'))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
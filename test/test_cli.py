@@ -5,10 +5,12 @@ CLI 測試
 測試命令列工具的各種功能
 """
 
+import io
 import os
 import sys
 import unittest
 import tempfile
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # 添加 src 到路徑
@@ -52,6 +54,19 @@ class TestCLI(unittest.TestCase):
         result = cli(['validate', str(self.sample_md)])
         self.assertEqual(result, 0)
     
+    def test_validate_custom_schema_max_errors(self):
+        """測試 validate 指令 - 自訂 Schema 與錯誤數上限"""
+        if not self.sample_md.exists():
+            self.skipTest(f"測試檔案不存在: {self.sample_md}")
+        schema = Path(self.temp_dir) / 'numbers_only.json'
+        schema.write_text('{"type": "object", "additionalProperties": {"type": "number"}}',
+                          encoding='utf-8')
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(['validate', str(self.sample_md), '--schema', str(schema), '--max-errors', '2'])
+        self.assertEqual(result, 1)
+        self.assertIn('列出前 2 個問題', buf.getvalue())
+    
     def test_validate_missing_file(self):
         """測試 validate 指令 - 檔案不存在"""
         result = cli(['validate', 'nonexistent_file.md'])
@@ -189,5 +204,122 @@ class TestBatchCommand(unittest.TestCase):
         self.assertEqual(result, 1)
 
 
+class TestDaemon(unittest.TestCase):
+    """常駐 daemon 測試"""
+
+    @classmethod
+    def setUpClass(cls):
+        from md_word_renderer.cli import daemon
+
+        if not daemon.HAS_UNIX_SOCKET:
+            raise unittest.SkipTest("此平台不支援 Unix socket")
+        cls.test_dir = Path(__file__).parent.parent
+        cls.sample_md = cls.test_dir / 'referance' / 'sample_data.md'
+        cls.template = cls.test_dir / 'templates' / 'simple_template.docx'
+        cls.temp_dir = tempfile.mkdtemp()
+
+    def setUp(self):
+        if not self.sample_md.exists() or not self.template.exists():
+            self.skipTest("測試檔案不存在")
+
+    def _start_daemon(self, socket_path):
+        import threading
+        import time
+        from md_word_renderer.cli.daemon import RenderDaemon, is_running
+
+        daemon = RenderDaemon(socket_path=socket_path)
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        for _ in range(100):
+            if is_running(socket_path):
+                break
+            time.sleep(0.05)
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(daemon.shutdown)
+        return daemon
+
+    def test_render_via_daemon(self):
+        """render 交由 daemon 處理，樣板只讀取一次"""
+        socket_path = str(Path(self.temp_dir) / 'render.sock')
+        daemon = self._start_daemon(socket_path)
+
+        for name in ('daemon_1.docx', 'daemon_2.docx'):
+            output_path = Path(self.temp_dir) / name
+            result = cli([
+                'render', str(self.sample_md), str(self.template), str(output_path),
+                '--socket', socket_path,
+            ])
+            self.assertEqual(result, 0)
+            self.assertTrue(output_path.exists())
+
+        stats = daemon.stats()
+        self.assertEqual(stats['jobs'], 2)
+        self.assertEqual(stats['template_cache']['misses'], 1)
+        self.assertEqual(stats['template_cache']['hits'], 1)
+
+    def test_daemon_reports_errors(self):
+        """daemon 渲染失敗時回傳錯誤，不會結束服務"""
+        from md_word_renderer.cli.daemon import DaemonError, is_running, render_via_daemon
+
+        socket_path = str(Path(self.temp_dir) / 'error.sock')
+        self._start_daemon(socket_path)
+
+        with self.assertRaises(DaemonError):
+            render_via_daemon(
+                str(Path(self.temp_dir) / 'missing.md'), str(self.template),
+                str(Path(self.temp_dir) / 'never.docx'), socket_path=socket_path,
+            )
+        self.assertTrue(is_running(socket_path))
+
+    def test_unresponsive_daemon_falls_back(self):
+        """daemon 卡住（接受連線但不回應）時逾時並改在本行程內渲染"""
+        import socket as socket_mod
+        import time
+        from unittest import mock
+
+        socket_path = str(Path(self.temp_dir) / 'wedged.sock')
+        wedged = socket_mod.socket(socket_mod.AF_UNIX, socket_mod.SOCK_STREAM)
+        self.addCleanup(wedged.close)
+        wedged.bind(socket_path)
+        wedged.listen(1)  # 連線進入 backlog，但永遠不會被處理
+
+        output_path = Path(self.temp_dir) / 'wedged.docx'
+        buf = io.StringIO()
+        start = time.perf_counter()
+        with mock.patch.dict(os.environ, {'MD2WORD_DAEMON_TIMEOUT': '0.3'}), redirect_stdout(buf):
+            result = cli([
+                'render', str(self.sample_md), str(self.template), str(output_path),
+                '--socket', socket_path,
+            ])
+        self.assertEqual(result, 0)
+        self.assertTrue(output_path.exists())
+        self.assertIn('未回應', buf.getvalue())
+        self.assertLess(time.perf_counter() - start, 30)
+
+    def test_fallback_without_daemon(self):
+        """沒有 daemon 時改在本行程內渲染"""
+        socket_path = str(Path(self.temp_dir) / 'absent.sock')
+        output_path = Path(self.temp_dir) / 'fallback.docx'
+        result = cli([
+            'render', str(self.sample_md), str(self.template), str(output_path),
+            '--socket', socket_path,
+        ])
+        self.assertEqual(result, 0)
+        self.assertTrue(output_path.exists())
+
+    def test_stale_socket_is_replaced(self):
+        """上次異常結束留下的 socket 檔不影響啟動"""
+        import socket as socket_mod
+        from md_word_renderer.cli.daemon import is_running
+
+        socket_path = str(Path(self.temp_dir) / 'stale.sock')
+        stale = socket_mod.socket(socket_mod.AF_UNIX, socket_mod.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        self._start_daemon(socket_path)
+        self.assertTrue(is_running(socket_path))
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
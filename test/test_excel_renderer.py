@@ -3,6 +3,7 @@
 測試 ExcelRenderer 與相關輔助元件（v2.2.1：樣板為主 + Jinja2 模板）
 """
 
+import re
 import sys
 from pathlib import Path
 
@@ -20,6 +21,15 @@ except ImportError:
 
 requires_openpyxl = pytest.mark.skipif(not HAS_OPENPYXL, reason="openpyxl 不可用")
 
+try:
+    from PIL import Image as PILImage
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+requires_pil = pytest.mark.skipif(not HAS_PIL, reason="Pillow 不可用")
+
 
 # --------------------------------------------------------------- layout
 
@@ -128,6 +138,178 @@ class TestExcelImageHandler:
         with pytest.raises(ExcelImageError):
             h.embed(ws, "A1", str(tmp_path / "missing.png"))
 
+    @requires_openpyxl
+    @requires_pil
+    def test_same_image_loaded_once_and_written_once(self, tmp_path):
+        import zipfile
+        from md_word_renderer.renderer.excel_image_handler import (
+            ExcelImageHandler,
+            save_workbook_dedup,
+        )
+        first = tmp_path / "a.png"
+        copy = tmp_path / "copy.png"
+        other = tmp_path / "b.png"
+        PILImage.new("RGB", (800, 600), "red").save(first)
+        copy.write_bytes(first.read_bytes())
+        PILImage.new("RGB", (20, 10), "blue").save(other)
+
+        h = ExcelImageHandler(max_width_px=400, max_height_px=400)
+        wb = Workbook()
+        ws = wb.active
+        for row in range(1, 6):
+            info = h.embed(ws, f"B{row}", str(first))
+        h.embed(ws, "B6", str(copy))
+        h.embed(wb.create_sheet("other"), "A1", str(other))
+
+        assert (info["width"], info["height"]) == (400, 300)
+        # 內容相同的兩個檔案共用同一份快取
+        assert len(h._blobs) == 2
+
+        out = tmp_path / "out.xlsx"
+        save_workbook_dedup(wb, str(out))
+        with zipfile.ZipFile(out) as archive:
+            media = [n for n in archive.namelist() if n.startswith("xl/media/")]
+            rels = archive.read("xl/drawings/_rels/drawing1.xml.rels").decode("utf-8")
+            targets = re.findall(r'Target="([^"]+)"', rels)
+            # 第一個工作表的 6 個 anchor 都指向同一個 media 檔
+            assert len(targets) == 6
+            assert len(set(targets)) == 1
+            shared = archive.read(targets[0].lstrip("/"))
+        assert len(media) == 2
+        assert shared == first.read_bytes()
+
+        wb2 = load_workbook(str(out))
+        assert len(wb2.active._images) == 6
+        assert len(wb2["other"]._images) == 1
+        assert {img._data() for img in wb2.active._images} == {shared}
+
+    @requires_openpyxl
+    @requires_pil
+    def test_unsupported_openpyxl_falls_back_to_plain_save(self, tmp_path, monkeypatch):
+        import zipfile
+        from md_word_renderer.renderer import excel_image_handler
+        from md_word_renderer.renderer.excel_image_handler import (
+            ExcelImageHandler,
+            dedup_supported,
+            save_workbook_dedup,
+        )
+        # 安裝的 openpyxl 應在 requirements.txt 釘住的範圍內
+        assert dedup_supported()
+        assert dedup_supported("3.1.5")
+        assert not dedup_supported("3.2.0")
+        assert not dedup_supported("4.0")
+        assert not dedup_supported(None)
+
+        image = tmp_path / "a.png"
+        PILImage.new("RGB", (20, 10), "red").save(image)
+        h = ExcelImageHandler()
+        wb = Workbook()
+        for row in range(1, 4):
+            h.embed(wb.active, f"A{row}", str(image))
+
+        monkeypatch.setattr(excel_image_handler, "dedup_supported", lambda: False)
+        out = tmp_path / "out.xlsx"
+        save_workbook_dedup(wb, str(out))
+        media = [n for n in zipfile.ZipFile(out).namelist() if n.startswith("xl/media/")]
+        assert len(media) == 3
+        assert len(load_workbook(str(out)).active._images) == 3
+
+
+# ---------------------------------------------------- style registry
+
+
+class TestStyleRegistry:
+    @requires_openpyxl
+    def test_wrap_text_reuses_single_alignment_id(self):
+        from md_word_renderer.renderer.excel_styles import get_style_registry
+        wb = Workbook()
+        ws = wb.active
+        registry = get_style_registry(wb)
+        assert get_style_registry(wb) is registry
+
+        before = len(wb._alignments)
+        for r in range(1, 201):
+            registry.apply_wrap_text(ws.cell(row=r, column=1, value="a\nb"))
+        assert len(wb._alignments) == before + 1
+        assert ws["A1"].alignment.wrap_text is True
+        assert ws["A200"].alignment.wrap_text is True
+
+    @requires_openpyxl
+    def test_wrap_text_keeps_existing_alignment(self):
+        from openpyxl.styles import Alignment
+        from md_word_renderer.renderer.excel_styles import get_style_registry
+        wb = Workbook()
+        ws = wb.active
+        ws["A1"].alignment = Alignment(horizontal="center")
+        get_style_registry(wb).apply_wrap_text(ws["A1"])
+        assert ws["A1"].alignment.wrap_text is True
+        assert ws["A1"].alignment.horizontal == "center"
+
+    @requires_openpyxl
+    def test_capture_and_apply_copy_style_ids(self):
+        from openpyxl.styles import Font
+        from md_word_renderer.renderer.excel_styles import StyleRegistry
+        wb = Workbook()
+        ws = wb.active
+        ws["A1"].font = Font(bold=True)
+        style = StyleRegistry.capture(ws["A1"])
+        StyleRegistry.apply(ws["B1"], style)
+        assert ws["B1"].font.bold is True
+        # 各 cell 持有獨立副本：修改 B1 不影響 A1
+        ws["B1"].font = Font(italic=True)
+        assert ws["A1"].font.bold is True
+        assert StyleRegistry.capture(ws["C1"]) is None
+
+
+# ---------------------------------------------------- column widths
+
+
+class TestColumnWidthTracker:
+    @requires_openpyxl
+    def test_display_width_counts_wide_chars_twice(self):
+        from md_word_renderer.renderer.excel_columns import display_width
+        assert display_width("abc") == 3
+        assert display_width("中文") == 4
+        assert display_width("ab中") == 4
+        assert display_width("short\n變更單號內容") == 12
+        assert display_width(12345) == 5
+        assert display_width(None) == 0
+
+    @requires_openpyxl
+    def test_tracker_keeps_max_per_column(self):
+        from md_word_renderer.renderer.excel_columns import ColumnWidthTracker
+        wb = Workbook()
+        ws = wb.active
+        ws["C1"] = "x"
+        widths = ColumnWidthTracker()
+        widths.observe(ws, 1, "a" * 20)
+        widths.observe(ws, 1, "b")
+        widths.observe(ws, 2, "中" * 10)
+        widths.apply(ws)
+        assert ws.column_dimensions["A"].width == 22.0
+        assert ws.column_dimensions["B"].width == 22.0
+        # 沒有記錄的欄位套最小寬度
+        assert ws.column_dimensions["C"].width == 8.0
+
+    @requires_openpyxl
+    def test_renderer_auto_fit_uses_rendered_values(self, tmp_path):
+        from md_word_renderer.renderer.excel_renderer import ExcelRenderer
+
+        wb_path = tmp_path / "tpl.xlsx"
+        wb = Workbook()
+        s = wb.active
+        s.title = "Header"
+        s["A1"], s["B1"] = "field", "{{a_rather_long_placeholder_name}}"
+        wb.save(wb_path)
+
+        out = tmp_path / "out.xlsx"
+        data = {"a_rather_long_placeholder_name": "中文系統名稱"}
+        ExcelRenderer().render_to_file(data, str(wb_path), str(out))
+        sheet = load_workbook(str(out))["Header"]
+        assert sheet.column_dimensions["A"].width == 8.0
+        # 6 個全形字 → 12 + padding 2；不以 placeholder 長度計
+        assert sheet.column_dimensions["B"].width == 14.0
+
 
 # ---------------------------------------------------- template engine (Phase 1)
 
@@ -342,6 +524,120 @@ class TestPhase3ForLoop:
                     assert "{%" not in cell.value
 
 
+    @requires_openpyxl
+    def test_expand_does_not_mutate_parent_context(self, tmp_path):
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        from openpyxl import Workbook
+        wb = Workbook()
+        s = wb.active
+        s["A1"] = "{% for x in items %}"
+        s["A2"] = "{{x}}-{{loop.first}}-{{loop.last}}-{{name}}"
+        s["A3"] = "{% endfor %}"
+
+        context = {"data": {}, "items": ["a", "b"], "name": "N"}
+        engine = ExcelTemplateEngine()
+        engine.expand_for_loops(s, context, {})
+
+        values = [s.cell(row=r, column=1).value for r in range(1, s.max_row + 1)]
+        assert [v for v in values if v] == ["a-True-False-N", "b-False-True-N"]
+        # loop 變數只推入上層 layer，不應寫回原 context
+        assert set(context) == {"data", "items", "name"}
+
+    @requires_openpyxl
+    def test_render_cell_accepts_layered_context(self):
+        from collections import ChainMap
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        engine = ExcelTemplateEngine()
+        ctx = ChainMap({"x": "top"}, {"x": "base", "y": "base-y"})
+        assert engine.render_cell("{{x}}/{{y}}", ctx) == "top/base-y"
+        # env.globals（如 range）仍可使用
+        assert engine.render_cell("{{ range(3) | list | length }}", ctx) == "3"
+
+
+    @requires_openpyxl
+    def test_expand_propagates_body_row_styles(self, tmp_path):
+        from openpyxl.styles import Border, Font, PatternFill, Side
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        wb = Workbook()
+        s = wb.active
+        s["A1"] = "header"
+        s["A2"] = "{% for x in items %}"
+        s["A3"] = "{{x.number}}"
+        s["B3"] = "{{x.value}}"
+        s["A3"].font = Font(bold=True)
+        s["B3"].fill = PatternFill(start_color="FFFFFF00", end_color="FFFFFF00", fill_type="solid")
+        s["B3"].number_format = "0.00"
+        s["B3"].border = Border(bottom=Side(style="thin"))
+        s.row_dimensions[3].height = 30
+        s.merge_cells("B3:C3")
+        s["A4"] = "{% endfor %}"
+        wb.save(str(tmp_path / "tpl.xlsx"))
+
+        wb2 = load_workbook(str(tmp_path / "tpl.xlsx"))
+        s2 = wb2.active
+        items = [{"number": "1", "value": 1.5}, {"number": "2", "value": 2.5}]
+        ExcelTemplateEngine().expand_for_loops(s2, {"data": {}, "items": items}, {})
+        wb2.save(str(tmp_path / "out.xlsx"))
+
+        s3 = load_workbook(str(tmp_path / "out.xlsx")).active
+        rows = [r for r in range(1, s3.max_row + 1) if s3.cell(row=r, column=1).value in ("1", "2")]
+        assert len(rows) == 2
+        for r in rows:
+            assert s3.cell(row=r, column=1).font.bold is True
+            assert s3.cell(row=r, column=2).fill.start_color.rgb == "FFFFFF00"
+            assert s3.cell(row=r, column=2).number_format == "0.00"
+            assert s3.cell(row=r, column=2).border.bottom.style == "thin"
+            assert s3.row_dimensions[r].height == 30
+        # 每組產生的列各自重建合併範圍；樣板 body 的原範圍不殘留
+        assert {str(m) for m in s3.merged_cells.ranges} == {f"B{r}:C{r}" for r in rows}
+
+    @requires_openpyxl
+    def test_resolve_list_expr_supports_jinja_expressions(self):
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        engine = ExcelTemplateEngine()
+        children = [{"value": "a"}, {"value": ""}, {"value": "c"}]
+        data = {"#3": {"key": "cases", "value": "", "children": children}, "cases": children}
+        ctx = {"data": data, "cases": children, "case": {"children": children}}
+
+        assert engine._resolve_list_expr('data["#3"].children', ctx, data) == children
+        assert engine._resolve_list_expr('data["cases"]', ctx, data) == children
+        assert engine._resolve_list_expr("case.children", ctx, data) == children
+        assert engine._resolve_list_expr("cases[:2]", ctx, data) == children[:2]
+        assert engine._resolve_list_expr(
+            'cases | selectattr("value")', ctx, data
+        ) == [children[0], children[2]]
+        # dict entry → children；字串 / 缺變數 / 語法錯誤 → []
+        assert engine._resolve_list_expr('data["#3"]', ctx, data) == children
+        assert engine._resolve_list_expr('data["#3"].key', ctx, data) == []
+        assert engine._resolve_list_expr("missing", ctx, data) == []
+        assert engine._resolve_list_expr("cases[", ctx, data) == []
+
+    @requires_openpyxl
+    def test_resolve_list_expr_falls_back_to_data_argument(self):
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        engine = ExcelTemplateEngine()
+        data = {"items": [1, 2]}
+        assert engine._resolve_list_expr('data["items"]', {}, data) == [1, 2]
+
+    @requires_openpyxl
+    def test_compiled_expressions_and_cells_are_cached(self):
+        from md_word_renderer.renderer.excel_template_engine import ExcelTemplateEngine
+        engine = ExcelTemplateEngine()
+        assert engine._resolve_list_expr("items", {"items": [1]}, {}) == [1]
+        compiled = engine._expr_cache["items"]
+        assert engine._resolve_list_expr("items", {"items": [2]}, {}) == [2]
+        assert engine._expr_cache["items"] is compiled
+
+        assert engine.render_cell("{{x}}", {"x": 1}) == "1"
+        template = engine._template_cache["{{x}}"]
+        assert engine.render_cell("{{x}}", {"x": 2}) == "2"
+
+        # 快取為行程層級：另一個引擎（例如 batch 的下一個檔案）直接沿用
+        other = ExcelTemplateEngine(missing_variable="keep")
+        assert other.env is engine.env
+        assert other._template_cache["{{x}}"] is template
+
+
 # ---------------------------------------------------- renderer integration
 
 
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+"""
+HTTP 渲染服務測試
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import sys
+import threading
+import unittest
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.http_server import RenderService, TemplateRegistry
+from md_word_renderer.utils.metrics import Histogram, MetricsRegistry
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """指標輸出"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value)
+        self.assertEqual([total for _, total in hist.cumulative()], [2, 3, 4])
+        self.assertEqual(hist.quantile(0.5), 0.1)
+
+    def test_prometheus_text(self):
+        metrics = MetricsRegistry(prefix="t", buckets=(0.5,))
+        metrics.inc("requests_total", {"route": "/render"})
+        metrics.observe("latency_seconds", 0.2, {"route": "/render"})
+        text = metrics.to_prometheus()
+        self.assertIn('t_requests_total{route="/render"} 1', text)
+        self.assertIn('t_latency_seconds_bucket{route="/render",le="0.5"} 1', text)
+        self.assertIn('t_latency_seconds_bucket{route="/render",le="+Inf"} 1', text)
+        self.assertIn('t_latency_seconds_count{route="/render"} 1', text)
+
+
+class TestRenderService(unittest.TestCase):
+    """端對端：以真實 process pool 渲染"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sample_md = ROOT / 'referance' / 'sample_data.md'
+        docx = ROOT / 'templates' / 'simple_template.docx'
+        xlsx = ROOT / 'templates' / 'excel' / 'sample_template.xlsx'
+        if not (cls.sample_md.exists() and docx.exists() and xlsx.exists()):
+            raise unittest.SkipTest("測試檔案不存在")
+
+        registry = TemplateRegistry()
+        registry.register('simple', str(docx))
+        registry.register('sheet', str(xlsx))
+        registry.register('報告', str(docx))
+        cls.service = RenderService(registry, port=0, workers=1, queue_size=1)
+
+        cls.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(cls.loop)
+            cls.loop.run_until_complete(cls.service.start())
+            ready.set()
+            cls.loop.run_forever()
+            pending = asyncio.all_tasks(cls.loop)
+            for task in pending:
+                task.cancel()
+            cls.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            cls.loop.close()
+
+        cls.thread = threading.Thread(target=run, daemon=True)
+        cls.thread.start()
+        ready.wait(10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.service.close)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(5)
+
+    def request(self, method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection('127.0.0.1', self.service.port, timeout=60)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def test_render_markdown_to_docx(self):
+        status, headers, body = self.request(
+            'POST', '/render/simple', self.sample_md.read_bytes(),
+            {'Content-Type': 'text/markdown'},
+        )
+        self.assertEqual(status, 200)
+        self.assertIn('wordprocessingml', headers['Content-Type'])
+        self.assertIn('word/document.xml', zipfile.ZipFile(BytesIO(body)).namelist())
+
+    def test_render_json_to_xlsx(self):
+        data = {'系統名稱': '測試系統', '需求單位': 'IT'}
+        status, headers, body = self.request(
+            'POST', '/render/sheet?validate=0', json.dumps(data).encode('utf-8'),
+            {'Content-Type': 'application/json'},
+        )
+        self.assertEqual(status, 200)
+        self.assertIn('spreadsheetml', headers['Content-Type'])
+        self.assertIn('xl/workbook.xml', zipfile.ZipFile(BytesIO(body)).namelist())
+
+    def test_non_ascii_template_id(self):
+        status, headers, body = self.request(
+            'POST', '/render/' + quote('報告'), self.sample_md.read_bytes(),
+            {'Content-Type': 'text/markdown'},
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Disposition'],
+                         "attachment; filename=\"__.docx\"; filename*=UTF-8''%E5%A0%B1%E5%91%8A.docx")
+        self.assertIn('word/document.xml', zipfile.ZipFile(BytesIO(body)).namelist())
+
+    def test_unexpected_error_returns_500(self):
+        async def explode(*args):
+            raise RuntimeError('boom')
+
+        self.service._dispatch = explode
+        try:
+            status, _, body = self.request('GET', '/healthz')
+        finally:
+            del self.service._dispatch
+        self.assertEqual(status, 500)
+        self.assertIn('boom', json.loads(body)['error'])
+        self.assertEqual(self.request('GET', '/healthz')[0], 200)
+
+    def test_pool_rebuilt_after_worker_dies(self):
+        # 先確保 worker 已啟動，再把它強制結束
+        self.request('POST', '/render/sheet?validate=0', b'{}', {'Content-Type': 'application/json'})
+        broken = self.service._pool
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join(10)
+
+        for _ in range(2):
+            status, _, _ = self.request('POST', '/render/sheet?validate=0', b'{}',
+                                        {'Content-Type': 'application/json'})
+            self.assertEqual(status, 200)
+        self.assertIsNot(self.service._pool, broken)
+        self.assertEqual(self.service.metrics.counter_value('pool_restarts_total'), 1)
+
+    def test_unknown_template(self):
+        status, _, body = self.request('POST', '/render/missing', b'1. a | b')
+        self.assertEqual(status, 404)
+        self.assertIn('missing', json.loads(body)['error'])
+
+    def raw_request(self, head):
+        """送出原始請求，回傳狀態碼（伺服器必須回應並關閉連線）"""
+        with socket.create_connection(('127.0.0.1', self.service.port), timeout=30) as sock:
+            sock.sendall(head)
+            response = http.client.HTTPResponse(sock)
+            response.begin()
+            response.read()
+            self.assertTrue(response.will_close)
+            return response.status
+
+    def test_negative_content_length(self):
+        status = self.raw_request(
+            b'POST /render/simple HTTP/1.1\r\nHost: x\r\nContent-Length: -5\r\n\r\nabc'
+        )
+        self.assertEqual(status, 400)
+
+    def test_chunked_body_requires_length(self):
+        status = self.raw_request(
+            b'POST /render/simple HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3\r\nabc\r\n0\r\n\r\n'
+        )
+        self.assertEqual(status, 411)
+
+    def test_invalid_json(self):
+        status, _, _ = self.request(
+            'POST', '/render/simple', b'{not json', {'Content-Type': 'application/json'}
+        )
+        self.assertEqual(status, 400)
+
+    def test_backpressure_returns_429(self):
+        self.service.pending = self.service.max_pending
+        try:
+            status, headers, _ = self.request('POST', '/render/simple', b'1. a | b')
+        finally:
+            self.service.pending = 0
+        self.assertEqual(status, 429)
+        self.assertEqual(headers['Retry-After'], '1')
+
+    def test_templates_and_metrics(self):
+        status, _, body = self.request('GET', '/templates')
+        self.assertEqual(status, 200)
+        ids = [t['id'] for t in json.loads(body)['templates']]
+        self.assertEqual(ids, ['sheet', 'simple', '報告'])
+
+        self.request('GET', '/healthz')
+        status, headers, body = self.request('GET', '/metrics')
+        self.assertEqual(status, 200)
+        text = body.decode('utf-8')
+        self.assertIn('# TYPE md2word_http_request_duration_seconds histogram', text)
+        self.assertIn('md2word_http_requests_total{route="/healthz",status="200"}', text)
+
+        status, _, body = self.request('GET', '/metrics?format=json')
+        self.assertIn('histograms', json.loads(body))
+
+    def test_render_metrics(self):
+        status, _, _ = self.request('POST', '/render/simple', self.sample_md.read_bytes(),
+                                    {'Content-Type': 'text/markdown'})
+        self.assertEqual(status, 200)
+        _, _, body = self.request('GET', '/metrics?format=json')
+        data = json.loads(body)
+        rendered = {tuple(s['labels'].items()): s['value'] for s in data['counters']['files_rendered_total']}
+        self.assertGreaterEqual(rendered[(('format', 'docx'),)], 1)
+        self.assertGreater(data['counters']['output_bytes_total'][0]['value'], 0)
+        stages = {s['labels']['stage'] for s in data['histograms']['stage_duration_seconds']}
+        self.assertTrue({'parse', 'render', 'save'} <= stages)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
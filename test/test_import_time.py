@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+CLI 啟動時的 import 測試
+
+以 ``python -X importtime`` 執行各子指令，檢查：
+
+- 不需要的重量級依賴沒有被載入（例如 ``info`` 不載入 docxtpl / openpyxl / jsonschema，
+  docx 渲染不載入 openpyxl）
+- import 總時間不超過各指令的預算；預算約為開發機實測值的 4 倍，較慢的 CI 可設定
+  ``MD2WORD_IMPORT_BUDGET_SCALE``（例如 ``2``）放寬
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+ROOT = Path(__file__).parent.parent
+SCRIPT = ROOT / 'md2word.py'
+
+HEAVY = {'docx', 'docxtpl', 'openpyxl', 'jinja2', 'jsonschema', 'lxml', 'PIL'}
+BUDGET_SCALE = float(os.environ.get('MD2WORD_IMPORT_BUDGET_SCALE', '1'))
+
+_LINE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(argv, cwd):
+    """執行 ``md2word.py argv``，回傳（頂層套件名稱集合, import 總毫秒數）"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(SCRIPT)] + argv,
+        cwd=cwd, capture_output=True, text=True, encoding='utf-8',
+        env=dict(os.environ, PYTHONIOENCODING='utf-8',
+                 MD2WORD_VALIDATOR_CACHE_DIR=str(Path(cwd) / 'validators')),
+    )
+    packages, total_us = set(), 0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = match.groups()
+        packages.add(name.split('.')[0])
+        if len(indent) == 1:
+            # 只加總最外層的 import，巢狀者已含在其中
+            total_us += int(cumulative)
+    return packages, total_us / 1000
+
+
+class TestImportTime(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docx_template = ROOT / 'templates' / 'simple_template.docx'
+        cls.xlsx_template = ROOT / 'templates' / 'excel' / 'sample_template.xlsx'
+        cls.sample = ROOT / 'test' / 'sample_inputs' / 'sample_01.md'
+        if not (cls.docx_template.exists() and cls.xlsx_template.exists() and cls.sample.exists()):
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def check(self, argv, allowed, budget_ms):
+        packages, total_ms = import_profile(argv, self.work)
+        unexpected = (packages & HEAVY) - set(allowed)
+        self.assertFalse(unexpected, f"{argv[0]} 載入了不需要的依賴：{sorted(unexpected)}")
+        self.assertLess(total_ms, budget_ms * BUDGET_SCALE,
+                        f"{argv[0]} 的 import 時間 {total_ms:.0f} ms 超過預算 {budget_ms} ms")
+        return packages
+
+    def test_info(self):
+        self.check(['info'], allowed=(), budget_ms=300)
+
+    def test_cache_stats(self):
+        self.check(['cache', 'stats', '--cache-dir', str(self.work / 'cache')], allowed=(), budget_ms=300)
+
+    def test_profile_report(self):
+        self.check(['profile-report', str(self.work / 'missing')], allowed=(), budget_ms=300)
+
+    def test_validate_default_schema_skips_jsonschema(self):
+        # 預設為寬鬆 schema，dict 直接通過，不建立 Draft7Validator
+        self.check(['validate', str(self.sample)], allowed=(), budget_ms=300)
+
+    def test_validate_loads_only_jsonschema(self):
+        schema = self.work / 'strict.json'
+        schema.write_text('{"type": "object", "required": ["a"]}', encoding='utf-8')
+        packages = self.check(['validate', str(self.sample), '--schema', str(schema)],
+                              allowed={'jsonschema'}, budget_ms=700)
+        self.assertIn('jsonschema', packages)
+
+    def test_validate_compiled_skips_jsonschema(self):
+        schema = self.work / 'strict.json'
+        schema.write_text('{"type": "object", "required": ["a"]}', encoding='utf-8')
+        argv = ['validate', str(self.sample), '--schema', str(schema), '--compiled']
+        # 第一次產生原始碼並寫入快取，第二次直接載入
+        import_profile(argv, self.work)
+        self.check(argv, allowed=(), budget_ms=300)
+
+    def test_render_docx_skips_excel_and_validator(self):
+        packages = self.check(
+            ['render', str(self.sample), str(self.docx_template), str(self.work / 'out.docx'),
+             '--no-daemon', '--no-validate'],
+            allowed={'docx', 'docxtpl', 'jinja2', 'lxml', 'PIL'}, budget_ms=800,
+        )
+        self.assertIn('docxtpl', packages)
+
+    def test_render_xlsx_skips_docx(self):
+        packages = self.check(
+            ['render', str(self.sample), str(self.xlsx_template), str(self.work / 'out.xlsx'),
+             '--no-daemon', '--no-validate'],
+            allowed={'openpyxl', 'jinja2', 'lxml', 'PIL'}, budget_ms=1000,
+        )
+        self.assertIn('openpyxl', packages)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
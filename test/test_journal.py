@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+批次日誌與續跑測試
+"""
+
+import io
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils import BatchProcessor, FileUtils
+from md_word_renderer.utils.journal import JOURNAL_NAME, BatchJournal, replay
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestBatchJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.path = self.work / JOURNAL_NAME
+
+    def output(self, name, content=b'docx'):
+        path = self.work / name
+        path.write_bytes(content)
+        return str(path)
+
+    def test_replay_after_crash(self):
+        done = self.output('done.docx')
+        with BatchJournal(str(self.path)) as journal:
+            journal.start('a.md', done)
+            journal.done('a.md', done)
+            journal.start('b.md', str(self.work / 'crashed.docx'))
+        # 模擬中斷：最後一行只寫了一半
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"event": "done", "outp')
+
+        journal = BatchJournal(str(self.path), resume=True)
+        self.addCleanup(journal.close)
+        jobs = [('a.md', done), ('b.md', str(self.work / 'crashed.docx'))]
+        todo, finished, exhausted = journal.partition(jobs)
+        self.assertEqual(finished, [jobs[0]])
+        self.assertEqual(todo, [jobs[1]])
+        self.assertEqual(exhausted, [])
+
+    def test_done_output_must_match_recorded_size(self):
+        out = self.output('a.docx', b'complete document')
+        with BatchJournal(str(self.path)) as journal:
+            journal.done('a.md', out)
+        Path(out).write_bytes(b'trunc')
+        with BatchJournal(str(self.path), resume=True) as journal:
+            self.assertFalse(journal.is_done(out))
+
+    def test_retry_budget_survives_compaction(self):
+        out = str(self.work / 'bad.docx')
+        for _ in range(2):
+            with BatchJournal(str(self.path), resume=True, retries=1) as journal:
+                self.assertFalse(journal.is_exhausted(out))
+                journal.start('bad.md', out)
+                journal.failed('bad.md', out, '壞掉了')
+        with BatchJournal(str(self.path), resume=True, retries=1) as journal:
+            self.assertTrue(journal.is_exhausted(out))
+            self.assertEqual(journal.last_error(out), '壞掉了')
+        # 壓縮後每個輸出只剩一筆
+        lines = self.path.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['attempts'], 2)
+
+    def test_without_resume_starts_over(self):
+        out = self.output('a.docx')
+        with BatchJournal(str(self.path)) as journal:
+            journal.done('a.md', out)
+        with BatchJournal(str(self.path)) as journal:
+            self.assertFalse(journal.is_done(out))
+        self.assertEqual(replay(str(self.path)), {})
+
+    def test_group_fsync(self):
+        journal = BatchJournal(str(self.path), fsync_every=3, fsync_interval=3600)
+        self.addCleanup(journal.close)
+        journal.start('a.md', 'a.docx')
+        journal.start('b.md', 'b.docx')
+        self.assertEqual(journal._unsynced, 2)
+        journal.start('c.md', 'c.docx')
+        self.assertEqual(journal._unsynced, 0)
+        # flush 後即使尚未 fsync，其他行程也讀得到
+        self.assertEqual(len(replay(str(self.path))), 3)
+
+    def test_atomic_output_keeps_old_file_on_error(self):
+        target = self.output('a.docx', b'old')
+        with self.assertRaises(RuntimeError):
+            with FileUtils.atomic_output(target) as tmp:
+                Path(tmp).write_bytes(b'half-writ')
+                raise RuntimeError('中斷')
+        self.assertEqual(Path(target).read_bytes(), b'old')
+        self.assertEqual(sorted(p.name for p in self.work.iterdir()), ['a.docx'])
+
+    @unittest.skipIf(os.name == 'nt', "POSIX 權限")
+    def test_atomic_output_follows_umask(self):
+        old = os.umask(0o022)
+        self.addCleanup(os.umask, old)
+        target = str(self.work / 'new.docx')
+        FileUtils.atomic_write_bytes(target, b'data')
+        self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o644)
+
+        # 既有檔案沿用原本的權限；明確指定時以指定值為準
+        os.chmod(target, 0o640)
+        FileUtils.atomic_write_bytes(target, b'again')
+        self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o640)
+        FileUtils.atomic_write_bytes(target, b'mode', mode=0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0o600)
+
+
+class TestResumeBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or len(cls.samples) < 2:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.in_dir = self.work / 'in'
+        self.out_dir = self.work / 'out'
+        self.in_dir.mkdir()
+        for sample in self.samples:
+            shutil.copy(sample, self.in_dir / sample.name)
+        self.broken = self.in_dir / 'zz_broken.md'
+        self.broken.write_bytes(b'\xff\xfe not utf-8')
+
+    def batch(self, *extra):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(['batch', str(self.in_dir), str(self.template), str(self.out_dir),
+                          '-j', '0', '--continue-on-error', *extra])
+        return result, buf.getvalue()
+
+    def test_resume_skips_completed_and_retries_failures(self):
+        result, _ = self.batch()
+        self.assertEqual(result, 1)
+        first = {p.name: p.stat().st_mtime_ns for p in self.out_dir.glob('*.docx')}
+        self.assertEqual(len(first), len(self.samples))
+
+        result, out = self.batch('--resume', '--retries', '1')
+        self.assertEqual(result, 1)
+        self.assertIn(f'{len(self.samples)} 個已完成，1 個待處理', out)
+        after = {p.name: p.stat().st_mtime_ns for p in self.out_dir.glob('*.docx')}
+        self.assertEqual(after, first)
+
+        # 第二次失敗後重試次數用完，不再嘗試
+        result, out = self.batch('--resume', '--retries', '1')
+        self.assertIn('已用完重試次數', out)
+        self.assertIn('0 個待處理', out)
+
+        # 修好之後不帶 --resume：重新開始
+        self.broken.unlink()
+        result, _ = self.batch()
+        self.assertEqual(result, 0)
+
+    def test_batch_processor_journal(self):
+        journal_path = self.out_dir / JOURNAL_NAME
+        inputs = [str(p) for p in sorted(self.in_dir.glob('*.md'))]
+        processor = BatchProcessor(continue_on_error=True)
+        calls = []
+
+        def process(input_file, template_path, output_file):
+            calls.append(input_file)
+            if input_file.endswith('zz_broken.md'):
+                raise ValueError('壞掉了')
+            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+            Path(output_file).write_bytes(b'ok')
+
+        with BatchJournal(str(journal_path)) as journal:
+            first = processor.process_files(inputs, str(self.template), str(self.out_dir),
+                                            process, journal=journal)
+        self.assertEqual(first['failed_count'], 1)
+
+        calls.clear()
+        with BatchJournal(str(journal_path), resume=True) as journal:
+            second = processor.process_files(inputs, str(self.template), str(self.out_dir),
+                                             process, journal=journal)
+        self.assertEqual(calls, [str(self.broken)])
+        self.assertEqual(second['resumed_count'], len(self.samples))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
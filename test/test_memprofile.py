@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+各步驟記憶體剖析測試
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils import memprofile
+from md_word_renderer.utils.memprofile import MemoryProfile, MemoryReport, checkpoint
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def _allocate():
+    return [bytes(1024) for _ in range(200)]
+
+
+class TestMemoryProfile(unittest.TestCase):
+
+    def test_checkpoint_without_profile_is_noop(self):
+        self.assertIsNone(memprofile._ACTIVE)
+        checkpoint('parse')
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_records_stages_and_sites(self):
+        with MemoryProfile(top=5) as mem:
+            kept = _allocate()
+            checkpoint('parse')
+            checkpoint('render')
+        self.assertIsNone(memprofile._ACTIVE)
+        self.assertFalse(tracemalloc.is_tracing())
+        del kept
+
+        report = mem.report()
+        self.assertEqual([st['stage'] for st in report['stages']], ['parse', 'render'])
+        parse = report['stages'][0]
+        self.assertGreaterEqual(parse['traced_diff'], 200 * 1024)
+        self.assertLessEqual(len(parse['top']), 5)
+        self.assertIn('test_memprofile.py', parse['top'][0]['site'])
+        self.assertGreaterEqual(parse['top'][0]['count_diff'], 200)
+
+    def test_report_aggregates_files(self):
+        report = MemoryReport()
+        for name in ('a.md', 'b.md'):
+            with MemoryProfile() as mem:
+                kept = _allocate()
+                checkpoint('parse')
+            del kept
+            report.add(name, mem.report())
+        report.add('skipped.md', None)
+
+        summary = report.summary()
+        self.assertEqual(summary['files'], 2)
+        parse = summary['stages'][0]
+        self.assertEqual(parse['count'], 2)
+        self.assertIn(parse['max_traced_file'], ('a.md', 'b.md'))
+        self.assertEqual(parse['top'][0]['files'], 2)
+        self.assertIn('parse', report.format())
+
+
+class TestMemoryProfileCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or not cls.samples:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def run_cli(self, *argv):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(list(argv))
+        return result, buf.getvalue()
+
+    def test_render_memprofile(self):
+        report = self.work / 'mem.json'
+        result, out = self.run_cli('render', str(self.samples[0]), str(self.template),
+                                   str(self.work / 'a.docx'), '--memprofile',
+                                   '--memprofile-json', str(report))
+        self.assertEqual(result, 0, out)
+        self.assertIn('記憶體剖析', out)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual([st['stage'] for st in data['stages']],
+                         ['parse', 'load_template', 'images', 'render', 'save'])
+        self.assertEqual(len(data['per_file']), 1)
+
+    def test_batch_memprofile_json(self):
+        report = self.work / 'mem.json'
+        result, out = self.run_cli('batch', str(ROOT / 'test' / 'sample_inputs'), str(self.template),
+                                   str(self.work / 'out'), '-j', '0', '--memprofile-json', str(report))
+        self.assertEqual(result, 0, out)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual(data['files'], len(self.samples))
+        self.assertEqual(set(st['stage'] for st in data['stages']),
+                         {'parse', 'load_template', 'images', 'render', 'save'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+指標檔輸出測試
+"""
+
+import io
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils.metrics import (
+    MetricsFileWriter,
+    MetricsRegistry,
+    describe_render_metrics,
+    record_cache,
+    write_metrics,
+)
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestMetricsFile(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def test_write_prometheus_and_json(self):
+        metrics = describe_render_metrics(MetricsRegistry(prefix='t'))
+        metrics.inc('files_rendered_total', {'format': 'docx'}, 3)
+        metrics.observe('stage_duration_seconds', 0.2, {'stage': 'parse'})
+
+        prom = self.work / 'm.prom'
+        write_metrics(metrics, str(prom))
+        text = prom.read_text(encoding='utf-8')
+        self.assertIn('# TYPE t_files_rendered_total counter', text)
+        self.assertIn('t_files_rendered_total{format="docx"} 3', text)
+        self.assertIn('t_stage_duration_seconds_count{stage="parse"} 1', text)
+
+        write_metrics(metrics, str(self.work / 'm.json'))
+        data = json.loads((self.work / 'm.json').read_text(encoding='utf-8'))
+        self.assertEqual(data['counters']['files_rendered_total'][0]['value'], 3)
+        self.assertEqual(sorted(p.name for p in self.work.iterdir()), ['m.json', 'm.prom'])
+
+    @unittest.skipIf(os.name == 'nt', "POSIX 權限")
+    def test_metrics_file_world_readable(self):
+        old = os.umask(0o077)
+        self.addCleanup(os.umask, old)
+        prom = self.work / 'm.prom'
+        write_metrics(MetricsRegistry(), str(prom))
+        self.assertEqual(stat.S_IMODE(os.stat(prom).st_mode), 0o644)
+
+    def test_cache_hit_ratio(self):
+        metrics = MetricsRegistry()
+        record_cache(metrics, 'template', hits=3, misses=1)
+        record_cache(metrics, 'template', misses=4)
+        self.assertEqual(metrics.counter_value('cache_hits_total', {'cache': 'template'}), 3)
+        ratio = metrics.to_dict()['gauges']['cache_hit_ratio'][0]
+        self.assertEqual(ratio['labels'], {'cache': 'template'})
+        self.assertAlmostEqual(ratio['value'], 3 / 8)
+
+    def test_writer_periodic_and_final(self):
+        metrics = MetricsRegistry()
+        path = self.work / 'm.prom'
+        calls = []
+        with MetricsFileWriter(metrics, str(path), interval=0.02,
+                               before_write=lambda m: calls.append(1)):
+            metrics.inc('jobs_total')
+            deadline = time.time() + 5
+            while not path.exists() and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(path.exists())
+            metrics.inc('jobs_total')
+        # 結束時寫出最終值
+        self.assertIn('md2word_jobs_total 2', path.read_text(encoding='utf-8'))
+        self.assertGreaterEqual(len(calls), 2)
+
+
+class TestBatchMetricsCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or not cls.samples:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def test_batch_metrics_file(self):
+        in_dir = self.work / 'in'
+        in_dir.mkdir()
+        for sample in self.samples:
+            shutil.copy(sample, in_dir / sample.name)
+        (in_dir / 'broken.md').write_bytes(b'\xff\xfe not utf-8')
+        metrics_path = self.work / 'metrics' / 'md2word.json'
+
+        with redirect_stdout(io.StringIO()):
+            result = cli(['batch', str(in_dir), str(self.template), str(self.work / 'out'),
+                          '-j', '0', '--continue-on-error', '--metrics-file', str(metrics_path)])
+        self.assertEqual(result, 1)
+        data = json.loads(metrics_path.read_text(encoding='utf-8'))
+        counters = data['counters']
+        self.assertEqual(counters['files_rendered_total'],
+                         [{'labels': {'format': 'docx'}, 'value': len(self.samples)}])
+        self.assertEqual(counters['failures_total'],
+                         [{'labels': {'exception': 'UnicodeDecodeError'}, 'value': 1}])
+        self.assertGreater(counters['input_bytes_total'][0]['value'], 0)
+        self.assertGreater(counters['output_bytes_total'][0]['value'], 0)
+        stages = {s['labels']['stage'] for s in data['histograms']['stage_duration_seconds']}
+        self.assertTrue({'read', 'parse', 'render', 'save', 'write'} <= stages)
+        self.assertIn('last_run_timestamp_seconds', data['gauges'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
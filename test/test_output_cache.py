@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+輸出快取測試
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli, process_one
+from md_word_renderer.utils.output_cache import OutputCache, parse_size
+from md_word_renderer.utils.pipeline import BatchPipeline
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestOutputCache(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.template = self.work / 'tpl.docx'
+        self.template.write_bytes(b'template-v1')
+
+    def put(self, cache, key, payload):
+        src = self.work / f'{key}.src'
+        src.write_bytes(payload)
+        cache.store(key, str(src), 'docx')
+
+    def test_key_depends_on_data_template_and_settings(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        base = cache.key_for({'a': '1'}, str(self.template), {'format': 'docx'})
+        self.assertEqual(base, cache.key_for({'a': '1'}, str(self.template), {'format': 'docx'}))
+        self.assertNotEqual(base, cache.key_for({'a': '2'}, str(self.template), {'format': 'docx'}))
+        self.assertNotEqual(base, cache.key_for({'a': '1'}, str(self.template), {'format': 'xlsx'}))
+
+        self.template.write_bytes(b'template-v2-changed')
+        self.assertNotEqual(base, cache.key_for({'a': '1'}, str(self.template), {'format': 'docx'}))
+
+    def test_key_includes_image_content(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        image = self.work / 'logo.png'
+        image.write_bytes(b'png-1')
+        data = {'logo': {'type': 'image', 'image_path': str(image)}}
+        first = cache.key_for(data, str(self.template))
+        image.write_bytes(b'png-2-changed')
+        self.assertNotEqual(first, cache.key_for(data, str(self.template)))
+
+    def test_fetch_and_store(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        out = self.work / 'out' / 'a.docx'
+        self.assertFalse(cache.fetch('ab' * 32, str(out), 'docx'))
+        self.put(cache, 'ab' * 32, b'document')
+        self.assertTrue(cache.fetch('ab' * 32, str(out), 'docx'))
+        self.assertEqual(out.read_bytes(), b'document')
+        self.assertEqual((cache.hits, cache.misses, cache.stores), (1, 1, 1))
+
+    def test_read_and_store_bytes(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        self.assertIsNone(cache.read('ef' * 32, 'docx'))
+        cache.store_bytes('ef' * 32, b'document', 'docx')
+        self.assertEqual(cache.read('ef' * 32, 'docx'), b'document')
+        self.assertEqual((cache.hits, cache.misses, cache.stores), (1, 1, 1))
+
+    def test_concurrent_fetch_same_output(self):
+        # daemon 的多個 thread 同時寫出同一個輸出：暫存檔不能共用
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        payload = os.urandom(1 << 20)
+        self.put(cache, 'aa' * 32, payload)
+        out = self.work / 'out' / 'same.docx'
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.fetch('aa' * 32, str(out), 'docx')))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(cache.hits, 8)
+        self.assertEqual(out.read_bytes(), payload)
+        self.assertEqual(os.listdir(out.parent), ['same.docx'])
+
+    def test_failed_fetch_removes_temp_file(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        self.put(cache, 'bb' * 32, b'document')
+        out = self.work / 'out' / 'evicted.docx'
+        out.parent.mkdir()
+        # 與其他行程的淘汰競爭：複製時物件已被刪除
+        with mock.patch('shutil.copyfile', side_effect=FileNotFoundError):
+            self.assertFalse(cache.fetch('bb' * 32, str(out), 'docx'))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(os.listdir(out.parent), [])
+
+    @unittest.skipUnless(hasattr(os, 'link'), '不支援 hardlink')
+    def test_hardlink_mode(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'), link=True)
+        self.put(cache, 'cd' * 32, b'document')
+        out = self.work / 'linked.docx'
+        self.assertTrue(cache.fetch('cd' * 32, str(out), 'docx'))
+        self.assertGreaterEqual(out.stat().st_nlink, 2)
+
+    def test_lru_eviction(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'), max_bytes=250)
+        for i, key in enumerate(('01' * 32, '02' * 32)):
+            self.put(cache, key, b'x' * 100)
+            obj = cache._object_path(key, 'docx')
+            os.utime(obj, (1000 + i, 1000 + i))
+        # 使用較舊的一筆，使它成為最近使用
+        self.assertTrue(cache.fetch('01' * 32, str(self.work / 'o.docx'), 'docx'))
+        self.put(cache, '03' * 32, b'x' * 100)
+
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertLessEqual(stats['bytes'], 250)
+        self.assertFalse(cache._object_path('02' * 32, 'docx').exists())
+        self.assertTrue(cache._object_path('01' * 32, 'docx').exists())
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('1048576'), 1048576)
+        self.assertEqual(parse_size('500M'), 500 * 1024 ** 2)
+        self.assertEqual(parse_size('2GiB'), 2 * 1024 ** 3)
+        with self.assertRaises(ValueError):
+            parse_size('lots')
+
+
+class TestProcessOneCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sample_md = ROOT / 'referance' / 'sample_data.md'
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        if not cls.sample_md.exists() or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def test_second_render_is_cache_hit(self):
+        cache = OutputCache(cache_dir=str(self.work / 'cache'))
+        first = process_one(str(self.sample_md), str(self.template), str(self.work / 'a.docx'),
+                            output_cache=cache)
+        second = process_one(str(self.sample_md), str(self.template), str(self.work / 'b.docx'),
+                             output_cache=cache)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual((self.work / 'a.docx').read_bytes(), (self.work / 'b.docx').read_bytes())
+
+    def test_cli_cache_flags_and_stats(self):
+        cache_dir = str(self.work / 'cache')
+        for name in ('a.docx', 'b.docx'):
+            result = cli(['render', str(self.sample_md), str(self.template),
+                          str(self.work / name), '--no-daemon', '--cache-dir', cache_dir])
+            self.assertEqual(result, 0)
+        self.assertEqual(OutputCache(cache_dir=cache_dir).stats()['entries'], 1)
+        self.assertEqual(cli(['cache', 'stats', '--cache-dir', cache_dir]), 0)
+        self.assertEqual(cli(['cache', 'clear', '--cache-dir', cache_dir]), 0)
+        self.assertEqual(OutputCache(cache_dir=cache_dir).stats()['entries'], 0)
+
+
+class TestBatchCache(unittest.TestCase):
+    """batch 的 worker 與 batch-templates 同樣查詢 / 存入輸出快取"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sample_md = ROOT / 'referance' / 'sample_data.md'
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        if not cls.sample_md.exists() or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.in_dir = self.work / 'in'
+        self.in_dir.mkdir()
+        shutil.copy(self.sample_md, self.in_dir / 'a.md')
+        self.cache_dir = str(self.work / 'cache')
+
+    def run_pipeline(self, workers):
+        out_dir = self.work / f'out-{workers}'
+        pipeline = BatchPipeline(workers=workers, output_cache=OutputCache(cache_dir=self.cache_dir))
+        result = pipeline.run([(str(self.in_dir / 'a.md'), str(self.template), str(out_dir / 'a.docx'))],
+                              fmt='docx')
+        self.assertEqual(result['failed'], [])
+        return result, out_dir / 'a.docx'
+
+    def test_pipeline_shares_cache_with_render(self):
+        rendered = self.work / 'rendered.docx'
+        self.assertEqual(cli(['render', str(self.in_dir / 'a.md'), str(self.template), str(rendered),
+                              '--no-daemon', '--no-validate', '--cache-dir', self.cache_dir]), 0)
+        for workers in (0, 1):
+            result, output = self.run_pipeline(workers)
+            self.assertEqual(result['output_cache'], {'hits': 1, 'misses': 0})
+            self.assertEqual(output.read_bytes(), rendered.read_bytes())
+
+    def test_pipeline_stores_on_miss(self):
+        first, _ = self.run_pipeline(1)
+        self.assertEqual(first['output_cache'], {'hits': 0, 'misses': 1})
+        self.assertEqual(OutputCache(cache_dir=self.cache_dir).stats()['entries'], 1)
+        second, _ = self.run_pipeline(0)
+        self.assertEqual(second['output_cache'], {'hits': 1, 'misses': 0})
+        self.assertIsNone(BatchPipeline(workers=0).run([], fmt='docx')['output_cache'])
+
+    def test_batch_templates_uses_cache(self):
+        tpl_dir = self.work / 'templates'
+        tpl_dir.mkdir()
+        shutil.copy(self.template, tpl_dir / 'simple.docx')
+        argv = ['batch-templates', str(self.in_dir / 'a.md'), str(tpl_dir), str(self.work / 'out'),
+                '--cache-dir', self.cache_dir]
+        self.assertEqual(cli(argv), 0)
+        cache = OutputCache(cache_dir=self.cache_dir)
+        self.assertEqual(cache.stats()['entries'], 1)
+        (self.work / 'out' / 'simple.docx').unlink()
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(cli(argv), 0)
+        self.assertIn('輸出快取命中: 1 個', stdout.getvalue())
+        self.assertTrue((self.work / 'out' / 'simple.docx').exists())
+        self.assertEqual(cache.stats()['entries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+"""
+管線式批次處理測試
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils import BatchProcessor
+from md_word_renderer.utils.cost_model import CostModel, scan_input
+from md_word_renderer.utils.journal import JOURNAL_NAME
+from md_word_renderer.utils.manifest import MANIFEST_NAME, RACY_WINDOW_NS, BuildManifest
+from md_word_renderer.utils import pipeline as pipeline_module
+from md_word_renderer.utils.pipeline import STAGES, BatchPipeline
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestBatchPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.inputs = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        if not cls.inputs or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.out_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.out_dir, True)
+
+    def jobs(self, inputs):
+        return [
+            (str(p), str(self.template), str(self.out_dir / f"{Path(p).stem}.docx"))
+            for p in inputs
+        ]
+
+    def test_in_process_pipeline(self):
+        seen = []
+        pipeline = BatchPipeline(workers=0, on_result=seen.append)
+        result = pipeline.run(self.jobs(self.inputs))
+
+        self.assertEqual(result['success_count'], len(self.inputs))
+        self.assertEqual([s['input'] for s in result['success']], [str(p) for p in self.inputs])
+        self.assertEqual(len(seen), len(self.inputs))
+        for item in result['success']:
+            self.assertTrue(Path(item['output']).exists())
+
+        stages = {s.name: s for s in result['stages']}
+        self.assertEqual(tuple(stages), STAGES)
+        for name in STAGES:
+            self.assertEqual(stages[name].items, len(self.inputs))
+        self.assertIn('瓶頸', BatchPipeline.format_stats(result['stages'], result['wall_s']))
+
+    def test_process_pool_pipeline(self):
+        result = BatchPipeline(workers=2).run(self.jobs(self.inputs))
+        self.assertEqual(result['failed_count'], 0)
+        self.assertEqual(len(list(self.out_dir.glob('*.docx'))), len(self.inputs))
+
+    def test_failures_are_reported(self):
+        inputs = [str(self.out_dir / 'missing.md')] + [str(p) for p in self.inputs]
+        result = BatchPipeline(workers=0).run(self.jobs(inputs))
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['failed'][0]['input'], inputs[0])
+        self.assertEqual(result['success_count'], len(self.inputs))
+
+    def test_raising_on_result_does_not_hang(self):
+        calls = []
+
+        def on_result(job):
+            calls.append(job.input_path)
+            raise RuntimeError('callback 壞了')
+
+        inputs = [str(p) for p in self.inputs] * 4
+        jobs = [(src, str(self.template), str(self.out_dir / f"{i}.docx")) for i, src in enumerate(inputs)]
+        outcome = {}
+        runner = threading.Thread(
+            target=lambda: outcome.update(BatchPipeline(workers=0, io_threads=1, on_result=on_result).run(jobs)),
+            daemon=True,
+        )
+        with self.assertLogs('md_word_renderer.utils.pipeline', level='ERROR'):
+            runner.start()
+            runner.join(120)
+        self.assertFalse(runner.is_alive(), "on_result 拋出例外後批次停住")
+        self.assertEqual(outcome['success_count'], len(inputs))
+        self.assertEqual(len(calls), len(inputs))
+
+    def test_stop_on_first_error(self):
+        inputs = [str(self.out_dir / 'missing.md')] * 5
+        result = BatchPipeline(workers=0, io_threads=1, continue_on_error=False).run(self.jobs(inputs))
+        self.assertEqual(result['failed_count'], 1)
+        self.assertEqual(result['success_count'], 0)
+
+    def test_batch_processor_pipeline(self):
+        processor = BatchProcessor()
+        result = processor.process_pipeline(
+            [str(p) for p in self.inputs], str(self.template), str(self.out_dir), workers=0
+        )
+        self.assertEqual(result['success_count'], len(self.inputs))
+        self.assertIn('stages', result)
+
+
+class TestCostScheduling(unittest.TestCase):
+    """成本估計與最長者優先派工"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sample = ROOT / 'test' / 'sample_inputs' / 'sample_01.md'
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        if not cls.sample.exists() or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def test_scan_input(self):
+        path = self.work / 'a.md'
+        path.write_bytes('1. 名稱 | A\n2. 圖 | ![logo](logo.png)\n3. 備註 | 無'.encode('utf-8'))
+        nbytes, lines, images = scan_input(str(path))
+        self.assertEqual((nbytes, lines, images), (path.stat().st_size, 3, 1))
+
+        model = CostModel()
+        self.assertGreater(model.estimate(str(path)).predicted, model.predict(nbytes, lines, 0))
+        self.assertEqual(model.estimate(str(self.work / 'missing.md')).predicted, 0)
+
+    def test_largest_job_dispatched_first(self):
+        base = self.sample.read_text(encoding='utf-8')
+        small = self.work / 'a_small.md'
+        large = self.work / 'b_large.md'
+        small.write_text(base, encoding='utf-8')
+        large.write_text(base + ''.join(f'\n{100 + i}. 欄位{i} | 值' for i in range(300)),
+                         encoding='utf-8')
+        jobs = [(str(p), str(self.template), str(self.work / f'{p.stem}.docx'))
+                for p in (small, large)]
+
+        order = []
+        pipeline = BatchPipeline(workers=0, io_threads=1,
+                                 on_result=lambda job: order.append(job.input_path))
+        result = pipeline.run(jobs)
+        self.assertEqual(order, [str(large), str(small)])
+        # 結果仍依輸入順序
+        self.assertEqual([s['input'] for s in result['success']], [str(small), str(large)])
+        self.assertEqual(result['cost']['samples'], 2)
+        self.assertGreater(result['cost']['actual_s'], 0)
+
+        order.clear()
+        BatchPipeline(workers=0, io_threads=1, schedule='input',
+                      on_result=lambda job: order.append(job.input_path)).run(jobs)
+        self.assertEqual(order, [str(small), str(large)])
+
+    def test_cli_cost_log(self):
+        in_dir = self.work / 'in'
+        in_dir.mkdir()
+        shutil.copy(self.sample, in_dir / self.sample.name)
+        log = self.work / 'cost.csv'
+        result = cli(['batch', str(in_dir), str(self.template), str(self.work / 'out'),
+                      '-j', '0', '--cost-log', str(log)])
+        self.assertEqual(result, 0)
+        rows = log.read_text(encoding='utf-8').splitlines()
+        self.assertEqual(rows[0], 'input,bytes,lines,images,predicted_s,actual_s')
+        self.assertEqual(len(rows), 2)
+
+
+_real_render = pipeline_module._render_in_worker
+
+
+def _crashing_render(input_path, *args):
+    """模擬被 OOM killer 終止的 worker"""
+    if 'crash' in input_path:
+        os._exit(9)
+    return _real_render(input_path, *args)
+
+
+class TestWorkerRecycling(unittest.TestCase):
+    """worker 行程換新與峰值 RSS"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sample = ROOT / 'test' / 'sample_inputs' / 'sample_01.md'
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        if not cls.sample.exists() or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def jobs(self, names):
+        jobs = []
+        for name in names:
+            path = self.work / f'{name}.md'
+            shutil.copy(self.sample, path)
+            jobs.append((str(path), str(self.template), str(self.work / 'out' / f'{name}.docx')))
+        return jobs
+
+    def test_recycle_after_max_tasks(self):
+        result = BatchPipeline(workers=1, max_tasks_per_worker=2).run(self.jobs('abcde'))
+        self.assertEqual(result['success_count'], 5)
+        # 處理完第 2、4 個檔案後換新；最後一個行程在結束時關閉，不算換新
+        self.assertEqual(result['memory']['recycled'], 2)
+
+    def test_recycle_on_rss_limit(self):
+        result = BatchPipeline(workers=1, max_worker_rss=1).run(self.jobs('abc'))
+        self.assertEqual(result['success_count'], 3)
+        if result['memory']['max_peak_rss'] is None:
+            self.skipTest('此平台無法量測 RSS')
+        self.assertEqual(result['memory']['recycled'], 3)
+        self.assertTrue(all(item['peak_rss'] for item in result['success']))
+        self.assertIn('峰值 RSS', BatchPipeline.format_memory(result['memory']))
+
+    def test_crashed_worker_is_replaced(self):
+        pipeline_module._render_in_worker = _crashing_render
+        self.addCleanup(setattr, pipeline_module, '_render_in_worker', _real_render)
+        result = BatchPipeline(workers=1, schedule='input').run(self.jobs(['a', 'crash', 'b']))
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(len(result['failed']), 1)
+        self.assertIn('crash', result['failed'][0]['input'])
+
+
+class TestIncrementalBatch(unittest.TestCase):
+    """``md2word batch --incremental``"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not samples or not cls.template.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+        cls.samples = samples
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.in_dir = self.work / 'in'
+        self.out_dir = self.work / 'out'
+        self.in_dir.mkdir()
+        for sample in self.samples:
+            shutil.copy(sample, self.in_dir / sample.name)
+
+    def batch(self, *extra):
+        return cli(['batch', str(self.in_dir), str(self.template), str(self.out_dir),
+                    '-j', '0', *extra])
+
+    def outputs_mtime(self):
+        return {p.name: p.stat().st_mtime_ns for p in self.out_dir.glob('*.docx')}
+
+    def test_parallel_workers_with_journal_and_metrics(self):
+        # worker 行程不可由執行中 I/O threads 的行程直接 fork（子行程會繼承被持有的鎖）
+        self.assertNotEqual(pipeline_module.worker_context().get_start_method(), 'fork')
+        metrics_path = self.work / 'metrics.json'
+        argv = ['batch', str(self.in_dir), str(self.template), str(self.out_dir), '-j', '2',
+                '--incremental', '--metrics-file', str(metrics_path), '--metrics-interval', '0.01']
+        outcome = {}
+        thread = threading.Thread(
+            target=lambda: outcome.update(result=cli(argv)), daemon=True,
+        )
+        with redirect_stdout(io.StringIO()):
+            thread.start()
+            thread.join(120)
+        self.assertFalse(thread.is_alive(), '平行批次未在時限內結束')
+        self.assertEqual(outcome['result'], 0)
+
+        self.assertEqual(len(self.outputs_mtime()), len(self.samples))
+        events = [json.loads(line) for line in
+                  (self.out_dir / JOURNAL_NAME).read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(sum(e['event'] == 'done' for e in events), len(self.samples))
+        counters = json.loads(metrics_path.read_text(encoding='utf-8'))['counters']
+        self.assertEqual(counters['files_rendered_total'][0]['value'], len(self.samples))
+
+    def test_skips_unchanged_and_rebuilds_changed(self):
+        self.assertEqual(self.batch('--incremental'), 0)
+        self.assertTrue((self.out_dir / MANIFEST_NAME).exists())
+        first = self.outputs_mtime()
+
+        self.assertEqual(self.batch('--incremental'), 0)
+        self.assertEqual(self.outputs_mtime(), first)
+
+        changed = self.in_dir / self.samples[0].name
+        changed.write_text(changed.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+        self.assertEqual(self.batch('--incremental'), 0)
+        after = self.outputs_mtime()
+        rebuilt = [name for name in after if after[name] != first[name]]
+        self.assertEqual(rebuilt, [f"{self.samples[0].stem}.docx"])
+
+    def test_force_rebuilds_everything(self):
+        self.batch('--incremental')
+        first = self.outputs_mtime()
+        self.batch('--incremental', '--force')
+        after = self.outputs_mtime()
+        self.assertTrue(all(after[name] != first[name] for name in first))
+
+    def test_touched_file_with_same_content_is_up_to_date(self):
+        self.batch('--incremental')
+        sample = self.in_dir / self.samples[0].name
+        sample.touch()
+        manifest = BuildManifest.load(str(self.out_dir))
+        output = self.out_dir / f"{sample.stem}.docx"
+        self.assertTrue(manifest.is_up_to_date(str(sample), str(self.template), str(output),
+                                               settings={'format': 'docx'}))
+        self.assertFalse(manifest.is_up_to_date(str(sample), str(self.template), str(output),
+                                                settings={'format': 'xlsx'}))
+
+    def test_input_edited_during_render_is_rebuilt(self):
+        edited = self.in_dir / self.samples[0].name
+
+        def render_then_edit(input_path, *args):
+            result = _real_render(input_path, *args)
+            if input_path == str(edited):
+                # 已讀入舊內容、渲染完成前檔案被修改
+                edited.write_text(edited.read_text(encoding='utf-8') + '\n- 新增\n', encoding='utf-8')
+            return result
+
+        pipeline_module._render_in_worker = render_then_edit
+        try:
+            self.assertEqual(self.batch('--incremental'), 0)
+        finally:
+            pipeline_module._render_in_worker = _real_render
+
+        manifest = BuildManifest.load(str(self.out_dir))
+        output = self.out_dir / f"{edited.stem}.docx"
+        self.assertFalse(manifest.is_up_to_date(str(edited), str(self.template), str(output),
+                                                settings={'format': 'docx'}))
+        others = [p for p in self.in_dir.glob('*.md') if p != edited]
+        self.assertTrue(all(
+            manifest.is_up_to_date(str(p), str(self.template), str(self.out_dir / f"{p.stem}.docx"),
+                                   settings={'format': 'docx'})
+            for p in others
+        ))
+
+    def test_image_modified_after_job_start_is_not_trusted(self):
+        image = self.work / 'a.png'
+        image.write_bytes(b'png')
+        output = self.out_dir / 'a.docx'
+        self.out_dir.mkdir()
+        output.write_bytes(b'docx')
+        sample = self.in_dir / self.samples[0].name
+        manifest = BuildManifest.load(str(self.out_dir))
+        input_file = manifest.fingerprint(str(sample))
+
+        manifest.record(str(sample), str(self.template), str(output), [str(image)],
+                        input_file=input_file, since_ns=time.time_ns())
+        self.assertFalse(manifest.is_up_to_date(str(sample), str(self.template), str(output)))
+
+        manifest.record(str(sample), str(self.template), str(output), [str(image)],
+                        input_file=input_file, since_ns=time.time_ns() + 10 * RACY_WINDOW_NS)
+        self.assertTrue(manifest.is_up_to_date(str(sample), str(self.template), str(output)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
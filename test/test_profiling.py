@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+慢檔案 cProfile 紀錄測試
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils.profiling import (
+    PROFILE_DIR_NAME,
+    assign_profile_paths,
+    profile_slow,
+    summarize_profiles,
+)
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def _busy_work():
+    return sum(i * i for i in range(20000))
+
+
+class TestProfileSlow(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def test_keeps_only_slow_jobs(self):
+        fast = self.work / 'fast.pstats'
+        with profile_slow(3600, str(fast)) as prof:
+            _busy_work()
+        self.assertIsNone(prof.kept)
+        self.assertFalse(fast.exists())
+
+        slow = self.work / 'sub' / 'slow.pstats'
+        with profile_slow(0, str(slow)) as prof:
+            _busy_work()
+        self.assertEqual(prof.kept, str(slow))
+        self.assertGreater(prof.elapsed, 0)
+        summary = summarize_profiles([str(slow)])
+        self.assertTrue(any('_busy_work' in fn['function'] for fn in summary['functions']))
+
+    def test_disabled_and_failed_jobs_are_not_kept(self):
+        with profile_slow(None, str(self.work / 'x.pstats')) as prof:
+            _busy_work()
+        self.assertIsNone(prof.kept)
+        with self.assertRaises(RuntimeError):
+            with profile_slow(0, str(self.work / 'y.pstats')):
+                raise RuntimeError('失敗')
+        self.assertEqual(list(self.work.iterdir()), [])
+
+    def test_paths_named_after_input(self):
+        paths = assign_profile_paths(['a/report.md', 'b/report.md', 'c/other.md', 'a/report.md'], 'p')
+        self.assertEqual([Path(p).name for p in paths.values()],
+                         ['report.pstats', 'report-2.pstats', 'other.pstats'])
+
+    def test_summary_aggregates_files(self):
+        files = []
+        for name in ('a', 'b'):
+            path = str(self.work / f'{name}.pstats')
+            with profile_slow(0, path):
+                _busy_work()
+            files.append(path)
+        summary = summarize_profiles(files, top=50, sort='cumtime')
+        busy = next(fn for fn in summary['functions'] if '_busy_work' in fn['function'])
+        self.assertEqual(busy['files'], 2)
+        self.assertEqual(busy['calls'], 2)
+        self.assertEqual(len(summary['files']), 2)
+
+
+class TestProfileCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or not cls.samples:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def run_cli(self, *argv):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(list(argv))
+        return result, buf.getvalue()
+
+    def test_batch_profile_and_report(self):
+        out_dir = self.work / 'out'
+        result, out = self.run_cli('batch', str(ROOT / 'test' / 'sample_inputs'), str(self.template),
+                                   str(out_dir), '-j', '0', '--profile-slow', '0')
+        self.assertEqual(result, 0, out)
+        profile_dir = out_dir / PROFILE_DIR_NAME
+        self.assertEqual(sorted(p.name for p in profile_dir.iterdir()),
+                         sorted(f'{p.stem}.pstats' for p in self.samples))
+
+        # 門檻很高時不保留，且上次的紀錄會被移除
+        self.run_cli('batch', str(ROOT / 'test' / 'sample_inputs'), str(self.template),
+                     str(out_dir), '-j', '0', '--profile-slow', '3600')
+        self.assertEqual(list(profile_dir.iterdir()), [])
+
+    def test_render_profile_report(self):
+        profile_dir = self.work / 'profiles'
+        result, out = self.run_cli('render', str(self.samples[0]), str(self.template),
+                                   str(self.work / 'a.docx'), '--profile-slow', '0',
+                                   '--profile-dir', str(profile_dir))
+        self.assertEqual(result, 0, out)
+        self.assertTrue((profile_dir / f'{self.samples[0].stem}.pstats').exists())
+
+        report = self.work / 'report.json'
+        result, out = self.run_cli('profile-report', str(profile_dir), '--json', str(report))
+        self.assertEqual(result, 0, out)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual(len(data['files']), 1)
+        self.assertTrue(data['functions'])
+
+        result, _ = self.run_cli('profile-report', str(self.work / 'missing'))
+        self.assertEqual(result, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+清單式渲染（md2word run）測試
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils.render_plan import (
+    PlanRunner, RenderTask, group_tasks, load_render_plan,
+)
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestRenderPlan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        cls.docx = ROOT / 'templates' / 'simple_template.docx'
+        cls.xlsx = ROOT / 'templates' / 'excel' / 'sample_template.xlsx'
+        if len(cls.samples) < 2 or not cls.docx.exists() or not cls.xlsx.exists():
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        (self.work / 'data').mkdir()
+        for sample in self.samples[:2]:
+            shutil.copy(sample, self.work / 'data' / sample.name)
+
+    def write_yaml(self, text):
+        plan = self.work / 'plan.yaml'
+        plan.write_text(text, encoding='utf-8')
+        return plan
+
+    def matrix_plan(self):
+        return self.write_yaml(
+            "defaults:\n"
+            "  validate: true\n"
+            "jobs:\n"
+            "  - inputs: data/*.md\n"
+            f"    templates: ['{self.docx.as_posix()}', '{self.xlsx.as_posix()}']\n"
+            "    output: out/{input}_{template}.{ext}\n"
+        )
+
+    def test_yaml_matrix_expansion(self):
+        tasks = load_render_plan(str(self.matrix_plan()))
+        self.assertEqual(len(tasks), 4)
+        self.assertTrue(all(t.validate for t in tasks))
+        names = sorted(Path(t.output_path).name for t in tasks)
+        stem = self.samples[0].stem
+        self.assertIn(f'{stem}_simple_template.docx', names)
+        self.assertIn(f'{stem}_sample_template.xlsx', names)
+        self.assertTrue(all(Path(t.output_path).parent == self.work / 'out' for t in tasks))
+
+    def test_csv_plan(self):
+        plan = self.work / 'plan.csv'
+        plan.write_text(
+            'input,template,output,format\n'
+            f'data/{self.samples[0].name},{self.docx},out/a.docx,docx\n'
+            f'data/{self.samples[1].name},{self.xlsx},out/b.xlsx,\n',
+            encoding='utf-8',
+        )
+        tasks = load_render_plan(str(plan))
+        self.assertEqual([t.format for t in tasks], ['docx', 'auto'])
+        self.assertEqual(tasks[1].output_path, str(self.work / 'out' / 'b.xlsx'))
+
+    def test_invalid_plans(self):
+        duplicate = self.write_yaml(
+            "jobs:\n"
+            "  - inputs: data/*.md\n"
+            f"    template: '{self.docx.as_posix()}'\n"
+            "    output: out/same.docx\n"
+        )
+        with self.assertRaises(ValueError):
+            load_render_plan(str(duplicate))
+        with self.assertRaises(ValueError):
+            load_render_plan(str(self.write_yaml("jobs:\n  - input: data/a.md\n")))
+        with self.assertRaises(ValueError):
+            load_render_plan(str(self.write_yaml("jobs: {}\n")))
+
+    def test_grouping_parses_each_input_once(self):
+        tasks = [RenderTask(f'{i}.md', f'tpl{j}.docx', f'out/{i}_{j}.docx', index=i * 3 + j)
+                 for i in range(2) for j in range(3)]
+        groups = group_tasks(tasks, workers=2)
+        self.assertEqual(len(groups), 2)
+        for group in groups:
+            self.assertEqual(len({t.input_path for t in group}), 1)
+        # 單一輸入、多個 worker：拆成數組以便平行
+        single = [t for t in tasks if t.input_path == '0.md']
+        self.assertEqual([len(g) for g in group_tasks(single, workers=3)], [1, 1, 1])
+
+    def test_runner_in_process_and_pool(self):
+        for workers in (0, 2):
+            tasks = load_render_plan(str(self.matrix_plan()))
+            results = PlanRunner(workers=workers).run(tasks)
+            self.assertEqual(results['success_count'], 4, [t.error for t in tasks])
+            self.assertEqual(results['groups'], 2)
+            for task in tasks:
+                self.assertTrue(Path(task.output_path).exists())
+                self.assertGreater(task.fields, 0)
+
+    def test_parse_failure_fails_whole_group(self):
+        broken = self.work / 'data' / 'broken.md'
+        broken.write_bytes(b'\xff\xfe not utf-8')
+        tasks = [RenderTask(str(broken), str(self.docx), str(self.work / 'out' / 'x.docx')),
+                 RenderTask(str(broken), str(self.xlsx), str(self.work / 'out' / 'x.xlsx'), index=1)]
+        results = PlanRunner(workers=0, continue_on_error=True).run(tasks)
+        self.assertEqual(results['failed_count'], 2)
+        self.assertTrue(all('解析失敗' in t.error for t in tasks))
+
+    def test_cli_run_with_report(self):
+        report = self.work / 'report.json'
+        with redirect_stdout(io.StringIO()):
+            result = cli(['run', str(self.matrix_plan()), '-j', '0', '--report', str(report)])
+        self.assertEqual(result, 0)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual(data['success_count'], 4)
+        self.assertTrue(all(t['ok'] for t in data['tasks']))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
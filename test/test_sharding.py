@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+批次分片測試
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils.sharding import ShardPlan, assign_shards, parse_shard, stable_shard
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestSharding(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('1/4'), (0, 4))
+        self.assertEqual(parse_shard(' 4 / 4 '), (3, 4))
+        for bad in ('0/4', '5/4', '1/0', 'a/b', '3'):
+            with self.assertRaises(ValueError):
+                parse_shard(bad)
+
+    def test_hash_assignment_is_stable(self):
+        keys = [f'dir/file_{i}.md' for i in range(200)]
+        first = assign_shards(((k, 1) for k in keys), 4)
+        # 新增 / 移除其他檔案不影響既有檔案的分片
+        second = assign_shards(((k, 1) for k in keys[50:] + ['new.md']), 4)
+        for key in keys[50:]:
+            self.assertEqual(first[key], second[key])
+        self.assertEqual(stable_shard('dir/file_0.md', 4), first['dir/file_0.md'])
+        self.assertEqual(set(first.values()), {0, 1, 2, 3})
+
+    def test_size_assignment_balances_totals(self):
+        items = [('big.md', 1000), ('a.md', 400), ('b.md', 300), ('c.md', 300)]
+        assignment = assign_shards(items, 2, strategy='size')
+        totals = [0, 0]
+        for key, size in items:
+            totals[assignment[key]] += size
+        self.assertEqual(sorted(totals), [1000, 1000])
+
+    def test_plan_covers_every_file_once(self):
+        work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, work, True)
+        paths = []
+        for i in range(30):
+            path = work / 'sub' / f'{i}.md'
+            path.parent.mkdir(exist_ok=True)
+            path.write_text('x' * (i * 10), encoding='utf-8')
+            paths.append(path)
+        for strategy in ('hash', 'size'):
+            plan = ShardPlan(paths, work, 3, strategy=strategy)
+            selected = [p for shard in range(3) for p in plan.select(shard)]
+            self.assertEqual(sorted(selected), sorted(paths))
+            self.assertEqual(sum(files for files, _ in plan.totals()), 30)
+            self.assertIn('sub/0.md', plan.format(current=0))
+
+
+class TestBatchShardCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or len(cls.samples) < 2:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.in_dir = self.work / 'in'
+        self.in_dir.mkdir()
+        for sample in self.samples:
+            shutil.copy(sample, self.in_dir / sample.name)
+
+    def test_shards_partition_the_batch(self):
+        for shard in ('1/2', '2/2'):
+            result = cli(['batch', str(self.in_dir), str(self.template),
+                          str(self.work / 'out'), '-j', '0', '--shard', shard])
+            self.assertEqual(result, 0)
+        outputs = sorted(p.stem for p in (self.work / 'out').glob('*.docx'))
+        self.assertEqual(outputs, sorted(p.stem for p in self.samples))
+
+    def test_list_shard_does_not_render(self):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(['batch', str(self.in_dir), str(self.template),
+                          str(self.work / 'out'), '--shard', '1/2', '--list-shard',
+                          '--shard-by', 'size'])
+        self.assertEqual(result, 0)
+        self.assertIn('分片 2/2', buf.getvalue())
+        self.assertFalse((self.work / 'out').exists())
+
+    def test_invalid_shard(self):
+        with redirect_stdout(io.StringIO()):
+            result = cli(['batch', str(self.in_dir), str(self.template),
+                          str(self.work / 'out'), '--shard', '3/2'])
+        self.assertEqual(result, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
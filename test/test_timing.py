@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+各步驟耗時量測測試
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.main import cli
+from md_word_renderer.utils.timing import Timings, collecting, span
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_disabled_span_is_noop(self):
+        self.assertIs(span('a'), span('b'))
+        with span('parse'):
+            pass
+
+    def test_nested_spans_record_self_time(self):
+        timings = Timings()
+        with collecting(timings, file='a.md'):
+            with span('render'):
+                time.sleep(0.02)
+                with span('images'):
+                    time.sleep(0.03)
+        totals = timings.per_file['a.md']
+        self.assertGreaterEqual(totals['images'], 0.03)
+        self.assertLess(totals['render'], 0.03)
+        self.assertAlmostEqual(timings.summary()['total_s'], sum(totals.values()))
+
+    def test_collection_is_thread_local(self):
+        timings = Timings()
+
+        def other():
+            with span('other'):
+                pass
+
+        with collecting(timings):
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+            with span('mine'):
+                pass
+        self.assertEqual(list(timings.samples), ['mine'])
+
+    def test_summary_percentiles_and_slowest(self):
+        timings = Timings()
+        for i in range(1, 101):
+            timings.add('render', i / 1000, f'{i}.md')
+        timings.merge([('save', 0.5)], '7.md')
+        summary = timings.summary(top=2)
+        render = next(s for s in summary['stages'] if s['stage'] == 'render')
+        self.assertEqual(render['count'], 100)
+        self.assertAlmostEqual(render['p50_s'], 0.050, delta=0.0015)
+        self.assertAlmostEqual(render['p90_s'], 0.090, delta=0.0015)
+        self.assertAlmostEqual(render['max_s'], 0.100)
+        self.assertEqual([s['file'] for s in summary['slowest']], ['7.md', '100.md'])
+        self.assertIn('最慢的檔案', timings.format())
+
+
+class TestTimingsCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or not cls.samples:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+
+    def run_cli(self, *argv):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            result = cli(list(argv))
+        self.assertEqual(result, 0, buf.getvalue())
+        return buf.getvalue()
+
+    def test_render_timings_json(self):
+        report = self.work / 'timings.json'
+        out = self.run_cli('render', str(self.samples[0]), str(self.template),
+                           str(self.work / 'out.docx'), '--timings', '--timings-json', str(report))
+        self.assertIn('各步驟耗時', out)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        stages = {s['stage'] for s in data['stages']}
+        self.assertTrue({'read', 'parse', 'load_template', 'render', 'save'} <= stages)
+        self.assertEqual(list(data['per_file']), [str(self.samples[0])])
+
+    def test_batch_timings_per_file(self):
+        in_dir = ROOT / 'test' / 'sample_inputs'
+        report = self.work / 'timings.json'
+        self.run_cli('batch', str(in_dir), str(self.template), str(self.work / 'out'),
+                     '-j', '0', '--timings-json', str(report))
+        data = json.loads(report.read_text(encoding='utf-8'))
+        self.assertEqual(data['files'], len(self.samples))
+        for stages in data['per_file'].values():
+            self.assertTrue({'read', 'parse', 'render', 'write'} <= set(stages))
+
+    def test_batch_templates_timings_per_template(self):
+        tpl_dir = self.work / 'templates'
+        tpl_dir.mkdir()
+        shutil.copy(self.template, tpl_dir / 'a.docx')
+        shutil.copy(self.template, tpl_dir / 'b.docx')
+        report = self.work / 'timings.json'
+        out = self.run_cli('batch-templates', str(self.samples[0]), str(tpl_dir), str(self.work / 'out'),
+                           '--timings', '--timings-json', str(report))
+        self.assertIn('各步驟耗時', out)
+        data = json.loads(report.read_text(encoding='utf-8'))
+        per_file = data['per_file']
+        self.assertTrue({'read', 'parse'} <= set(per_file[str(self.samples[0])]))
+        for name in ('a.docx', 'b.docx'):
+            self.assertTrue({'load_template', 'render', 'save'} <= set(per_file[str(tpl_dir / name)]))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
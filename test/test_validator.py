@@ -2,6 +2,8 @@
 Schema 驗證器測試
 """
 
+import json
+from importlib import metadata
 import pytest
 import sys
 from pathlib import Path
@@ -10,6 +12,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from md_word_renderer.validator import SchemaValidator
+from md_word_renderer.validator import codegen
+from md_word_renderer.validator.codegen import UnsupportedSchema, compile_schema, generate_source
+from md_word_renderer.validator import schema_validator
+from md_word_renderer.validator.schema_validator import (
+    CLI_MAX_ERRORS, compiled_validator, is_permissive, render_validator,
+)
+
+
+SCHEMA_FILE = Path(__file__).parent.parent / 'src' / 'md_word_renderer' / 'validator' / 'schemas' / 'markdown_schema.json'
 
 
 class TestSchemaValidator:
@@ -61,5 +72,199 @@ class TestSchemaValidator:
             SchemaValidator("nonexistent_schema.json")
 
 
+
+STRICT_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "required": ["系統名稱"],
+    "additionalProperties": {"type": "string"},
+}
+
+
+class TestCompiledValidator:
+    """編譯快取、寬鬆 schema 捷徑與錯誤數上限"""
+
+    def test_compiled_once_per_schema(self, tmp_path):
+        path = tmp_path / 'strict.json'
+        path.write_text(json.dumps(STRICT_SCHEMA), encoding='utf-8')
+        strict = SchemaValidator(str(path))
+        assert SchemaValidator(str(path)).validator is strict.validator
+        assert compiled_validator(json.loads(json.dumps(STRICT_SCHEMA))) is strict.validator
+        # 鍵的順序決定錯誤的順序，不能共用
+        reordered = dict(reversed(list(STRICT_SCHEMA.items())))
+        assert compiled_validator(reordered) is not strict.validator
+
+    def test_permissive_schema_short_circuits(self):
+        validator = SchemaValidator()
+        assert validator.permissive
+        assert is_permissive(validator._load_schema(str(SCHEMA_FILE)))
+        assert not is_permissive(STRICT_SCHEMA)
+
+        class Exploding(dict):
+            def items(self):
+                raise AssertionError("寬鬆 schema 不應走訪資料")
+
+        assert validator.validate(Exploding(a="b")) == (True, [])
+        # 寬鬆 schema 不建立驗證器，遇到非物件才建立
+        assert validator.validator is None
+        assert SchemaValidator(compiled=True).generated is None
+        # 非物件仍由 jsonschema 產生相同的錯誤訊息
+        is_valid, errors = validator.validate(["not", "object"])
+        assert not is_valid
+        assert errors == ["[root] ['not', 'object'] is not of type 'object'"]
+        assert validator.validator is not None
+
+    def test_max_errors_stops_early(self, tmp_path):
+        path = tmp_path / 'strict.json'
+        path.write_text(json.dumps(STRICT_SCHEMA), encoding='utf-8')
+        data = {f"欄位{i}": i for i in range(10)}
+
+        is_valid, errors = SchemaValidator(str(path), max_errors=3).validate(data)
+        assert not is_valid
+        assert len(errors) == 3
+        _, all_errors = SchemaValidator(str(path), max_errors=0).validate(data)
+        assert len(all_errors) == 11
+        assert errors == all_errors[:3]
+        # 預設不限
+        assert SchemaValidator(str(path)).validate(data)[1] == all_errors
+
+    def test_render_and_batch_share_capped_validator(self, tmp_path, monkeypatch):
+        from md_word_renderer.utils.pipeline import BatchPipeline
+
+        assert render_validator().max_errors == CLI_MAX_ERRORS
+        created = []
+
+        def tracking():
+            created.append(render_validator())
+            return created[-1]
+
+        monkeypatch.setattr(schema_validator, 'render_validator', tracking)
+        sample = Path(__file__).parent / 'sample_inputs' / 'sample_01.md'
+        template = Path(__file__).parent.parent / 'templates' / 'simple_template.docx'
+        result = BatchPipeline(workers=0, validate=True).run(
+            [(str(sample), str(template), str(tmp_path / 'out.docx'))])
+        assert result['success_count'] == 1
+        assert [v.max_errors for v in created] == [CLI_MAX_ERRORS]
+
+    def test_load_schema_switches_validator(self, tmp_path):
+        path = tmp_path / 'strict.json'
+        path.write_text(json.dumps(STRICT_SCHEMA), encoding='utf-8')
+        validator = SchemaValidator()
+        validator.load_schema(str(path))
+        assert not validator.permissive
+        is_valid, errors = validator.validate({})
+        assert not is_valid
+        assert errors == ["[root] '系統名稱' is a required property"]
+
+
+CHILDREN_SCHEMA = {
+    "type": "object",
+    "required": ["系統名稱", "版本"],
+    "properties": {
+        "系統名稱": {"type": "string", "minLength": 1},
+        "版本": {"type": ["string", "number"], "pattern": "^\\d"},
+        "狀態": {"enum": ["草稿", "正式"]},
+        "異動內容": {"type": "array", "items": {"$ref": "#/definitions/childItem"}},
+    },
+    "additionalProperties": False,
+    "definitions": json.loads(SCHEMA_FILE.read_text(encoding='utf-8'))["definitions"],
+}
+
+INVALID_DATA = [
+    {},
+    ["not", "object"],
+    {"系統名稱": "", "版本": "v1", "狀態": "廢止", "其他": 1, "多餘": 2},
+    {"系統名稱": 1, "版本": True, "異動內容": [
+        {"number": "1", "value": "項目1", "children": [
+            {"number": 2, "children": "x"},
+            {"number": "1", "value": "子項目", "children": [{"value": None}]},
+        ]},
+        "不是物件",
+        {"value": "缺 number"},
+    ]},
+]
+
+
+class TestGeneratedValidator:
+    """由 schema 產生的驗證函式：錯誤與 jsonschema 相同、磁碟快取"""
+
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(codegen.CACHE_ENV_VAR, str(tmp_path / 'validators'))
+        monkeypatch.setattr(codegen, '_LOADED', {})
+        self.cache_dir = tmp_path / 'validators'
+        self.schema_path = tmp_path / 'children.json'
+        self.schema_path.write_text(json.dumps(CHILDREN_SCHEMA), encoding='utf-8')
+
+    @pytest.mark.parametrize("data", INVALID_DATA)
+    @pytest.mark.parametrize("max_errors", [0, 2])
+    def test_same_errors_as_jsonschema(self, data, max_errors):
+        reference = SchemaValidator(str(self.schema_path), max_errors=max_errors)
+        compiled = SchemaValidator(str(self.schema_path), max_errors=max_errors, compiled=True)
+        assert compiled.generated is not None
+        assert compiled.validator is None
+        assert compiled.validate(data) == reference.validate(data)
+
+    def test_messages(self):
+        _, errors = SchemaValidator(str(self.schema_path), max_errors=0, compiled=True).validate(INVALID_DATA[3])
+        assert "[root] '版本' is a required property" not in errors
+        assert "[版本] True is not of type 'string', 'number'" in errors
+        assert "[異動內容.0.children.0.number] 2 is not of type 'string'" in errors
+        assert "[異動內容.0.children.1.children.0] 'number' is a required property" in errors
+        assert "[異動內容.1] '不是物件' is not of type 'object'" in errors
+
+    def test_valid_data(self):
+        data = {"系統名稱": "測試系統", "版本": 1.0, "異動內容": [
+            {"number": "1", "value": "項目1", "children": [{"number": "1", "value": "子項目"}]},
+        ]}
+        assert SchemaValidator(str(self.schema_path), compiled=True).validate(data) == (True, [])
+
+    def test_source_cached_on_disk(self):
+        compile_schema(CHILDREN_SCHEMA)
+        files = list(self.cache_dir.glob('v*.py'))
+        assert len(files) == 1
+        assert files[0].read_text(encoding='utf-8') == generate_source(CHILDREN_SCHEMA)
+
+        # 新行程（清空行程內快取）直接載入磁碟上的原始碼，不再產生
+        codegen._LOADED.clear()
+        files[0].write_text(files[0].read_text(encoding='utf-8') + "\nLOADED_FROM_DISK = True\n",
+                            encoding='utf-8')
+        func = compile_schema(CHILDREN_SCHEMA)
+        assert func.__globals__.get('LOADED_FROM_DISK') is True
+        assert compile_schema(json.loads(json.dumps(CHILDREN_SCHEMA))) is func
+
+    def test_key_order_and_jsonschema_version(self, tmp_path):
+        assert f"-js{metadata.version('jsonschema')}-" in codegen.schema_key(CHILDREN_SCHEMA)
+
+        # 只差在鍵順序的 schema 各自產生，錯誤順序仍與 jsonschema 相同
+        reordered = dict(reversed(list(CHILDREN_SCHEMA.items())))
+        assert codegen.schema_key(reordered) != codegen.schema_key(CHILDREN_SCHEMA)
+        path = tmp_path / 'reordered.json'
+        path.write_text(json.dumps(reordered), encoding='utf-8')
+        SchemaValidator(str(self.schema_path), compiled=True)
+        for data in INVALID_DATA:
+            compiled = SchemaValidator(str(path), max_errors=0, compiled=True).validate(data)
+            assert compiled == SchemaValidator(str(path), max_errors=0).validate(data)
+
+    def test_corrupt_cache_regenerated(self):
+        compile_schema(CHILDREN_SCHEMA)
+        path, = self.cache_dir.glob('v*.py')
+        path.write_text("def validate(:\n", encoding='utf-8')
+        codegen._LOADED.clear()
+        func = compile_schema(CHILDREN_SCHEMA)
+        assert func({}, None)
+        assert path.read_text(encoding='utf-8') == generate_source(CHILDREN_SCHEMA)
+
+    def test_unsupported_falls_back(self, tmp_path):
+        schema = {"type": "object", "properties": {"n": {"type": "integer", "minimum": 1}}}
+        with pytest.raises(UnsupportedSchema):
+            generate_source(schema)
+        path = tmp_path / 'minimum.json'
+        path.write_text(json.dumps(schema), encoding='utf-8')
+        validator = SchemaValidator(str(path), compiled=True)
+        assert validator.generated is None
+        assert validator.validate({"n": 0}) == (False, ["[n] 0 is less than the minimum of 1"])
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+監看模式測試
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from md_word_renderer.cli.watch import WatchSession
+from md_word_renderer.utils.watcher import (
+    InotifyWatcher, PollingWatcher, create_watcher, wait_for_changes,
+)
+
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestWatchers(unittest.TestCase):
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.target = self.work / 'a.md'
+        self.target.write_text('1. 名稱 | A\n', encoding='utf-8')
+
+    def check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.poll(0.05), set())
+        # 以「寫暫存檔再 rename」的方式存檔（多數編輯器的行為）
+        tmp = self.work / '.a.md.swp'
+        tmp.write_text('1. 名稱 | B (changed)\n', encoding='utf-8')
+        os.replace(tmp, self.target)
+        (self.work / 'unrelated.txt').write_text('x', encoding='utf-8')
+        changed = wait_for_changes(watcher, debounce=0.05, timeout=2)
+        self.assertEqual(changed, {str(self.target)})
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([str(self.target)], interval=0.02))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), '僅 Linux 支援 inotify')
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher([str(self.target)]))
+
+    def test_create_watcher_fallback(self):
+        watcher = create_watcher([str(self.target)], polling=True)
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.name, 'polling')
+
+
+class TestWatchSession(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.template = ROOT / 'templates' / 'simple_template.docx'
+        cls.samples = sorted((ROOT / 'test' / 'sample_inputs').glob('*.md'))
+        if not cls.template.exists() or len(cls.samples) < 2:
+            raise unittest.SkipTest("測試檔案不存在")
+
+    def setUp(self):
+        self.work = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work, True)
+        self.inputs = []
+        for sample in self.samples[:2]:
+            dest = self.work / sample.name
+            shutil.copy(sample, dest)
+            self.inputs.append(dest)
+        self.template_copy = self.work / 'tpl.docx'
+        shutil.copy(self.template, self.template_copy)
+        self.logs = []
+        self.session = WatchSession(
+            {str(p): str(self.work / 'out' / f'{p.stem}.docx') for p in self.inputs},
+            str(self.template_copy), 'docx', log=self.logs.append,
+        )
+
+    def test_affected_outputs(self):
+        self.session.render_all()
+        first, second = (str(p.resolve()) for p in self.inputs)
+        self.assertEqual(self.session.affected({first}), {first: True})
+        self.assertEqual(
+            self.session.affected({str(self.template_copy.resolve())}),
+            {first: False, second: False},
+        )
+        self.assertEqual(self.session.affected({str(self.work / 'other.md')}), {})
+
+    def test_template_change_reuses_parsed_data(self):
+        self.session.render_all()
+        parsed = dict(self.session._parsed)
+        self.session.handle({str(self.template_copy.resolve())})
+        for key, data in self.session._parsed.items():
+            self.assertIs(data, parsed[key])
+        self.assertEqual(self.session.renders, 4)
+
+    def test_run_rerenders_changed_input(self):
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self.session.run,
+            kwargs={'polling': True, 'interval': 0.02, 'debounce': 0.05, 'stop': stop},
+            daemon=True,
+        )
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(stop.set)
+
+        deadline = time.monotonic() + 10
+        while not any('👀' in line for line in self.logs) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.session.renders, 2)
+
+        changed = self.inputs[0]
+        changed.write_text(changed.read_text(encoding='utf-8') + '\n\n', encoding='utf-8')
+        while self.session.renders < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.session.renders, 3)
+        self.assertTrue(any(changed.name in line for line in self.logs if '✓' in line))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)